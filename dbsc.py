@@ -2,9 +2,34 @@
 import os
 import sys
 import json
+import gzip
+import re
+import math
+import random
 import difflib
-from databricks import sql
+import sqlite3
+import socket
+import hashlib
+import zlib
+import zipfile
+import heapq
+import tempfile
+import shutil
+import time
+import tracemalloc
+import contextlib
+import threading
+import queue
+import itertools
+import concurrent.futures
+import http.client
+import http.server
+import socketserver
+from array import array
+from collections import OrderedDict
+from datetime import datetime
 from fnmatch import fnmatch
+from operator import itemgetter
 from timeit import default_timer as timer
 
 #Constants
@@ -13,6 +38,115 @@ SCHEMA_ARG_SEPARATOR="+"
 SEPARATOR_ID="$SEP$"
 MAGIC_TAG="# MAGIC"
 NULL_COMMENT="(null)"
+SNAPSHOT_PREFIX="snap:"
+SNAPSHOT_ID_PREFIX="#"
+SNAPSHOT_TIME_SEPARATOR="~"
+
+#Query to get table,views and functions
+TBVW_LIST_QUERY="show tables in <schemaname> like '*'"         #Table/View list query
+TBVW_DETL_QUERY="show create table <tablename>"                #Table/View detail query
+FUNC_LIST_QUERY="show user functions in <schemaname> like '*'" #Function list query
+FUNC_DETL_QUERY="describe function extended <functionname>"    #Function detail query
+VIEW_LIST_QUERY="show views in <schemaname>"                     #View list query (tells tables from views without detail query)
+FUNC_TYPE_QUERY="describe function <functionname>"               #Function type query (no function body)
+FUNC_TYPES_QUERY="select routine_name,data_type from <infoschema>.routines where routine_schema='<schemaname>'" #Function types of schema (unity catalog)
+SCHEMA_LIST_QUERY="show schemas"                                 #Schema list query (catalog scan)
+WARMUP_QUERY="select 1"                                          #Warm-up query (waits for warehouse to start)
+
+#Object fingerprint query (unity catalog information schema, one hash by object computed by warehouse)
+#(columns are hashed sorted by name as they are compared by name, parameters are hashed in position order)
+FINGERPRINT_QUERY=(
+  "select 'TBVW' as kind,t.table_name as object,sha2(concat_ws('|',t.table_type,coalesce(t.comment,''),coalesce(v.view_definition,''),coalesce(c.columns,'')),256) as hash "
+  "from <infoschema>.tables t "
+  "left join <infoschema>.views v on v.table_schema=t.table_schema and v.table_name=t.table_name "
+  "left join (select table_name,concat_ws(';',array_sort(collect_list(concat_ws(':',column_name,full_data_type,is_nullable,coalesce(comment,''))))) as columns "
+  "from <infoschema>.columns where table_schema='<schemaname>' group by table_name) c on c.table_name=t.table_name "
+  "where t.table_schema='<schemaname>' "
+  "union all "
+  "select 'FUNC' as kind,r.routine_name as object,sha2(concat_ws('|',r.full_data_type,coalesce(r.routine_definition,''),coalesce(p.parameters,''),coalesce(rc.columns,'')),256) as hash "
+  "from <infoschema>.routines r "
+  "left join (select specific_name,concat_ws(';',array_sort(collect_list(concat_ws(':',lpad(cast(ordinal_position as string),5,'0'),parameter_name,full_data_type)))) as parameters "
+  "from <infoschema>.parameters where specific_schema='<schemaname>' group by specific_name) p on p.specific_name=r.specific_name "
+  "left join (select specific_name,concat_ws(';',array_sort(collect_list(concat_ws(':',lpad(cast(ordinal_position as string),5,'0'),column_name,full_data_type,coalesce(comment,''))))) as columns "
+  "from <infoschema>.routine_columns where specific_schema='<schemaname>' group by specific_name) rc on rc.specific_name=r.specific_name "
+  "where r.routine_schema='<schemaname>'"
+)
+
+#Project archive constants (workspace exports read without extracting them)
+ARCHIVE_EXTENSIONS=[".zip",".dbc"]                     #Archive file extensions accepted as project folders
+ARCHIVE_MEMBER_SEPARATOR="!"                            #Separator of archive path and member name in file names
+ARCHIVE_INDEX_FILE="dbsc-index-<archive>.json"          #Index of objects created by archive members (in user cache folder)
+ARCHIVE_READERS=8                                       #Threads reading archive members
+DBC_NOTEBOOK_EXTENSIONS=[".python",".sql",".scala",".r"] #Notebook members of dbc archives (json notebooks)
+
+#External comparison constants
+EXTERNAL_RUN_OBJECTS=1000
+EXTERNAL_MERGE_RUNS=16 #Maximum run files merged at once (more runs are merged in several passes)
+EXTERNAL_READ_BUFFER=1024 #Read buffer of every open run file (bytes, longer lines are read whole)
+
+#Columnar comparison constants
+COLUMNAR_MIN_COLUMNS=10000
+COLUMNAR_TYPE=itemgetter("type")
+COLUMNAR_NULLABLE=itemgetter("nullable")
+COLUMNAR_COMMENT=itemgetter("comment")
+
+#Shard constants
+SHARD_PARTIAL_FILE="dbsc-shard-<i>-of-<n>.json"
+
+#Per user cache folder constants (default fetch journal, latency history and archive indexes, never in current folder)
+CACHE_FOLDER="dbsc"
+
+#Fetch journal constants
+JOURNAL_FILE="dbsc-journal-<run>.jsonl"
+SHARD_JOURNAL_FILE="dbsc-journal-<run>-<i>-of-<n>.jsonl"
+
+#Fetch scheduling constants
+LATENCY_FILE="dbsc-latencies.json"
+LATENCY_KIND_DEFAULTS={"TBVW":0.2,"FUNC":0.5} #Expected detail query latency (secs) of object kinds without history
+LATENCY_WEIGHT=0.5                              #Weight of last latency in expected latency (exponential moving average)
+
+#Sampling constants
+SAMPLE_CONFIDENCE_Z=1.96 #Normal quantile of 95% confidence intervals
+
+#Body store constants
+BODY_STORE_MIN_LENGTH=64 #Shorter view and function bodies are kept inline in definitions
+
+#Schema name replacement constants
+REPLACEMENT_CACHE_SIZE=256 #Bodies kept with schema name replacements applied (least recently used are dropped)
+
+#Rename detection constants (minhash signatures split in bands for locality sensitive hashing)
+RENAME_SIMILARITY=0.5     #Minimum jaccard similarity of renamed objects
+MINHASH_PERMUTATIONS=64   #Hash functions of minhash signatures
+MINHASH_BANDS=16          #Bands of signatures (objects sharing any band are candidates)
+MINHASH_PRIME=(1<<61)-1   #Prime modulus of hash functions
+MINHASH_SEED=1            #Seed of hash function coefficients
+SHINGLE_WORDS=3           #Words by shingle of view bodies
+
+#Browser constants
+BROWSE_CACHE_SIZE=16 #Rendered object comparisons kept by browser (least recently used are dropped)
+
+#Pipelined comparison constants
+PIPELINE_QUEUE_SIZE=256
+
+#Watch mode constants
+WATCH_INTERVAL=0.5
+
+#Daemon mode constants
+DAEMON_HOST="127.0.0.1"
+DAEMON_PORT=8765
+DAEMON_UNIX_PREFIX="unix:"
+DAEMON_POOL_SIZE=4
+DAEMON_CACHE_TTL=300
+DAEMON_CACHE_SIZE=64
+DAEMON_TIMEOUT=3600
+DAEMON_ACQUIRE_TIMEOUT=600
+DAEMON_REQUEST_KEYS={"/compare":["source","target"],"/dump":["source"]}
+
+#Profiling constants
+PROFILE_TOP_OBJECTS=10
+PROFILE_BUCKETS_MS=[1,5,10,50,100,500,1000,5000,10000]
+PROFILE_PHASES=["connect","list","detail","read","parse","compare","print"]
+PROFILE_LOCK=threading.Lock() #Queries are profiled from parallel fetch threads
 
 #Object ids
 OBJECTID_TABLE     ="tabl"
@@ -20,15 +154,18 @@ OBJECTID_VIEW      ="view"
 OBJECTID_SCALARFUNC="scfn"
 OBJECTID_TABLEFUNC ="tbfn"
 
+#Comparison aspects
+COMPARE_ASPECTS=["columns","comments","bodies","parameters","returns"]
+
 #Control chars escape sequences
 ESCAPE_SEQUENCES=[[";","$$SEMCOL$$"],["(","$$BEGPAR$$"],[")","$$ENDPAR$$"],["'","$$QUOTE$$"],[" comment ","$$COMM$$"]]
 
 #Object constants
 OBJECTID_CONF = {
-  OBJECTID_TABLE     :{"order":0,"description":"Tables"},
-  OBJECTID_VIEW      :{"order":1,"description":"Views"},
-  OBJECTID_SCALARFUNC:{"order":2,"description":"Scalar functions"},
-  OBJECTID_TABLEFUNC :{"order":3,"description":"Table functions"}
+  OBJECTID_TABLE     :{"order":0,"description":"Tables","kind":"TBVW"},
+  OBJECTID_VIEW      :{"order":1,"description":"Views","kind":"TBVW"},
+  OBJECTID_SCALARFUNC:{"order":2,"description":"Scalar functions","kind":"FUNC"},
+  OBJECTID_TABLEFUNC :{"order":3,"description":"Table functions","kind":"FUNC"}
 }
 
 #Equivalent data types
@@ -39,88 +176,359 @@ TYPE_TRANSLATION={
   "bigint"  :"long"
 }
 
-#Variables to show progress
-_LastMessage=""
-_MessageCnt=0
+#Run options (defaults)
+RUN_OPTIONS={
+  "source":"",
+  "target":"",
+  "filter":"*",
+  "sep":False,
+  "raw":False,
+  "progress":True,
+  "dump":False,
+  "store":"",
+  "snapshots":False,
+  "profile":False,
+  "profilefile":"",
+  "watch":False,
+  "interval":WATCH_INTERVAL,
+  "shard":"",
+  "partial":"",
+  "external":False,
+  "externalfolder":"",
+  "pipeline":False,
+  "fingerprints":False,
+  "catalog":False,
+  "bodystore":False,
+  "bodyfolder":"",
+  "renames":False,
+  "similarity":RENAME_SIMILARITY,
+  "browse":False,
+  "sample":"",
+  "seed":0,
+  "queuesize":PIPELINE_QUEUE_SIZE,
+  "journal":"",
+  "resume":False,
+  "continueonerror":False,
+  "record":"",
+  "replay":"",
+  "latency":-1.0,
+  "parallel":1,
+  "compare":COMPARE_ASPECTS,
+  "types":list(OBJECTID_CONF),
+  "latencies":"",
+  "merge":[],
+  "serve":False,
+  "server":"",
+  "address":DAEMON_HOST+":"+str(DAEMON_PORT),
+  "pool":DAEMON_POOL_SIZE,
+  "ttl":DAEMON_CACHE_TTL,
+  "cachesize":DAEMON_CACHE_SIZE,
+  "verbose":False
+}
 
-#Global display progress flag
-_ShowProgress=True
+#Configuration file defaults
+CONFIG_DEFAULTS={
+  "schema_groups":{},
+  "schema_name_replacements":[],
+  "ignored_objects_in_repo":[]
+}
 
 #----------------------------------------------------------------------------------------------------------------------
 # Show help
 #----------------------------------------------------------------------------------------------------------------------
-def ShowHelp():
+def ShowHelp(Config):
   print("Databricks schema compare tool - v1.0 - Diego Marin 2025")
   print("")
-  print("Usage: python dbsc.py <source> <target> [--filter:<pattern>] [--sep] [--raw] [--np]")
-  print("       python dbsc.py --dump:<source> [--filter:<pattern>] [--np]")
+  print("Usage: python dbsc.py <source> <target> [--filter:<pattern>] [--sep] [--raw] [--np] [--store:<file>] [--profile[:<file>]] [--watch[:<secs>]] [--server:<address>] [--shard:<i>/<n>] [--partial:<file>] [--compare:<aspects>] [--types:<types>] [--sample:<n|pct>] [--seed:<n>] [--external[:<folder>]] [--pipeline[:<n>]] [--fingerprints] [--catalog] [--bodystore[:<folder>]] [--renames[:<similarity>]] [--browse] [--journal:<file>] [--resume] [--continue-on-error] [--record:<file>] [--replay:<file>] [--latency:<ms>] [--parallel:<n>] [--latencies:<file>]")
+  print("       python dbsc.py --dump:<source> [--filter:<pattern>] [--np] [--store:<file>] [--profile[:<file>]] [--server:<address>] [--bodystore:<folder>] [--journal:<file>] [--resume] [--continue-on-error] [--record:<file>] [--replay:<file>] [--latency:<ms>] [--parallel:<n>] [--latencies:<file>]")
+  print("       python dbsc.py --snapshots:<file> [--filter:<pattern>]")
+  print("       python dbsc.py merge <file> [<file> ...] [--sep]")
+  print("       python dbsc.py serve [--http:<host:port>] [--socket:<path>] [--pool:<n>] [--ttl:<secs>] [--cache:<n>] [--verbose]")
   print("")
-  print("<source>           : Databricks source schema names, schema group or project folder")
-  print("<target>           : Databricks target schema names, schema group or project folder")
+  print("<source>           : Databricks source schema names, schema group or project folder (or .zip / .dbc workspace export)")
+  print("<target>           : Databricks target schema names, schema group or project folder (or .zip / .dbc workspace export)")
   print("--dump:<source>    : No comparison just dump schema definition as json")
+  print("--snapshots:<file> : No comparison just list snapshots saved in snapshot store file")
   print("--filter:<pattern> : Filter objects to compare using pattern")
   print("--sep              : Print separation line between objects in results")
   print("--raw              : Report results as raw list")
   print("--np               : No progress indicator")
+  print("--store:<file>     : Save definitions read as snapshot in SQLite snapshot store file")
+  print("--profile[:<file>] : Print profiling report (phases, queries, parser, memory) and optionally save it as json")
+  print("--watch[:<secs>]   : Keep watching project folder and compare again objects in changed files (polling interval, default "+str(WATCH_INTERVAL)+"s)")
+  print("--shard:<i>/<n>    : Compare only shard i of n (objects partitioned by hash) and save partial result")
+  print("--partial:<file>   : Partial result file of shard (default "+SHARD_PARTIAL_FILE+")")
+  print("--compare:<aspects>: Compare only given aspects separated by commas ("+",".join(COMPARE_ASPECTS)+", all by default)")
+  print("--types:<types>    : Compare only given object types separated by commas ("+",".join(OBJECTID_CONF)+", all by default)")
+  print("--sample:<n|pct>   : Compare only a random sample of exactly n objects or pct% of objects (at least one by schema and type) and estimate drift by schema")
+  print("--seed:<n>         : Random seed of sample (default 0, same seed gives same sample)")
+  print("--external[:<dir>] : Compare with bounded memory spilling definitions to sorted files (in temporary folder or given one)")
+  print("--pipeline[:<n>]   : Compare objects as soon as both sides are fetched (fetch queue size, default "+str(PIPELINE_QUEUE_SIZE)+")")
+  print("--fingerprints     : Skip objects with equal fingerprints computed by warehouse on both sides (unity catalog schemas)")
+  print("--catalog          : Compare all schemas of catalog, source and target are schema name patterns paired after replacements")
+  print("--bodystore[:<dir>]: Keep view and function bodies compressed out of definitions (in memory or in given folder)")
+  print("--renames[:<sim>]  : Detect tables and views renamed or moved among objects on one side (minimum similarity, default "+str(RENAME_SIMILARITY)+")")
+  print("--browse           : Browse different objects in terminal, object comparison is done when object is opened")
+  print("--journal:<file>   : Fetch journal file where fetched objects are appended (default in user cache folder, removed when run finishes)")
+  print("--resume           : Resume run using fetch journal (objects already fetched are not queried again)")
+  print("--continue-on-error: Report objects that cannot be read as errors instead of stopping the run (exit code is 1)")
+  print("--record:<file>    : Record metastore queries and results in cassette file (compressed when file name ends with .gz)")
+  print("--replay:<file>    : Answer metastore queries from cassette file instead of connecting to databricks")
+  print("--latency:<ms>     : Latency of replayed queries (recorded latency by default)")
+  print("--parallel:<n>     : Run detail queries on n connections (slowest objects first as measured in previous runs)")
+  print("--latencies:<file> : Latency history file of detail queries (default "+LATENCY_FILE+" in user cache folder)")
+  print("merge              : Merge partial result files of all shards and report results as a single comparison")
+  print("--server:<address> : Send comparison or dump to running daemon (http://<host:port> or "+DAEMON_UNIX_PREFIX+"<path>)")
+  print("serve              : Run as daemon keeping warm connections and cached schema definitions between requests")
+  print("--http:<host:port> : Daemon http address (default "+DAEMON_HOST+":"+str(DAEMON_PORT)+")")
+  print("--socket:<path>    : Daemon unix socket path instead of http address")
+  print("--pool:<n>         : Daemon connection pool size (default "+str(DAEMON_POOL_SIZE)+")")
+  print("--ttl:<secs>       : Daemon cached schema expiration in seconds (default "+str(DAEMON_CACHE_TTL)+")")
+  print("--cache:<n>        : Daemon maximum number of cached schemas (default "+str(DAEMON_CACHE_SIZE)+")")
+  print("--verbose          : Daemon prints request log")
   print("")
-  print("Selected databricks instance: "+os.environ["AZURE_SELECTION"]+(" ("+os.environ["DATABRICKS_SERVER_HOSTNAME"]+")" if "DATABRICKS_SERVER_HOSTNAME" in os.environ else ""))
+  print("Selected databricks instance: "+os.environ.get("AZURE_SELECTION","")+(" ("+os.environ["DATABRICKS_SERVER_HOSTNAME"]+")" if "DATABRICKS_SERVER_HOSTNAME" in os.environ else ""))
   print("")
   print("Notes:")
   print("Databricks instance is read by default from environment variable DATABRICKS_SERVER_HOSTNAME if it exists")
   print("Databricks http path is read from environment variable DATABRICKS_HTTP_PATH if it exists")
   print("Databricks access token is read by default from environment variable DATABRICKS_TOKEN if it exists")
   print("Schema names in source and target can be one or several (separated by "+SCHEMA_ARG_SEPARATOR+")")
-  if "schema_groups" in _Config:
-    print("Schema groups as defined in configuration file can be one of these: "+",".join(_Config["schema_groups"]))
+  print("Source and target can be a stored snapshot: "+SNAPSHOT_PREFIX+"<label>, "+SNAPSHOT_PREFIX+"<label>"+SNAPSHOT_TIME_SEPARATOR+"<datetime> or "+SNAPSHOT_PREFIX+SNAPSHOT_ID_PREFIX+"<id> (requires --store)")
+  if len(Config["schema_groups"])!=0:
+    print("Schema groups as defined in configuration file can be one of these: "+",".join(Config["schema_groups"]))
   
 #----------------------------------------------------------------------------------------------------------------------
 # Get command line arguments
 #----------------------------------------------------------------------------------------------------------------------
-def GetCommandLineOptions(Options):
+def GetCommandLineOptions(Argv,Config,Options):
 
   #Default values for options
-  SrcFolder=""
-  TgtFolder=""
-  SrcSchemas=""
-  TgtSchemas=""
-  PatternFilter="*"
-  RawOutput=False
-  SeparatorLine=False
-  ShowProgress=True
-  DumpMode=False
+  Options.update(RUN_OPTIONS)
 
   #Not enough arguments given
-  if len(sys.argv)<2:
-    ShowHelp()
+  if len(Argv)<2:
+    ShowHelp(Config)
     return False
   
   #Get arguments
-  elif len(sys.argv)>=2 and sys.argv[1].startswith("--dump:"):
-    DumpMode=True
-    Source=sys.argv[1].replace("--dump:","")
-    Target=""
-    for i in range(2,len(sys.argv)):
-      item=sys.argv[i]
+  elif len(Argv)>=2 and Argv[1].startswith("--snapshots:"):
+    Options["snapshots"]=True
+    Options["store"]=Argv[1].replace("--snapshots:","")
+    Options["source"]=Options["store"]
+    for i in range(2,len(Argv)):
+      item=Argv[i]
+      if item.startswith("--filter:"):
+        Options["filter"]=item.replace("--filter:","")
+      else:
+        print("Invalid option: ",item)
+        return False
+  elif len(Argv)>=2 and Argv[1]=="serve":
+    Options["serve"]=True
+    Options["source"]=Argv[1]
+    for i in range(2,len(Argv)):
+      item=Argv[i]
+      try:
+        if item.startswith("--http:"):
+          Options["address"]=item.replace("--http:","")
+        elif item.startswith("--socket:"):
+          Options["address"]=DAEMON_UNIX_PREFIX+item.replace("--socket:","")
+        elif item.startswith("--pool:"):
+          Options["pool"]=max(1,int(item.replace("--pool:","")))
+        elif item.startswith("--ttl:"):
+          Options["ttl"]=float(item.replace("--ttl:",""))
+        elif item.startswith("--cache:"):
+          Options["cachesize"]=max(1,int(item.replace("--cache:","")))
+        elif item=="--verbose":
+          Options["verbose"]=True
+        else:
+          print("Invalid option: ",item)
+          return False
+      except ValueError:
+        print("Invalid option value: ",item)
+        return False
+  elif len(Argv)>=2 and Argv[1]=="merge":
+    Options["merge"]=[]
+    Options["source"]=Argv[1]
+    for i in range(2,len(Argv)):
+      item=Argv[i]
+      if item=="--sep":
+        Options["sep"]=True
+      elif item.startswith("--"):
+        print("Invalid option: ",item)
+        return False
+      else:
+        Options["merge"].append(item)
+    if len(Options["merge"])==0:
+      print("Must provide partial result files to merge")
+      return False
+  elif len(Argv)>=2 and Argv[1].startswith("--dump:"):
+    Options["dump"]=True
+    Options["source"]=Argv[1].replace("--dump:","")
+    for i in range(2,len(Argv)):
+      item=Argv[i]
       if item.startswith("--filter:"):
-        PatternFilter=item.replace("--filter:","")
+        Options["filter"]=item.replace("--filter:","")
       elif item=="--np":
-        ShowProgress=False
+        Options["progress"]=False
+      elif item=="--profile":
+        Options["profile"]=True
+      elif item.startswith("--profile:"):
+        Options["profile"]=True
+        Options["profilefile"]=item.replace("--profile:","")
+      elif item.startswith("--store:"):
+        Options["store"]=item.replace("--store:","")
+      elif item.startswith("--server:"):
+        Options["server"]=item.replace("--server:","")
+      elif item.startswith("--bodystore:"):
+        Options["bodystore"]=True
+        Options["bodyfolder"]=item.replace("--bodystore:","")
+      elif item.startswith("--journal:"):
+        Options["journal"]=item.replace("--journal:","")
+      elif item=="--resume":
+        Options["resume"]=True
+      elif item=="--continue-on-error":
+        Options["continueonerror"]=True
+      elif item.startswith("--record:"):
+        Options["record"]=item.replace("--record:","")
+      elif item.startswith("--replay:"):
+        Options["replay"]=item.replace("--replay:","")
+      elif item.startswith("--latency:"):
+        try:
+          Options["latency"]=max(0.0,float(item.replace("--latency:",""))/1000)
+        except ValueError:
+          print("Invalid option value: ",item)
+          return False
+      elif item.startswith("--parallel:"):
+        try:
+          Options["parallel"]=max(1,int(item.replace("--parallel:","")))
+        except ValueError:
+          print("Invalid option value: ",item)
+          return False
+      elif item.startswith("--latencies:"):
+        Options["latencies"]=item.replace("--latencies:","")
       else:
         print("Invalid option: ",item)
         return False
-  elif len(sys.argv)>=3: 
-    Source=sys.argv[1]
-    Target=sys.argv[2]
-    for i in range(3,len(sys.argv)):
-      item=sys.argv[i]
+  elif len(Argv)>=3: 
+    Options["source"]=Argv[1]
+    Options["target"]=Argv[2]
+    for i in range(3,len(Argv)):
+      item=Argv[i]
       if item.startswith("--filter:"):
-        PatternFilter=item.replace("--filter:","")
+        Options["filter"]=item.replace("--filter:","")
       elif item=="--sep":
-        SeparatorLine=True
+        Options["sep"]=True
       elif item=="--raw":
-        RawOutput=True
+        Options["raw"]=True
+      elif item=="--external":
+        Options["external"]=True
+      elif item=="--pipeline":
+        Options["pipeline"]=True
+      elif item=="--fingerprints":
+        Options["fingerprints"]=True
+      elif item=="--catalog":
+        Options["catalog"]=True
+      elif item=="--bodystore":
+        Options["bodystore"]=True
+      elif item=="--renames":
+        Options["renames"]=True
+      elif item=="--browse":
+        Options["browse"]=True
+      elif item.startswith("--renames:"):
+        Options["renames"]=True
+        try:
+          Options["similarity"]=min(1.0,max(0.0,float(item.replace("--renames:",""))))
+        except ValueError:
+          print("Invalid option value: ",item)
+          return False
+      elif item.startswith("--bodystore:"):
+        Options["bodystore"]=True
+        Options["bodyfolder"]=item.replace("--bodystore:","")
+      elif item.startswith("--pipeline:"):
+        Options["pipeline"]=True
+        try:
+          Options["queuesize"]=max(1,int(item.replace("--pipeline:","")))
+        except ValueError:
+          print("Invalid option value: ",item)
+          return False
+      elif item.startswith("--external:"):
+        Options["external"]=True
+        Options["externalfolder"]=item.replace("--external:","")
+      elif item.startswith("--shard:"):
+        Options["shard"]=item.replace("--shard:","")
+        Status,Message,Shard=ParseShard(Options["shard"])
+        if Status==False:
+          print(Message)
+          return False
+      elif item.startswith("--partial:"):
+        Options["partial"]=item.replace("--partial:","")
+      elif item.startswith("--sample:"):
+        Options["sample"]=item.replace("--sample:","")
+        Status,Message,Sample=ParseSample(Options["sample"])
+        if Status==False:
+          print(Message)
+          return False
+      elif item.startswith("--seed:"):
+        try:
+          Options["seed"]=int(item.replace("--seed:",""))
+        except ValueError:
+          print("Invalid option value: ",item)
+          return False
+      elif item.startswith("--compare:"):
+        Options["compare"]=[Aspect.strip().lower() for Aspect in item.replace("--compare:","").split(",") if len(Aspect.strip())!=0]
+        if len([Aspect for Aspect in Options["compare"] if Aspect not in COMPARE_ASPECTS])!=0:
+          print("Invalid option value: ",item)
+          return False
+      elif item.startswith("--types:"):
+        Options["types"]=[ObjectType.strip().lower() for ObjectType in item.replace("--types:","").split(",") if len(ObjectType.strip())!=0]
+        if len(Options["types"])==0 or len([ObjectType for ObjectType in Options["types"] if ObjectType not in OBJECTID_CONF])!=0:
+          print("Invalid option value: ",item)
+          return False
+      elif item=="--watch":
+        Options["watch"]=True
+      elif item.startswith("--watch:"):
+        Options["watch"]=True
+        try:
+          Options["interval"]=float(item.replace("--watch:",""))
+        except ValueError:
+          print("Invalid option value: ",item)
+          return False
       elif item=="--np":
-        ShowProgress=False
+        Options["progress"]=False
+      elif item=="--profile":
+        Options["profile"]=True
+      elif item.startswith("--profile:"):
+        Options["profile"]=True
+        Options["profilefile"]=item.replace("--profile:","")
+      elif item.startswith("--store:"):
+        Options["store"]=item.replace("--store:","")
+      elif item.startswith("--server:"):
+        Options["server"]=item.replace("--server:","")
+      elif item.startswith("--journal:"):
+        Options["journal"]=item.replace("--journal:","")
+      elif item=="--resume":
+        Options["resume"]=True
+      elif item=="--continue-on-error":
+        Options["continueonerror"]=True
+      elif item.startswith("--record:"):
+        Options["record"]=item.replace("--record:","")
+      elif item.startswith("--replay:"):
+        Options["replay"]=item.replace("--replay:","")
+      elif item.startswith("--latency:"):
+        try:
+          Options["latency"]=max(0.0,float(item.replace("--latency:",""))/1000)
+        except ValueError:
+          print("Invalid option value: ",item)
+          return False
+      elif item.startswith("--parallel:"):
+        try:
+          Options["parallel"]=max(1,int(item.replace("--parallel:","")))
+        except ValueError:
+          print("Invalid option value: ",item)
+          return False
+      elif item.startswith("--latencies:"):
+        Options["latencies"]=item.replace("--latencies:","")
       else:
         print("Invalid option: ",item)
         return False
@@ -129,38 +537,72 @@ def GetCommandLineOptions(Options):
     return False
   
   #Must specify source and target
-  if len(Source)==0:
+  if len(Options["source"])==0:
     print("Must provide source")
     return False
-  if len(Target)==0 and DumpMode==False:
+  if len(Options["target"])==0 and Options["dump"]==False and Options["snapshots"]==False and Options["serve"]==False and len(Options["merge"])==0:
     print("Must provide target")
     return False
-
-  #Check input is folders or schemas
-  if os.path.exists(Source):
-    SrcFolder=Source
-  else:
-    SrcSchemas=Source
-  if os.path.exists(Target):
-    TgtFolder=Target
-  else:
-    TgtSchemas=Target
-
-  #Cannot compare two project folders (as we cannot provide schema selection)
-  if len(SrcFolder)!=0 and len(TgtFolder)!=0:
-    print("Source and target cannot be both folders")
+  if len(Options["shard"])!=0 and (Options["watch"]==True or len(Options["server"])!=0):
+    print("Option --shard cannot be used with --watch or --server")
+    return False
+  if Options["external"]==True and (Options["watch"]==True or len(Options["server"])!=0 or len(Options["shard"])!=0 or len(Options["store"])!=0):
+    print("Option --external cannot be used with --watch, --server, --shard or --store")
+    return False
+  if len(Options["sample"])!=0 and (Options["external"]==True or Options["pipeline"]==True or Options["watch"]==True or len(Options["server"])!=0 or len(Options["shard"])!=0 or len(Options["store"])!=0):
+    print("Option --sample cannot be used with --external, --pipeline, --watch, --server, --shard or --store")
+    return False
+  if Options["fingerprints"]==True and (Options["external"]==True or Options["pipeline"]==True or len(Options["server"])!=0 or len(Options["shard"])!=0 or len(Options["store"])!=0):
+    print("Option --fingerprints cannot be used with --external, --pipeline, --server, --shard or --store")
+    return False
+  if Options["catalog"]==True and (Options["external"]==True or Options["pipeline"]==True or len(Options["sample"])!=0 or Options["watch"]==True or len(Options["server"])!=0 or len(Options["shard"])!=0 or len(Options["store"])!=0):
+    print("Option --catalog cannot be used with --external, --pipeline, --sample, --watch, --server, --shard or --store")
+    return False
+  if Options["renames"]==True and (Options["external"]==True or Options["pipeline"]==True or len(Options["sample"])!=0 or len(Options["server"])!=0 or len(Options["shard"])!=0):
+    print("Option --renames cannot be used with --external, --pipeline, --sample, --server or --shard")
+    return False
+  if Options["browse"]==True and (Options["external"]==True or Options["pipeline"]==True or len(Options["sample"])!=0 or Options["catalog"]==True or Options["renames"]==True or Options["fingerprints"]==True or Options["watch"]==True or len(Options["server"])!=0 or len(Options["shard"])!=0):
+    print("Option --browse cannot be used with --external, --pipeline, --sample, --catalog, --renames, --fingerprints, --watch, --server or --shard")
+    return False
+  if Options["bodystore"]==True and len(Options["server"])!=0:
+    print("Option --bodystore cannot be used with --server")
+    return False
+  if Options["bodystore"]==True and len(Options["bodyfolder"])==0 and len(Options["store"])!=0:
+    print("Option --bodystore must be given a folder when used with --store")
+    return False
+  if Options["pipeline"]==True and (Options["external"]==True or Options["watch"]==True or len(Options["server"])!=0 or len(Options["shard"])!=0 or len(Options["store"])!=0):
+    print("Option --pipeline cannot be used with --external, --watch, --server, --shard or --store")
+    return False
+  if (Options["resume"]==True or len(Options["journal"])!=0) and (Options["watch"]==True or len(Options["server"])!=0):
+    print("Options --journal and --resume cannot be used with --watch or --server")
+    return False
+  if len(Options["record"])!=0 and len(Options["replay"])!=0:
+    print("Options --record and --replay cannot be used together")
+    return False
+  if (len(Options["record"])!=0 or len(Options["replay"])!=0) and len(Options["server"])!=0:
+    print("Options --record and --replay cannot be used with --server")
     return False
+  if Options["parallel"]>1 and (len(Options["record"])!=0 or len(Options["server"])!=0):
+    print("Option --parallel cannot be used with --record or --server")
+    return False
+
+  #Fetch journal is written by default in comparisons and dumps (it is removed when the run finishes without errors)
+  #(default journal is kept in user cache folder with a name derived from the run arguments, so that --resume finds it,
+  #read aspects and types are part of the name because they change the detail queries of the journaled objects)
+  if len(Options["journal"])==0 and Options["watch"]==False and len(Options["server"])==0 and (Options["dump"]==True or len(Options["target"])!=0):
+    Aspects=sorted(COMPARE_ASPECTS if len(Options["store"])!=0 else Options["compare"])
+    Types=sorted(OBJECTID_CONF if len(Options["store"])!=0 else Options["types"])
+    RunId=hashlib.sha256(json.dumps([os.getcwd(),Options["source"],Options["target"],Options["filter"],Options["dump"],Aspects,Types]).encode("utf-8")).hexdigest()[:16]
+    if len(Options["shard"])!=0:
+      Status,Message,Shard=ParseShard(Options["shard"])
+      Options["journal"]=os.path.join(GetCacheFolder(),SHARD_JOURNAL_FILE.replace("<run>",RunId).replace("<i>",str(Shard[0])).replace("<n>",str(Shard[1])))
+    else:
+      Options["journal"]=os.path.join(GetCacheFolder(),JOURNAL_FILE.replace("<run>",RunId))
 
-  #Return arguments
-  Options.append(SrcFolder)
-  Options.append(SrcSchemas)
-  Options.append(TgtFolder)
-  Options.append(TgtSchemas)
-  Options.append(PatternFilter)
-  Options.append(SeparatorLine)
-  Options.append(RawOutput)
-  Options.append(ShowProgress)
-  Options.append(DumpMode)
+  #Latency history is kept by default in comparisons and dumps in user cache folder (used to schedule slowest detail
+  #queries first)
+  if len(Options["latencies"])==0 and len(Options["server"])==0 and (Options["dump"]==True or len(Options["target"])!=0):
+    Options["latencies"]=os.path.join(GetCacheFolder(),LATENCY_FILE)
 
   #Return code
   return True
@@ -391,7 +833,7 @@ def FindZeroLevelToken(Tokens,TokensToFind,StartPos=0,FindMode="or",CaseSensitiv
     if ParLevel==0:
       if FindMode=="or" and len([x for x in FindTokens if x==ListTokens[i]])!=0:
         return i
-      elif FindMode=="and" and i+len(FindTokens)<len(ListTokens) and ListTokens[i:len(FindTokens)]==FindTokens:
+      elif FindMode=="and" and i+len(FindTokens)<=len(ListTokens) and ListTokens[i:i+len(FindTokens)]==FindTokens:
         return i
     if(ListTokens[i]==")"):
       ParLevel-=1
@@ -430,12 +872,104 @@ def SplitObjectName(FullyQualifiedName):
   return Catalog,Schema,Name
 
 #----------------------------------------------------------------------------------------------------------------------
-# Schema name replacements
+# Check two strings overlap (one contains the other or the end of one is the beginning of the other)
+#----------------------------------------------------------------------------------------------------------------------
+def StringsOverlap(First,Second):
+  if First.find(Second)!=-1 or Second.find(First)!=-1:
+    return True
+  for i in range(1,min(len(First),len(Second))):
+    if First.endswith(Second[:i]) or Second.endswith(First[:i]):
+      return True
+  return False
+
+#----------------------------------------------------------------------------------------------------------------------
+# Compile schema name replacements into a single pass regular expression
+# (single pass is only possible when no rule substring overlaps another one, otherwise pattern is None)
+#----------------------------------------------------------------------------------------------------------------------
+def CompileSchemaNameReplacements(Replacements):
+  Compiled={"rules":[(Repl["substring"],Repl["replacement"]) for Repl in Replacements],"pattern":None,"map":{},"width":0,"cache":{},"bodies":OrderedDict(),"lock":threading.Lock()}
+  Substrings=[Substring for Substring,Replacement in Compiled["rules"]]
+  SinglePass=(len(Substrings)!=0 and "" not in Substrings)
+  for i,Substring in enumerate(Substrings):
+    for Other in Substrings[i+1:]:
+      if StringsOverlap(Substring,Other)==True:
+        SinglePass=False
+  if SinglePass==True:
+    Compiled["pattern"]=re.compile("|".join([re.escape(Substring) for Substring in Substrings]))
+    Compiled["map"]={Substring:Replacement for Substring,Replacement in Compiled["rules"]}
+    Compiled["width"]=max([len(Substring) for Substring in Substrings])-1
+  return Compiled
+
+#----------------------------------------------------------------------------------------------------------------------
+# Apply schema name replacements in a single pass
+# (rules are applied one after the other, so a replacement together with the text around it could be matched by a later
+# rule: when replaced substrings are too close or the result still contains any substring, None is returned so that
+# rules are applied one by one)
+#----------------------------------------------------------------------------------------------------------------------
+def SinglePassReplacements(Compiled,Text):
+  Width=Compiled["width"]
+  Parts=[]
+  Position=0
+  for Match in Compiled["pattern"].finditer(Text):
+    Start,End=Match.span()
+    if len(Parts)!=0 and Start-Position<Width:
+      return None
+    Parts.append(Text[Position:Start])
+    Parts.append(Compiled["map"][Match.group(0)])
+    Position=End
+  if len(Parts)==0:
+    return Text
+  Parts.append(Text[Position:])
+  Replaced="".join(Parts)
+  if Compiled["pattern"].search(Replaced)!=None:
+    return None
+  return Replaced
+
+#----------------------------------------------------------------------------------------------------------------------
+# Apply schema name replacements to text (single pass when possible, otherwise rules one by one)
+#----------------------------------------------------------------------------------------------------------------------
+def ApplySchemaNameReplacements(Compiled,Text):
+  Replaced=(SinglePassReplacements(Compiled,Text) if Compiled["pattern"]!=None else None)
+  if Replaced==None:
+    Replaced=Text
+    for Substring,Replacement in Compiled["rules"]:
+      Replaced=Replaced.replace(Substring,Replacement)
+  return Replaced
+
+#----------------------------------------------------------------------------------------------------------------------
+# Schema name replacements (applied to schema names, results are cached)
+#----------------------------------------------------------------------------------------------------------------------
+def SchemaNameReplacements(Ctx,SchemaName):
+  Compiled=Ctx["replacements"]
+  Replaced=Compiled["cache"].get(SchemaName)
+  if Replaced!=None:
+    return Replaced
+  Replaced=ApplySchemaNameReplacements(Compiled,SchemaName)
+  Compiled["cache"][SchemaName]=Replaced
+  return Replaced
+
+#----------------------------------------------------------------------------------------------------------------------
+# Schema name replacements of object body (body is loaded from body store when it is a reference)
+# (results are cached by object id and body, least recently used are dropped, and nothing is cached in external
+# comparison so that memory does not grow with catalog size)
 #----------------------------------------------------------------------------------------------------------------------
-def SchemaNameReplacements(SchemaName):
-  for Repl in _Config["schema_name_replacements"]:
-    SchemaName=SchemaName.replace(Repl["substring"],Repl["replacement"])
-  return SchemaName
+def BodyNameReplacements(Ctx,ObjectId,Text):
+  Compiled=Ctx["replacements"]
+  Cached=(Ctx["options"]["external"]==False)
+  Key=(ObjectId,(Text["hash"] if isinstance(Text,dict) else Text))
+  if Cached==True:
+    with Compiled["lock"]:
+      Replaced=Compiled["bodies"].get(Key)
+      if Replaced!=None:
+        Compiled["bodies"].move_to_end(Key)
+        return Replaced
+  Replaced=ApplySchemaNameReplacements(Compiled,BodyStoreGet(Ctx["bodies"],Text))
+  if Cached==True:
+    with Compiled["lock"]:
+      Compiled["bodies"][Key]=Replaced
+      while len(Compiled["bodies"])>REPLACEMENT_CACHE_SIZE:
+        Compiled["bodies"].popitem(last=False)
+  return Replaced
 
 #----------------------------------------------------------------------------------------------------------------------
 # Calculate schema short names
@@ -460,12 +994,99 @@ def GetSchemaShortNames(SchemaNames):
 #----------------------------------------------------------------------------------------------------------------------
 # Check object is ignored for schema
 #----------------------------------------------------------------------------------------------------------------------
-def IsObjectIgnored(ObjectId):
-  for NamePattern in _Config["ignored_objects_in_repo"]:
+def IsObjectIgnored(Ctx,ObjectId):
+  for NamePattern in Ctx["config"]["ignored_objects_in_repo"]:
     if fnmatch(ObjectId,NamePattern)==True:
       return True
   return False
 
+#----------------------------------------------------------------------------------------------------------------------
+# Parse shard specification (<i>/<n>, shards are numbered from 1 to n, empty specification means no sharding)
+#----------------------------------------------------------------------------------------------------------------------
+def ParseShard(Shard):
+  if len(Shard)==0:
+    return True,"",None
+  try:
+    Index=int(Shard.split("/")[0])
+    Shards=int(Shard.split("/")[1])
+  except (ValueError,IndexError):
+    return False,f"Invalid shard {Shard}, must be <i>/<n>",None
+  if Shards<1 or Index<1 or Index>Shards:
+    return False,f"Invalid shard {Shard}, shard number must be between 1 and {Shards}",None
+  return True,"",(Index,Shards)
+
+#----------------------------------------------------------------------------------------------------------------------
+# Parse sample size (number of objects or percentage of objects)
+#----------------------------------------------------------------------------------------------------------------------
+def ParseSample(Sample):
+  if len(Sample)==0:
+    return True,"",None
+  try:
+    if Sample.endswith("%"):
+      Size=("pct",float(Sample[:-1]))
+      Valid=(Size[1]>0 and Size[1]<=100)
+    else:
+      Size=("count",int(Sample))
+      Valid=(Size[1]>0)
+  except ValueError:
+    Valid=False
+  if Valid==False:
+    return False,f"Invalid sample {Sample}, must be a number of objects or a percentage between 0 and 100 (i.e. 500 or 5%)",None
+  return True,"",Size
+
+#----------------------------------------------------------------------------------------------------------------------
+# Check object belongs to shard of run (objects are partitioned by hash of object kind, schema after replacements
+# and name, so that the same object goes to the same shard on both sides)
+#----------------------------------------------------------------------------------------------------------------------
+def IsObjectInShard(Ctx,ObjectType,SchemaName,ObjectName):
+  if Ctx["shard"]==None:
+    return True
+  Key=GetObjectKey(OBJECTID_CONF[ObjectType]["kind"],SchemaName,ObjectName)
+  return int(hashlib.md5(Key.encode("utf-8")).hexdigest()[:8],16)%Ctx["shard"][1]==Ctx["shard"][0]-1
+
+#----------------------------------------------------------------------------------------------------------------------
+# Check object id belongs to shard of run
+#----------------------------------------------------------------------------------------------------------------------
+def IsObjectIdInShard(Ctx,ObjectId):
+  if Ctx["shard"]==None:
+    return True
+  return IsObjectInShard(Ctx,ObjectId.split(":")[0],ObjectId.split(":")[1].split(".")[0],ObjectId.split(":")[1].split(".")[1])
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get comparison aspects that definitions must contain (all of them when definitions are saved as snapshots)
+#----------------------------------------------------------------------------------------------------------------------
+def GetReadAspects(Ctx):
+  return (COMPARE_ASPECTS if len(Ctx["options"]["store"])!=0 else Ctx["options"]["compare"])
+
+#----------------------------------------------------------------------------------------------------------------------
+# Check object type must be read (all of them when definitions are saved as snapshots)
+#----------------------------------------------------------------------------------------------------------------------
+def IsObjectTypeRead(Ctx,ObjectType):
+  return len(Ctx["options"]["store"])!=0 or ObjectType in Ctx["options"]["types"]
+
+#----------------------------------------------------------------------------------------------------------------------
+# Check any compared aspect applies to object type (otherwise objects of the type are only compared by existence)
+#----------------------------------------------------------------------------------------------------------------------
+def IsTypeDetailNeeded(Ctx,ObjectType):
+  Aspects=GetReadAspects(Ctx)
+  if ObjectType==OBJECTID_TABLE:
+    return "columns" in Aspects or "comments" in Aspects
+  if ObjectType==OBJECTID_VIEW:
+    return "bodies" in Aspects or "comments" in Aspects
+  return "parameters" in Aspects or "returns" in Aspects or "bodies" in Aspects
+
+#----------------------------------------------------------------------------------------------------------------------
+# Check detail query is needed for object kind (otherwise only object type is read), object type is given when it is
+# known from listing
+#----------------------------------------------------------------------------------------------------------------------
+def IsDetailNeeded(Ctx,Kind,ObjectType=None):
+  if ObjectType!=None:
+    return IsTypeDetailNeeded(Ctx,ObjectType)
+  if Kind=="TBVW":
+    return (IsObjectTypeRead(Ctx,OBJECTID_TABLE)==True and IsTypeDetailNeeded(Ctx,OBJECTID_TABLE)==True) \
+    or (IsObjectTypeRead(Ctx,OBJECTID_VIEW)==True and IsTypeDetailNeeded(Ctx,OBJECTID_VIEW)==True)
+  return IsTypeDetailNeeded(Ctx,OBJECTID_SCALARFUNC)
+
 #----------------------------------------------------------------------------------------------------------------------
 # Check object is ignored for schema
 #----------------------------------------------------------------------------------------------------------------------
@@ -477,59 +1098,418 @@ def StandardType(RawType):
 #----------------------------------------------------------------------------------------------------------------------
 # Progress message
 #----------------------------------------------------------------------------------------------------------------------
-def DisplayProgress(From,Index,Total,Object):
-  global _LastMessage
-  global _MessageCnt
-  global _ShowProgress
-  if _ShowProgress==False:
+def DisplayProgress(Ctx,From,Index,Total,Object):
+  Progress=Ctx["progress"]
+  if Progress["enabled"]==False:
     return
   Wheel=['-','\\','|','/']
   if Index!=0 and Total!=0:
     BarLen=10
     Bar="["+("#"*(int(BarLen*Index/Total))+"."*BarLen)[:BarLen]+"]"
   if From=="CON":
-    Message="["+Wheel[_MessageCnt%4]+"] Connecting to databricks ..."
+    Message="["+Wheel[Progress["count"]%4]+"] Connecting to databricks ..."
   elif From=="LST":
-    Message="["+Wheel[_MessageCnt%4]+"] Reading object list from schema "+f"{Index}/{Total} {Bar} ({Object}) ..."
+    Message="["+Wheel[Progress["count"]%4]+"] Reading object list from schema "+f"{Index}/{Total} {Bar} ({Object}) ..."
   elif From=="SRC":
-    Message="["+Wheel[_MessageCnt%4]+"] Reading objects from source "+f"{Index}/{Total} {Bar} ({Object}) ..."
+    Message="["+Wheel[Progress["count"]%4]+"] Reading objects from source "+f"{Index}/{Total} {Bar} ({Object}) ..."
   elif From=="TGT":
-    Message="["+Wheel[_MessageCnt%4]+"] Reading objects from target "+f"{Index}/{Total} {Bar} ({Object}) ..."
+    Message="["+Wheel[Progress["count"]%4]+"] Reading objects from target "+f"{Index}/{Total} {Bar} ({Object}) ..."
   elif From=="CMP":
-    Message="["+Wheel[_MessageCnt%4]+"] Comparing objects "+f"{Index}/{Total} {Bar} ({Object}) ..."
+    Message="["+Wheel[Progress["count"]%4]+"] Comparing objects "+f"{Index}/{Total} {Bar} ({Object}) ..."
   elif From=="CLR":
-    Message=" "*len(_LastMessage)
-  if len(Message)<len(_LastMessage):
-    print(" "*len(_LastMessage),end="\r")
+    Message=" "*len(Progress["last"])
+  if len(Message)<len(Progress["last"]):
+    print(" "*len(Progress["last"]),end="\r")
   print(Message,end="\r")
-  _LastMessage=Message
-  _MessageCnt+=1
+  Progress["last"]=Message
+  Progress["count"]+=1
+
+#----------------------------------------------------------------------------------------------------------------------
+# Start profiling (per phase wall/cpu time, query latencies, parser throughput, slowest objects and peak memory)
+#----------------------------------------------------------------------------------------------------------------------
+def ProfileStart(Ctx):
+  Ctx["profile"]={
+    "phases":{Phase:{"wall":0.0,"cpu":0.0,"calls":0} for Phase in PROFILE_PHASES},
+    "queries":{},
+    "rows":0,
+    "bytes":0,
+    "parser":{"statements":0,"tokens":0,"seconds":0.0},
+    "objects":{},
+    "start":(timer(),time.process_time())
+  }
+  tracemalloc.start()
+
+#----------------------------------------------------------------------------------------------------------------------
+# Profiling phase begin (returns wall and cpu start times)
+#----------------------------------------------------------------------------------------------------------------------
+def ProfileBegin():
+  return (timer(),time.process_time())
+
+#----------------------------------------------------------------------------------------------------------------------
+# Profiling phase end (accumulates wall and cpu time since begin)
+#----------------------------------------------------------------------------------------------------------------------
+def ProfileEnd(Ctx,Phase,Start):
+  Profile=Ctx["profile"]
+  if Profile==None:
+    return
+  PhaseData=Profile["phases"][Phase]
+  PhaseData["wall"]+=timer()-Start[0]
+  PhaseData["cpu"]+=time.process_time()-Start[1]
+  PhaseData["calls"]+=1
+
+#----------------------------------------------------------------------------------------------------------------------
+# Profile executed query (latency, rows and bytes fetched)
+#----------------------------------------------------------------------------------------------------------------------
+def ProfileQuery(Ctx,Kind,Start,Rows):
+  Profile=Ctx["profile"]
+  if Profile==None:
+    return
+  Bytes=sum([sum([len(str(Field)) for Field in Row]) for Row in Rows])
+  with PROFILE_LOCK:
+    ProfileEnd(Ctx,("detail" if Kind.find("_DETL_")!=-1 else "list"),Start)
+    if Kind not in Profile["queries"]:
+      Profile["queries"][Kind]=[]
+    Profile["queries"][Kind].append(timer()-Start[0])
+    Profile["rows"]+=len(Rows)
+    Profile["bytes"]+=Bytes
+
+#----------------------------------------------------------------------------------------------------------------------
+# Profile sql parser throughput
+#----------------------------------------------------------------------------------------------------------------------
+def ProfileParser(Ctx,Tokens,Seconds):
+  Profile=Ctx["profile"]
+  if Profile==None:
+    return
+  Profile["parser"]["statements"]+=1
+  Profile["parser"]["tokens"]+=Tokens
+  Profile["parser"]["seconds"]+=Seconds
+
+#----------------------------------------------------------------------------------------------------------------------
+# Profile time spent on object (fetch and parse)
+#----------------------------------------------------------------------------------------------------------------------
+def ProfileObject(Ctx,ObjectId,Seconds):
+  Profile=Ctx["profile"]
+  if Profile==None:
+    return
+  Profile["objects"][ObjectId]=Profile["objects"].get(ObjectId,0.0)+Seconds
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get profiling report
+#----------------------------------------------------------------------------------------------------------------------
+def GetProfileReport(Ctx,TopObjects=PROFILE_TOP_OBJECTS):
+  
+  #Phases
+  Profile=Ctx["profile"]
+  Report={}
+  Report["total"]={"wall":timer()-Profile["start"][0],"cpu":time.process_time()-Profile["start"][1]}
+  Report["phases"]={Phase:dict(Profile["phases"][Phase]) for Phase in PROFILE_PHASES}
+
+  #Query latency statistics and histogram
+  Report["queries"]={}
+  for Kind in Profile["queries"]:
+    Latencies=sorted(Profile["queries"][Kind])
+    Histogram=[0]*(len(PROFILE_BUCKETS_MS)+1)
+    for Latency in Latencies:
+      Bucket=0
+      while Bucket<len(PROFILE_BUCKETS_MS) and Latency*1000>PROFILE_BUCKETS_MS[Bucket]:
+        Bucket+=1
+      Histogram[Bucket]+=1
+    Report["queries"][Kind]={
+      "count":len(Latencies),
+      "total":sum(Latencies),
+      "min":Latencies[0],
+      "avg":sum(Latencies)/len(Latencies),
+      "p50":Latencies[int(0.50*(len(Latencies)-1))],
+      "p95":Latencies[int(0.95*(len(Latencies)-1))],
+      "max":Latencies[-1],
+      "histogram":{("<="+str(Limit)+"ms" if i<len(PROFILE_BUCKETS_MS) else ">"+str(PROFILE_BUCKETS_MS[-1])+"ms"):Histogram[i] for i,Limit in enumerate(PROFILE_BUCKETS_MS+[None])}
+    }
+
+  #Rows, bytes, parser throughput and peak memory
+  Report["rows"]=Profile["rows"]
+  Report["bytes"]=Profile["bytes"]
+  Parser=Profile["parser"]
+  Report["parser"]={"statements":Parser["statements"],"tokens":Parser["tokens"],"seconds":Parser["seconds"],"tokens_per_second":(Parser["tokens"]/Parser["seconds"] if Parser["seconds"]!=0 else 0)}
+  Report["peak_memory"]=(tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0)
+
+  #Slowest objects
+  Objects=sorted(Profile["objects"].items(),key=lambda x:x[1],reverse=True)[:TopObjects]
+  Report["slowest_objects"]=[{"object":Item[0],"seconds":Item[1]} for Item in Objects]
+
+  #Return report
+  return Report
+
+#----------------------------------------------------------------------------------------------------------------------
+# Print profiling report
+#----------------------------------------------------------------------------------------------------------------------
+def PrintProfileReport(Report,MaxWidth):
+  
+  #Phases
+  print("")
+  print("Profile: phases")
+  Rows=[[Phase,str(Report["phases"][Phase]["calls"]),f"{Report['phases'][Phase]['wall']:.3f}",f"{Report['phases'][Phase]['cpu']:.3f}"] for Phase in Report["phases"] if Report["phases"][Phase]["calls"]!=0]
+  Rows.append(["total","",f"{Report['total']['wall']:.3f}",f"{Report['total']['cpu']:.3f}"])
+  PrintTable(["Phase","Calls","Wall(s)","Cpu(s)"],["L","R","R","R"],Rows,MaxWidth)
+
+  #Query latencies
+  if len(Report["queries"])!=0:
+    print("")
+    print("Profile: query latencies")
+    Rows=[]
+    for Kind in Report["queries"]:
+      Stats=Report["queries"][Kind]
+      Rows.append([Kind,str(Stats["count"])]+[f"{Stats[Item]*1000:.1f}" for Item in ["min","avg","p50","p95","max"]])
+    PrintTable(["Query","Count","Min(ms)","Avg(ms)","P50(ms)","P95(ms)","Max(ms)"],["L","R","R","R","R","R","R"],Rows,MaxWidth)
+    print("")
+    print("Profile: query latency histogram")
+    Buckets=list(Report["queries"][list(Report["queries"])[0]]["histogram"])
+    Rows=[[Kind]+[str(Report["queries"][Kind]["histogram"][Bucket]) for Bucket in Buckets] for Kind in Report["queries"]]
+    PrintTable(["Query"]+Buckets,["L"]+["R"]*len(Buckets),Rows,MaxWidth)
+
+  #Slowest objects
+  if len(Report["slowest_objects"])!=0:
+    print("")
+    print("Profile: slowest objects")
+    Rows=[[Item["object"],f"{Item['seconds']*1000:.1f}"] for Item in Report["slowest_objects"]]
+    PrintTable(["Object","Time(ms)"],["L","R"],Rows,MaxWidth)
+
+  #Totals
+  print("")
+  print(f"Rows fetched: {Report['rows']}, bytes fetched: {Report['bytes']}")
+  print(f"Parser: {Report['parser']['statements']} statement(s), {Report['parser']['tokens']} token(s), {Report['parser']['tokens_per_second']:.0f} tokens/s")
+  print(f"Peak memory: {Report['peak_memory']/(1024*1024):.2f} MB")
 
 #----------------------------------------------------------------------------------------------------------------------
 # Connect to data source
 #----------------------------------------------------------------------------------------------------------------------
-def Connect(ServerHostName,HttpPath,AccessToken):
-  DisplayProgress("CON",0,0,"")
+def Connect(Ctx,ServerHostName,HttpPath,AccessToken):
+  DisplayProgress(Ctx,"CON",0,0,"")
+  ConnectStart=ProfileBegin()
+  try:
+    from databricks import sql
+  except ImportError:
+    Message="Databricks sql connector is not installed (pip install databricks-sql-connector)"
+    return False,Message,None
   try:
     Cursor=sql.connect(server_hostname=ServerHostName,http_path=HttpPath,access_token=AccessToken).cursor()
   except Exception as Ex:
-    print("Unable to open connection to databricks: "+str(Ex))
-    return False,None,0
-  return True,Cursor
+    Message="Unable to open connection to databricks: "+str(Ex)
+    return False,Message,None
+  if len(Ctx["options"]["record"])!=0:
+    try:
+      Cursor=RecordingCursor(Cursor,Ctx["options"]["record"])
+    except Exception as Ex:
+      return False,f"Unable to create cassette file ({Ctx['options']['record']}): {str(Ex)}",None
+  ProfileEnd(Ctx,"connect",ConnectStart)
+  return True,"",Cursor
+
+#----------------------------------------------------------------------------------------------------------------------
+# Open cassette file (gzip compressed when file name ends with .gz)
+#----------------------------------------------------------------------------------------------------------------------
+def OpenCassetteFile(CassetteFile,Mode):
+  if CassetteFile.endswith(".gz"):
+    return gzip.open(CassetteFile,Mode+"t",encoding="utf-8")
+  return open(CassetteFile,Mode,encoding="utf-8")
+
+#----------------------------------------------------------------------------------------------------------------------
+# Row of recorded query result (fields can be accessed by position or by column name, like connector rows)
+#----------------------------------------------------------------------------------------------------------------------
+class CassetteRow(tuple):
+  def __new__(cls,Fields):
+    Row=tuple.__new__(cls,Fields.values())
+    Row.Columns=list(Fields.keys())
+    return Row
+  def __getitem__(self,Key):
+    if isinstance(Key,str):
+      return tuple.__getitem__(self,self.Columns.index(Key))
+    return tuple.__getitem__(self,Key)
+  def asDict(self):
+    return dict(zip(self.Columns,self))
+
+#----------------------------------------------------------------------------------------------------------------------
+# Cursor that records executed queries with their result rows and latency in cassette file (one json line per query)
+#----------------------------------------------------------------------------------------------------------------------
+class RecordingCursor:
+
+  #Constructor
+  def __init__(self,Cursor,CassetteFile):
+    self.Cursor=Cursor
+    self.File=OpenCassetteFile(CassetteFile,"w")
+    self.Query=""
+    self.Start=0.0
+
+  #Execute query (failing queries are recorded with their error)
+  def execute(self,Query):
+    self.Query=Query
+    self.Start=timer()
+    try:
+      self.Cursor.execute(Query)
+    except Exception as Ex:
+      self.Write({"query":Query,"error":str(Ex),"elapsed":timer()-self.Start})
+      raise
+
+  #Fetch all rows and record them
+  def fetchall(self):
+    Rows=self.Cursor.fetchall()
+    if getattr(self.Cursor,"description",None)!=None:
+      Columns=[Col[0] for Col in self.Cursor.description]
+    else:
+      Columns=(list(Rows[0].asDict()) if len(Rows)!=0 else [])
+    self.Write({"query":self.Query,"columns":Columns,"rows":[list(Row) for Row in Rows],"elapsed":timer()-self.Start})
+    return Rows
+
+  #Write cassette entry (flushed so an interrupted run keeps recorded queries)
+  def Write(self,Entry):
+    self.File.write(json.dumps(Entry,default=str)+"\n")
+    self.File.flush()
+
+  #Other cursor attributes
+  def __getattr__(self,Name):
+    return getattr(self.Cursor,Name)
+
+#----------------------------------------------------------------------------------------------------------------------
+# Cursor that answers queries from cassette file with recorded latency or given one
+# (a query executed several times gets its recorded results in order, the last one is repeated after that)
+#----------------------------------------------------------------------------------------------------------------------
+class ReplayCursor:
+
+  #Constructor
+  def __init__(self,CassetteFile,Latency=None):
+    self.Entries={}
+    self.Served={}
+    self.Latency=Latency
+    self.Rows=[]
+    self.Queries=0
+    with OpenCassetteFile(CassetteFile,"r") as File:
+      for Line in File:
+        try:
+          Entry=json.loads(Line)
+        except ValueError:
+          continue
+        if Entry["query"] not in self.Entries:
+          self.Entries[Entry["query"]]=[]
+        self.Entries[Entry["query"]].append(Entry)
+
+  #Execute query
+  def execute(self,Query):
+    if Query not in self.Entries:
+      raise Exception("Query not recorded in cassette")
+    Index=self.Served.get(Query,0)
+    self.Served[Query]=Index+1
+    Entry=self.Entries[Query][min(Index,len(self.Entries[Query])-1)]
+    Delay=(Entry["elapsed"] if self.Latency==None else self.Latency)
+    if Delay>0:
+      time.sleep(Delay)
+    self.Queries+=1
+    if "error" in Entry:
+      raise Exception(Entry["error"])
+    self.Rows=[CassetteRow(dict(zip(Entry["columns"],Row))) for Row in Entry["rows"]]
+
+  #Fetch all rows
+  def fetchall(self):
+    Rows=self.Rows
+    self.Rows=[]
+    return Rows
+
+#----------------------------------------------------------------------------------------------------------------------
+# Open cursor that replays cassette file
+#----------------------------------------------------------------------------------------------------------------------
+def OpenReplayCursor(Ctx):
+  CassetteFile=Ctx["options"]["replay"]
+  try:
+    Cursor=ReplayCursor(CassetteFile,(Ctx["options"]["latency"] if Ctx["options"]["latency"]>=0 else None))
+  except Exception as Ex:
+    return False,f"Unable to read cassette file ({CassetteFile}): {str(Ex)}",None
+  return True,"",Cursor
+
+#----------------------------------------------------------------------------------------------------------------------
+# Start connection to databricks on background thread (connection, warm-up query and object lists of given schemas)
+# (it runs while project folders are parsed, cursor must not be used by caller until connection is waited)
+#----------------------------------------------------------------------------------------------------------------------
+def StartConnection(Ctx,Cursor,Lists,PatternFilter):
+  Pending={"thread":None,"status":True,"message":"","cursor":Cursor,"lists":{}}
+  Worker=dict(Ctx)
+  Worker["progress"]={"enabled":False,"last":"","count":0}
+
+  #Connect, wake up warehouse and list objects
+  def Run():
+    try:
+      if Pending["cursor"]==None and len(Worker["options"]["replay"])!=0:
+        Status,Message,Pending["cursor"]=OpenReplayCursor(Worker)
+        if Status==False:
+          Pending["status"],Pending["message"]=False,Message
+          return
+      elif Pending["cursor"]==None:
+        Status,Message,Parms=GetConnectionParms()
+        if Status==True:
+          Status,Message,Pending["cursor"]=Connect(Worker,Parms["server_hostname"],Parms["http_path"],Parms["access_token"])
+        if Status==True:
+          Status,Message,Rows=ExecuteQuery(Worker,Pending["cursor"],"WARMUP_QUERY",WARMUP_QUERY)
+        if Status==False:
+          Pending["status"],Pending["message"]=False,Message
+          return
+      Status,Message,Pending["lists"]=ListObjectLists(Worker,Pending["cursor"],Lists,PatternFilter)
+      if Status==False:
+        Pending["status"],Pending["message"]=False,Message
+        return
+    except Exception as Ex:
+      Pending["status"],Pending["message"]=False,"Unable to connect to databricks: "+str(Ex)
+
+  #Start thread
+  Pending["thread"]=threading.Thread(target=Run,daemon=True)
+  Pending["thread"].start()
+  return Pending
+
+#----------------------------------------------------------------------------------------------------------------------
+# Wait for background connection to databricks
+#----------------------------------------------------------------------------------------------------------------------
+def WaitConnection(Ctx,Pending):
+  if Pending["thread"].is_alive():
+    DisplayProgress(Ctx,"CON",0,0,"")
+  Pending["thread"].join()
+  return Pending["status"],Pending["message"],Pending["cursor"]
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get databricks connection parameters from environment variables
+#----------------------------------------------------------------------------------------------------------------------
+def GetConnectionParms():
+  Parms={}
+  for Parm,Variable in [["server_hostname","DATABRICKS_SERVER_HOSTNAME"],["http_path","DATABRICKS_HTTP_PATH"],["access_token","DATABRICKS_TOKEN"]]:
+    Parms[Parm]=os.environ.get(Variable,"")
+    if len(Parms[Parm])==0:
+      return False,f"Unable to get databricks {Parm.replace('_',' ')} from environment variable {Variable}",None
+  return True,"",Parms
+
+#----------------------------------------------------------------------------------------------------------------------
+# Execute query and fetch all rows
+#----------------------------------------------------------------------------------------------------------------------
+def ExecuteQuery(Ctx,Cursor,Kind,Query):
+  QueryStart=ProfileBegin()
+  try:
+    Cursor.execute(Query)
+    Rows=Cursor.fetchall()
+  except Exception as Ex:
+    Message="Query error: "+str(Ex)+" (SQL: "+Query+")"
+    return False,Message,[]
+  ProfileQuery(Ctx,Kind,QueryStart,Rows)
+  return True,"",Rows
 
 #----------------------------------------------------------------------------------------------------------------------
-# Get object definition from SQL definition
+# Get object definition from SQL definition (when Names is given, the name of the created object is appended to it even
+# if the object is not selected)
 #----------------------------------------------------------------------------------------------------------------------
-def GetObjectDefinition(From,Command,SelectedSchemas,PatternFilter):
+def GetObjectDefinition(Ctx,From,Command,SelectedSchemas,PatternFilter,Names=None):
   
   #Calculate selected schemas with name replacements
-  SelSchemas=list(set([SchemaNameReplacements(Name) for Name in SelectedSchemas]))
+  SelSchemas=list(set([SchemaNameReplacements(Ctx,Name) for Name in SelectedSchemas]))
 
   #Return valid definition
   ReturnDefinition=False
 
   #Clean comments
+  ParseStart=timer()
   Tokens=SqlParse(Command)
+  ProfileParser(Ctx,len(Tokens),timer()-ParseStart)
 
   #Fetch table definition
   if TokenListStartsWith(Tokens,"create table") \
@@ -542,14 +1522,16 @@ def GetObjectDefinition(From,Command,SelectedSchemas,PatternFilter):
     TableNameIndex=(TableNameIndex+1 if TokenListStartsWith(Tokens,"table",TableNameIndex) else TableNameIndex)
     TableNameIndex=(TableNameIndex+3 if TokenListStartsWith(Tokens,"if not exists",TableNameIndex) else TableNameIndex)
     TableName=Tokens[TableNameIndex]
+    if Names!=None:
+      Names.append(TableName)
 
     #Get object id, shcema and name
     ObjectType=OBJECTID_TABLE
     CatalogName,SchemaName,ObjectName=SplitObjectName(TableName)
-    SchemaName=SchemaNameReplacements(SchemaName)
+    SchemaName=SchemaNameReplacements(Ctx,SchemaName)
 
     #Do not compare schema if is not in selection or object not selected
-    if (SchemaName not in SelSchemas or fnmatch(ObjectName,PatternFilter)==False) and DumpMode==False:
+    if (SchemaName not in SelSchemas or fnmatch(ObjectName,PatternFilter)==False or IsObjectInShard(Ctx,ObjectType,SchemaName,ObjectName)==False or IsObjectTypeRead(Ctx,ObjectType)==False) and Ctx["options"]["dump"]==False:
       return True,"",None,None
      
     #Find parenthesys that define table fields
@@ -608,28 +1590,32 @@ def GetObjectDefinition(From,Command,SelectedSchemas,PatternFilter):
     ViewNameIndex=(ViewNameIndex+1 if TokenListStartsWith(Tokens,"view",ViewNameIndex) else ViewNameIndex)
     ViewNameIndex=(ViewNameIndex+3 if TokenListStartsWith(Tokens,"if not exists",ViewNameIndex) else ViewNameIndex)
     ViewName=Tokens[ViewNameIndex]
+    if Names!=None:
+      Names.append(ViewName)
 
     #Get object id, shcema and name
     ObjectType=OBJECTID_VIEW
     CatalogName,SchemaName,ObjectName=SplitObjectName(ViewName)
-    SchemaName=SchemaNameReplacements(SchemaName)
+    SchemaName=SchemaNameReplacements(Ctx,SchemaName)
 
     #Do not compare schema if is not in selection
-    if (SchemaName not in SelSchemas or fnmatch(ObjectName,PatternFilter)==False) and DumpMode==False:
+    if (SchemaName not in SelSchemas or fnmatch(ObjectName,PatternFilter)==False or IsObjectInShard(Ctx,ObjectType,SchemaName,ObjectName)==False or IsObjectTypeRead(Ctx,ObjectType)==False) and Ctx["options"]["dump"]==False:
       return True,"",None,None
 
-    #Fetch view text
-    Keyword="as"
-    CleanCommand=FilterSqlComments(Command)
-    Pos=FindZeroLevelSubStr(CleanCommand.replace("\n"," ").replace("\t"," ")," "+Keyword+" ")
-    if Pos==-1:
-      return False,f"Unable to find '{Keyword}' keyword in definition of view ({ViewName})",None,None
-    ViewText=CleanCommand[Pos+len(Keyword)+2:].strip(" ")
+    #Fetch view text (not extracted when bodies are not compared)
+    ViewText=""
+    if "bodies" in GetReadAspects(Ctx):
+      Keyword="as"
+      CleanCommand=FilterSqlComments(Command)
+      Pos=FindZeroLevelSubStr(CleanCommand.replace("\n"," ").replace("\t"," ")," "+Keyword+" ")
+      if Pos==-1:
+        return False,f"Unable to find '{Keyword}' keyword in definition of view ({ViewName})",None,None
+      ViewText=CleanCommand[Pos+len(Keyword)+2:].strip(" ")
 
     #Store table definition
     ObjectId=ObjectType+":"+SchemaName+"."+ObjectName
     FullyQualifiedName=SchemaName+"."+ObjectName
-    ObjectDef={"fullname":FullyQualifiedName,"type":ObjectType,"text":ViewText,"comment":NULL_COMMENT,"columns":{}}
+    ObjectDef={"fullname":FullyQualifiedName,"type":ObjectType,"text":BodyStoreAdd(Ctx["bodies"],ViewText),"comment":NULL_COMMENT,"columns":{}}
     ReturnDefinition=True
 
   #Fetch function definition
@@ -646,6 +1632,8 @@ def GetObjectDefinition(From,Command,SelectedSchemas,PatternFilter):
     FunctionNameIndex=(FunctionNameIndex+1 if TokenListStartsWith(Tokens,"function",FunctionNameIndex) else FunctionNameIndex)
     FunctionNameIndex=(FunctionNameIndex+3 if TokenListStartsWith(Tokens,"if not exists",FunctionNameIndex) else FunctionNameIndex)
     FunctionName=Tokens[FunctionNameIndex]
+    if Names!=None:
+      Names.append(FunctionName)
 
     #Find parenthesys that define function parameters
     BegParenIndex=FindZeroLevelToken(Tokens,"(",FunctionNameIndex+1)
@@ -654,12 +1642,12 @@ def GetObjectDefinition(From,Command,SelectedSchemas,PatternFilter):
       return False,f"Begining and ending parenthesys for parameter specification expected in definition of function ({FunctionName})",None,None
 
     #Get object id, shcema and name
-    ObjectType=(OBJECTID_TABLEFUNC if FindZeroLevelToken(Tokens,"returns table")!=-1 else OBJECTID_SCALARFUNC)
+    ObjectType=(OBJECTID_TABLEFUNC if FindZeroLevelToken(Tokens,["returns","table"],FindMode="and")!=-1 else OBJECTID_SCALARFUNC)
     CatalogName,SchemaName,ObjectName=SplitObjectName(FunctionName)
-    SchemaName=SchemaNameReplacements(SchemaName)
+    SchemaName=SchemaNameReplacements(Ctx,SchemaName)
 
     #Do not compare schema if is not in selection or object not selected
-    if (SchemaName not in SelSchemas or fnmatch(ObjectName,PatternFilter)==False) and DumpMode==False:
+    if (SchemaName not in SelSchemas or fnmatch(ObjectName,PatternFilter)==False or IsObjectInShard(Ctx,ObjectType,SchemaName,ObjectName)==False or IsObjectTypeRead(Ctx,ObjectType)==False) and Ctx["options"]["dump"]==False:
       return True,"",None,None
 
     #Parse function parameters
@@ -689,7 +1677,7 @@ def GetObjectDefinition(From,Command,SelectedSchemas,PatternFilter):
     
     #Get return type for table functions
     elif ObjectType==OBJECTID_TABLEFUNC:
-      ReturnsTableIndex=FindZeroLevelToken(Tokens,["returns","table","("])
+      ReturnsTableIndex=FindZeroLevelToken(Tokens,["returns","table","("],FindMode="and")
       if ReturnsTableIndex==-1:
         return False,f"Table specification expected after returns table keywords in definition of function {FunctionName}",None,None
       RetTableBegParenIndex=ReturnsTableIndex+2
@@ -713,18 +1701,20 @@ def GetObjectDefinition(From,Command,SelectedSchemas,PatternFilter):
         if i>=RetTableEndParenIndex:
           break
 
-    #Fetch function text
-    Keyword="return"
-    CleanCommand=FilterSqlComments(Command)
-    Pos=FindZeroLevelSubStr(CleanCommand.replace("\n"," ").replace("\t"," ")," "+Keyword+" ")
-    if Pos==-1:
-      return False,f"Unable to find '{Keyword}' keyword in definition of function ({FunctionName})",None,None
-    FunctionText=CleanCommand[Pos+len(Keyword)+2:].strip(" ")
+    #Fetch function text (not extracted when bodies are not compared)
+    FunctionText=""
+    if "bodies" in GetReadAspects(Ctx):
+      Keyword="return"
+      CleanCommand=FilterSqlComments(Command)
+      Pos=FindZeroLevelSubStr(CleanCommand.replace("\n"," ").replace("\t"," ")," "+Keyword+" ")
+      if Pos==-1:
+        return False,f"Unable to find '{Keyword}' keyword in definition of function ({FunctionName})",None,None
+      FunctionText=CleanCommand[Pos+len(Keyword)+2:].strip(" ")
 
     #Store table definition
     ObjectId=ObjectType+":"+SchemaName+"."+ObjectName
     FullyQualifiedName=SchemaName+"."+ObjectName
-    ObjectDef={"fullname":FullyQualifiedName,"type":ObjectType,"returns":ReturnType,"text":FunctionText,"parameters":Parms}
+    ObjectDef={"fullname":FullyQualifiedName,"type":ObjectType,"returns":ReturnType,"text":BodyStoreAdd(Ctx["bodies"],FunctionText),"parameters":Parms}
     ReturnDefinition=True
 
   #Return object definition
@@ -734,702 +1724,3423 @@ def GetObjectDefinition(From,Command,SelectedSchemas,PatternFilter):
     return True,"",None,None
 
 #----------------------------------------------------------------------------------------------------------------------
-# Get schema definitions from repository folder
+# Check project folder is a workspace export archive (zip or dbc file)
 #----------------------------------------------------------------------------------------------------------------------
-def GetSchemaFromProject(From,ProjFolder,SchemaNames,PatternFilter,DumpMode):
-  
-  #Initialize schema definition
-  SchemaDef={}
+def IsProjectArchive(ProjFolder):
+  return os.path.isfile(ProjFolder) and os.path.splitext(ProjFolder)[1].lower() in ARCHIVE_EXTENSIONS
 
-  #Calculate selected schemas with environment replace
-  SelectedSchemas=SchemaNames.split(SCHEMA_ARG_SEPARATOR)
-  SelectedSchemas=list(set([SchemaNameReplacements(Schema) for Schema in SelectedSchemas]))
+#----------------------------------------------------------------------------------------------------------------------
+# Check archive member is a notebook (python source files, json notebooks in dbc archives)
+#----------------------------------------------------------------------------------------------------------------------
+def IsArchiveNotebook(ArchiveFile,MemberName):
+  Extension=os.path.splitext(MemberName)[1].lower()
+  return Extension==".py" or (ArchiveFile.lower().endswith(".dbc") and Extension in DBC_NOTEBOOK_EXTENSIONS)
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get lines of dbc json notebook as python source notebook (sql commands as magic lines, each command ends with an
+# empty line)
+#----------------------------------------------------------------------------------------------------------------------
+def GetDbcNotebookLines(Text):
+  Notebook=json.loads(Text)
+  FileLines=[]
+  for Command in sorted(Notebook.get("commands",[]),key=lambda Command:Command.get("position",0)):
+    CommandLines=Command.get("command","").split("\n")
+    if len(CommandLines)!=0 and CommandLines[0].strip().startswith("%sql"):
+      CommandLines=CommandLines[1:]
+    elif Notebook.get("language","")!="sql":
+      continue
+    FileLines.append(MAGIC_TAG+" %sql\n")
+    FileLines.extend([MAGIC_TAG+" "+Line+"\n" for Line in CommandLines])
+    FileLines.append("\n")
+  return FileLines
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get file of archive index in user cache folder (named after absolute path of archive, archive folder is never written)
+#----------------------------------------------------------------------------------------------------------------------
+def GetArchiveIndexFile(ArchiveFile):
+  ArchiveId=hashlib.sha256(os.path.abspath(ArchiveFile).encode("utf-8")).hexdigest()[:16]
+  return os.path.join(GetCacheFolder(),ARCHIVE_INDEX_FILE.replace("<archive>",ArchiveId))
+
+#----------------------------------------------------------------------------------------------------------------------
+# Load index of objects created by archive members (member name, crc and created object names)
+# (members whose crc in central directory is the same as in index do not need to be read to know their objects)
+#----------------------------------------------------------------------------------------------------------------------
+def LoadArchiveIndex(ArchiveFile):
+  try:
+    with open(GetArchiveIndexFile(ArchiveFile),"r") as File:
+      return json.load(File)
+  except Exception:
+    return {}
+
+#----------------------------------------------------------------------------------------------------------------------
+# Save index of objects created by archive members (index is only a cache, it is not saved if cache folder is not
+# writable)
+#----------------------------------------------------------------------------------------------------------------------
+def SaveArchiveIndex(ArchiveFile,Index):
+  try:
+    IndexFile=GetArchiveIndexFile(ArchiveFile)
+    os.makedirs(os.path.dirname(IndexFile),exist_ok=True)
+    with open(IndexFile,"w") as File:
+      json.dump(Index,File)
+  except Exception:
+    pass
 
-  #Get relevant files to read (only python files)
+#----------------------------------------------------------------------------------------------------------------------
+# Check archive member can create selected objects (object names from index are matched the same way as the parser
+# does, members with unqualified names are read)
+#----------------------------------------------------------------------------------------------------------------------
+def IsArchiveMemberSelected(Ctx,Names,SelectedSchemas,PatternFilter):
+  if Ctx["options"]["dump"]==True:
+    return True
+  for Name in Names:
+    CatalogName,SchemaName,ObjectName=SplitObjectName(Name)
+    if len(SchemaName)==0 or (SchemaNameReplacements(Ctx,SchemaName) in SelectedSchemas and fnmatch(ObjectName,PatternFilter)==True):
+      return True
+  return False
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get relevant files to read from repository folder (only python files)
+#----------------------------------------------------------------------------------------------------------------------
+def GetProjectFiles(ProjFolder):
+  if IsProjectArchive(ProjFolder)==True:
+    with zipfile.ZipFile(ProjFolder,"r") as Archive:
+      return [ProjFolder+ARCHIVE_MEMBER_SEPARATOR+Info.filename for Info in Archive.infolist() if IsArchiveNotebook(ProjFolder,Info.filename)==True]
   Files=[]
   for DirPath,DirNames,FileNames in os.walk(ProjFolder):
     for FileName in FileNames:
       if FileName.endswith(".py"):
-        FilePath=(DirPath+"\\"+FileName).replace("\\\\","\\")
+        FilePath=os.path.join(DirPath,FileName)
         Files.append(FilePath)
-  
-  #Process all files
-  Objects=[]
-  for File in Files:
+  return Files
 
-    #Read all file lines
-    try:
+#----------------------------------------------------------------------------------------------------------------------
+# Read sql commands from repository file
+#----------------------------------------------------------------------------------------------------------------------
+def ReadProjectFile(File,Archive=None):
+
+  #Read all file lines (archive members are read from open archive, dbc notebooks are converted to source lines)
+  try:
+    if Archive!=None:
+      MemberName=File.split(ARCHIVE_MEMBER_SEPARATOR,1)[1]
+      Text=Archive.read(MemberName).decode("utf-8")
+      FileLines=(GetDbcNotebookLines(Text) if os.path.splitext(MemberName)[1].lower() in DBC_NOTEBOOK_EXTENSIONS else Text.splitlines(keepends=True))
+    else:
       Handler=open(File,"r")
       FileLines=Handler.readlines()
       Handler.close()
-    except Exception as Ex:
-      Message="Error reading file "+File+". "+str(Ex)
-      return False,Message,[]
+  except Exception as Ex:
+    Message="Error reading file "+File+". "+str(Ex)
+    return False,Message,[]
+
+  #Process all lines
+  Commands=[]
+  FetchCommand=False
+  ProcessCommands=False
+  CommandList=[]
+  LastLine=len(FileLines)-1
+  for i,FileLine in enumerate(FileLines):
+    
+    #Format lines
+    FileLine=FileLine.strip(" ")
+    
+    #Get Sql commands
+    if FileLine.startswith(MAGIC_TAG+r" %sql"):
+      FetchCommand=True
+      FileLine=""
+    elif len(FileLine.replace("\n",""))==0:
+      FetchCommand=False
+      ProcessCommands=True
+    if i==LastLine:
+      ProcessCommands=True
+    if FetchCommand==True:
+      FileLine=FileLine.replace(MAGIC_TAG+" ","")
+      FileLine=FileLine.replace(MAGIC_TAG,"")
+      if len(FileLine.replace("\n","").strip(" "))!=0:
+        CommandList.append(FileLine)
 
-    #Process all lines
-    FetchCommand=False
-    ProcessCommands=False
-    CommandList=[]
-    LastLine=len(FileLines)-1
-    for i,FileLine in enumerate(FileLines):
-      
-      #Format lines
-      FileLine=FileLine.strip(" ")
-      
-      #Get Sql commands
-      if FileLine.startswith(MAGIC_TAG+r" %sql"):
-        FetchCommand=True
-        FileLine=""
-      elif len(FileLine.replace("\n",""))==0:
-        FetchCommand=False
-        ProcessCommands=True
-      if i==LastLine:
-        ProcessCommands=True
-      if FetchCommand==True:
-        FileLine=FileLine.replace(MAGIC_TAG+" ","")
-        FileLine=FileLine.replace(MAGIC_TAG,"")
-        if len(FileLine.replace("\n","").strip(" "))!=0:
-          CommandList.append(FileLine)
-
-      #Store commands
-      if ProcessCommands==True:
-        JoinedCommands="".join(CommandList)
-        CommandLines=JoinedCommands.split(";")
-        CommandList=[]
-        for Command in CommandLines:
-          Objects.append(Command) 
-        ProcessCommands=False
-        CommandLines=[]
+    #Store commands
+    if ProcessCommands==True:
+      JoinedCommands="".join(CommandList)
+      CommandLines=JoinedCommands.split(";")
+      CommandList=[]
+      for Command in CommandLines:
+        Commands.append(Command) 
+      ProcessCommands=False
+      CommandLines=[]
 
-  #Parse all object definitions
-  for i,Command in enumerate(Objects):
-    Status,Message,ObjectId,ObjectDef=GetObjectDefinition(From,Command,SelectedSchemas,PatternFilter)
+  #Return commands
+  return True,"",Commands
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get object definitions from repository file
+#----------------------------------------------------------------------------------------------------------------------
+def ParseProjectFile(Ctx,From,File,SelectedSchemas,PatternFilter,Archive=None):
+  Status,Message,Commands=ReadProjectFile(File,Archive)
+  if Status==False:
+    return False,Message,{}
+  Objects={}
+  for Command in Commands:
+    Status,Message,ObjectId,ObjectDef=GetObjectDefinition(Ctx,From,Command,SelectedSchemas,PatternFilter)
     if Status==False:
-      return False,Message,{}
+      return False,Message+" (file "+File+")",{}
     if ObjectId!=None and ObjectDef!=None:
-      SchemaDef[ObjectId]=ObjectDef
-      DisplayProgress(From,i+1,len(Objects),ObjectId)
+      Objects[ObjectId]=ObjectDef
+  return True,"",Objects
 
-  #Return schema definition
-  return True,"",SchemaDef
+#----------------------------------------------------------------------------------------------------------------------
+# Calculate selected schemas with environment replace
+#----------------------------------------------------------------------------------------------------------------------
+def GetSelectedSchemas(Ctx,SchemaNames):
+  SelectedSchemas=SchemaNames.split(SCHEMA_ARG_SEPARATOR)
+  return list(set([SchemaNameReplacements(Ctx,Schema) for Schema in SelectedSchemas]))
 
 #----------------------------------------------------------------------------------------------------------------------
-# Get schema info from databricks instance metastore
+# Read commands of archive members (members are read and decompressed by several threads, members that cannot create
+# selected objects according to archive index are not read, commands are parsed afterwards in member order)
+# (returns new archive index and read members with the list where names of created objects must be collected when
+# parsing them, the list is None when the index entry of the member is up to date)
 #----------------------------------------------------------------------------------------------------------------------
-def GetSchemaFromMetastore(From,Cursor,SchemaNames,PatternFilter):
+def ReadArchiveMembers(Ctx,ArchiveFile,SelectedSchemas,PatternFilter):
+  try:
+    Archive=zipfile.ZipFile(ArchiveFile,"r")
+  except Exception as Ex:
+    return False,"Error reading archive "+ArchiveFile+". "+str(Ex),([],{})
+  with Archive:
 
-  #Query to get table,views and functions
-  TBVW_LIST_QUERY="show tables in <schemaname> like '*'"         #Table/View list query
-  TBVW_DETL_QUERY="show create table <tablename>"                #Table/View detail query
-  FUNC_LIST_QUERY="show user functions in <schemaname> like '*'" #Function list query
-  FUNC_DETL_QUERY="describe function extended <functionname>"    #Function detail query
+    #Select members with central directory and archive index
+    Index=LoadArchiveIndex(ArchiveFile)
+    NewIndex={}
+    Members=[]
+    for Info in Archive.infolist():
+      if IsArchiveNotebook(ArchiveFile,Info.filename)==False:
+        continue
+      Entry=Index.get(Info.filename)
+      if Entry!=None and Entry["crc"]==Info.CRC:
+        NewIndex[Info.filename]=Entry
+        if IsArchiveMemberSelected(Ctx,Entry["names"],SelectedSchemas,PatternFilter)==False:
+          continue
+      Members.append((ArchiveFile+ARCHIVE_MEMBER_SEPARATOR+Info.filename,Info))
 
-  #Get object list
-  ObjectList=[]
-  SelSchemas=list(set(SchemaNames.split(SCHEMA_ARG_SEPARATOR)))
-  for i,SchemaName in enumerate(SelSchemas):
-    
-    #Display progress
-    DisplayProgress("LST",i+1,len(SelSchemas),SchemaName)
+    #Read selected members in parallel keeping member order
+    with concurrent.futures.ThreadPoolExecutor(max_workers=ARCHIVE_READERS) as Executor:
+      Results=list(Executor.map(lambda Member:ReadProjectFile(Member[0],Archive),Members))
+    Files=[]
+    for (File,Info),(Status,Message,Commands) in zip(Members,Results):
+      if Status==False:
+        return False,Message,([],{})
+      Names=None
+      if Info.filename not in NewIndex:
+        NewIndex[Info.filename]={"crc":Info.CRC,"names":[]}
+        Names=NewIndex[Info.filename]["names"]
+      Files.append((File,Commands,Names))
 
-    #Get tables / Views
-    Query=TBVW_LIST_QUERY.replace("<schemaname>",SchemaName)
-    try:
-      Cursor.execute(Query)
-    except Exception as Ex:
-      Message="Query error: "+str(Ex)+" (SQL: "+Query+")"
-      return False,Message,[]
-    for Row in Cursor.fetchall():
-      if Row["isTemporary"]==True:
-        continue
-      Schema=Row["database"]
-      Object=Row["tableName"]
-      if fnmatch(Object,PatternFilter)==False:
-        continue
-      ObjectList.append({"kind":"TBVW","schema":Schema,"object":Object})
+  #Return read members and new archive index
+  return True,"",(Files,NewIndex)
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get schema definitions from repository folder or workspace export archive
+# (when FileObjects is given it is filled with modification time and object definitions of every file read)
+#----------------------------------------------------------------------------------------------------------------------
+def GetSchemaFromProject(Ctx,From,ProjFolder,SchemaNames,PatternFilter,FileObjects=None):
+  
+  #Initialize schema definition
+  SchemaDef={}
+
+  #Calculate selected schemas with environment replace
+  SelectedSchemas=GetSelectedSchemas(Ctx,SchemaNames)
+
+  #Read archive members (names of created objects are collected for members not in archive index)
+  ReadStart=ProfileBegin()
+  Objects=[]
+  MemberNames={}
+  ArchiveIndex=None
+  if IsProjectArchive(ProjFolder)==True:
+    Status,Message,(Files,ArchiveIndex)=ReadArchiveMembers(Ctx,ProjFolder,SelectedSchemas,PatternFilter)
+    if Status==False:
+      return False,Message,{}
+    for File,Commands,Names in Files:
+      if FileObjects!=None:
+        FileObjects[File]={"mtime":os.stat(ProjFolder).st_mtime,"objects":{}}
+      MemberNames[File]=Names
+      Objects.extend([(File,Command) for Command in Commands])
+
+  #Process all files (only python files)
+  else:
+    Files=GetProjectFiles(ProjFolder)
+    for File in Files:
+      if FileObjects!=None:
+        try:
+          FileObjects[File]={"mtime":os.stat(File).st_mtime,"objects":{}}
+        except OSError as Ex:
+          return False,"Error reading file "+File+". "+str(Ex),{}
+      Status,Message,Commands=ReadProjectFile(File)
+      if Status==False:
+        return False,Message,[]
+      Objects.extend([(File,Command) for Command in Commands])
+  ProfileEnd(Ctx,"read",ReadStart)
+
+  #Parse all object definitions
+  for i,(File,Command) in enumerate(Objects):
+    ParseStart=ProfileBegin()
+    Status,Message,ObjectId,ObjectDef=GetObjectDefinition(Ctx,From,Command,SelectedSchemas,PatternFilter,MemberNames.get(File))
+    ProfileEnd(Ctx,"parse",ParseStart)
+    if Status==False:
+      return False,Message,{}
+    if ObjectId!=None and ObjectDef!=None:
+      SchemaDef[ObjectId]=ObjectDef
+      if FileObjects!=None:
+        FileObjects[File]["objects"][ObjectId]=ObjectDef
+      ProfileObject(Ctx,ObjectId,timer()-ParseStart[0])
+      DisplayProgress(Ctx,From,i+1,len(Objects),ObjectId)
+
+  #Save archive index when it changes (object names are the ones found by the parser)
+  if ArchiveIndex!=None:
+    for Entry in ArchiveIndex.values():
+      Entry["names"]=sorted(set(Entry["names"]))
+    if ArchiveIndex!=LoadArchiveIndex(ProjFolder):
+      SaveArchiveIndex(ProjFolder,ArchiveIndex)
+
+  #Return schema definition
+  return True,"",SchemaDef
+
+#----------------------------------------------------------------------------------------------------------------------
+# Write schema definitions from repository folder to spill (files are read and parsed one by one)
+#----------------------------------------------------------------------------------------------------------------------
+def SpillSchemaFromProject(Ctx,From,ProjFolder,SchemaNames,PatternFilter,Spill):
+  SelectedSchemas=GetSelectedSchemas(Ctx,SchemaNames)
+  Files=GetProjectFiles(ProjFolder)
+  Archive=(zipfile.ZipFile(ProjFolder,"r") if IsProjectArchive(ProjFolder)==True else None)
+  try:
+    for i,File in enumerate(Files):
+      ParseStart=ProfileBegin()
+      Status,Message,Objects=ParseProjectFile(Ctx,From,File,SelectedSchemas,PatternFilter,Archive)
+      ProfileEnd(Ctx,"parse",ParseStart)
+      if Status==False:
+        return False,Message
+      for ObjectId in Objects:
+        SpillAdd(Spill,ObjectId,Objects[ObjectId])
+      DisplayProgress(Ctx,From,i+1,len(Files),File)
+  finally:
+    if Archive!=None:
+      Archive.close()
+  return True,""
+
+#----------------------------------------------------------------------------------------------------------------------
+# List tables, views and functions of schemas in databricks instance metastore
+#----------------------------------------------------------------------------------------------------------------------
+def ListSchemaObjects(Ctx,Cursor,SchemaNames,PatternFilter):
+
+  #Get object list
+  ObjectList=[]
+  SelSchemas=list(set(SchemaNames.split(SCHEMA_ARG_SEPARATOR)))
+  for i,SchemaName in enumerate(SelSchemas):
+    
+    #Display progress
+    DisplayProgress(Ctx,"LST",i+1,len(SelSchemas),SchemaName)
+
+    #Get views when only tables or only views are read (objects of the other type are left out before detail queries)
+    #or when compared aspects apply only to one of them (objects of the other type do not need detail queries)
+    ReadTables=IsObjectTypeRead(Ctx,OBJECTID_TABLE)
+    ReadViews=IsObjectTypeRead(Ctx,OBJECTID_VIEW)
+    Views=None
+    if ReadTables!=ReadViews or (ReadTables==True and IsTypeDetailNeeded(Ctx,OBJECTID_TABLE)!=IsTypeDetailNeeded(Ctx,OBJECTID_VIEW)):
+      Query=VIEW_LIST_QUERY.replace("<schemaname>",SchemaName)
+      Status,Message,Rows=ExecuteQuery(Ctx,Cursor,"VIEW_LIST_QUERY",Query)
+      if Status==False:
+        return False,Message,[]
+      Views=set([Row["viewName"].lower() for Row in Rows if Row["isTemporary"]==False])
+
+    #Get tables / Views
+    if ReadTables==True or ReadViews==True:
+      Query=TBVW_LIST_QUERY.replace("<schemaname>",SchemaName)
+      Status,Message,Rows=ExecuteQuery(Ctx,Cursor,"TBVW_LIST_QUERY",Query)
+      if Status==False:
+        return False,Message,[]
+      for Row in Rows:
+        if Row["isTemporary"]==True:
+          continue
+        Schema=Row["database"]
+        Object=Row["tableName"]
+        if fnmatch(Object,PatternFilter)==False or IsObjectInShard(Ctx,OBJECTID_TABLE,SchemaNameReplacements(Ctx,Schema),Object)==False:
+          continue
+        if Views!=None:
+          ObjectType=(OBJECTID_VIEW if Object.lower() in Views else OBJECTID_TABLE)
+          if IsObjectTypeRead(Ctx,ObjectType)==True:
+            ObjectList.append({"kind":"TBVW","schema":Schema,"object":Object,"type":ObjectType})
+        else:
+          ObjectList.append({"kind":"TBVW","schema":Schema,"object":Object})
+
+    #No functions are read
+    if IsObjectTypeRead(Ctx,OBJECTID_SCALARFUNC)==False and IsObjectTypeRead(Ctx,OBJECTID_TABLEFUNC)==False:
+      continue
     
     #Get user functions
     Query=FUNC_LIST_QUERY.replace("<schemaname>",SchemaName)
-    try:
-      Cursor.execute(Query)
-    except Exception as Ex:
-      Message="Query error: "+str(Ex)+" (SQL: "+Query+")"
+    Status,Message,Rows=ExecuteQuery(Ctx,Cursor,"FUNC_LIST_QUERY",Query)
+    if Status==False:
       return False,Message,[]
-    for Row in Cursor.fetchall():
+    for Row in Rows:
       FunctionName=Row["function"]
       Catalog,Schema,Object=SplitObjectName(FunctionName)
-      if fnmatch(Object,PatternFilter)==False:
+      if fnmatch(Object,PatternFilter)==False or IsObjectInShard(Ctx,OBJECTID_SCALARFUNC,SchemaNameReplacements(Ctx,Schema),Object)==False:
         continue
       ObjectList.append({"kind":"FUNC","schema":Schema,"object":Object})
-  
+
+  #Return object list
+  return True,"",ObjectList
+
+#----------------------------------------------------------------------------------------------------------------------
+# List objects of several sides (schemas of all sides are listed from a shared queue, in parallel when there are several
+# cursors)
+#----------------------------------------------------------------------------------------------------------------------
+def ListObjectLists(Ctx,Cursor,Lists,PatternFilter):
+
+  #Sequential listing
+  Items=[(From,SchemaName) for From,SchemaNames in Lists for SchemaName in sorted(set(SchemaNames.split(SCHEMA_ARG_SEPARATOR)))]
+  Cursors=(GetFetchCursors(Ctx,Cursor) if len(Items)>1 else [Cursor])
+  ObjectLists={}
+  if len(Cursors)==1:
+    for From,SchemaNames in Lists:
+      Status,Message,ObjectLists[From]=ListSchemaObjects(Ctx,Cursor,SchemaNames,PatternFilter)
+      if Status==False:
+        return False,Message+"\nError occured when retrieving definition of schema "+SchemaNames,{}
+    return True,"",ObjectLists
+
+  #Parallel listing (each thread takes an idle cursor, object lists keep schema order)
+  Idle=queue.Queue()
+  for Item in Cursors:
+    Idle.put(Item)
+  def List(Item):
+    Worker=Idle.get()
+    try:
+      return ListSchemaObjects(Ctx,Worker,Item[1],PatternFilter)
+    finally:
+      Idle.put(Worker)
+  with concurrent.futures.ThreadPoolExecutor(max_workers=len(Cursors)) as Executor:
+    Results=list(Executor.map(List,Items))
+  for From,SchemaNames in Lists:
+    ObjectLists[From]=[]
+  for (From,SchemaName),(Status,Message,ObjectList) in zip(Items,Results):
+    if Status==False:
+      return False,Message+"\nError occured when retrieving definition of schema "+SchemaName,{}
+    ObjectLists[From]+=ObjectList
+  return True,"",ObjectLists
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get per user cache folder (XDG_CACHE_HOME or ~/.cache, LOCALAPPDATA on windows)
+#----------------------------------------------------------------------------------------------------------------------
+def GetCacheFolder():
+  if sys.platform=="win32" and len(os.environ.get("LOCALAPPDATA",""))!=0:
+    BaseFolder=os.environ["LOCALAPPDATA"]
+  elif len(os.environ.get("XDG_CACHE_HOME",""))!=0:
+    BaseFolder=os.environ["XDG_CACHE_HOME"]
+  else:
+    BaseFolder=os.path.join(os.path.expanduser("~"),".cache")
+  return os.path.join(BaseFolder,CACHE_FOLDER)
+
+#----------------------------------------------------------------------------------------------------------------------
+# Open fetch journal (objects already fetched are loaded when resuming, otherwise journal is started again)
+# (only commands loaded for resuming are kept in memory, appended commands are just counted)
+#----------------------------------------------------------------------------------------------------------------------
+def OpenJournal(Ctx):
+  JournalFile=Ctx["options"]["journal"]
+  if len(JournalFile)==0 or Ctx["journal"]!=None:
+    return True,"",Ctx["journal"]
+  Journal={"file":JournalFile,"commands":{},"appended":0,"handle":None}
+  try:
+    if Ctx["options"]["resume"]==True and os.path.exists(JournalFile):
+      with open(JournalFile,"r") as File:
+        for Line in File:
+          try:
+            Entry=json.loads(Line)
+          except ValueError:
+            continue
+          Journal["commands"][Entry["key"]]=Entry["command"]
+    if len(os.path.dirname(JournalFile))!=0:
+      os.makedirs(os.path.dirname(JournalFile),exist_ok=True)
+    Journal["handle"]=open(JournalFile,("a" if Ctx["options"]["resume"]==True else "w"))
+  except Exception as Ex:
+    return False,f"Unable to open fetch journal ({JournalFile}): {str(Ex)}",None
+  Ctx["journal"]=Journal
+  return True,"",Journal
+
+#----------------------------------------------------------------------------------------------------------------------
+# Append fetched object to journal (written at once so an interrupted run leaves at most one incomplete line)
+#----------------------------------------------------------------------------------------------------------------------
+def JournalAdd(Journal,Key,Command):
+  if Journal==None:
+    return True,""
+  try:
+    Journal["handle"].write(json.dumps({"key":Key,"command":Command})+"\n")
+    Journal["handle"].flush()
+  except Exception as Ex:
+    return False,f"Unable to write fetch journal ({Journal['file']}): {str(Ex)}"
+  Journal["appended"]+=1
+  return True,""
+
+#----------------------------------------------------------------------------------------------------------------------
+# Close fetch journal (journal file is removed when it is not needed for resuming)
+#----------------------------------------------------------------------------------------------------------------------
+def CloseJournal(Ctx,Remove):
+  Journal=Ctx["journal"]
+  if Journal==None:
+    return
+  Journal["handle"].close()
+  Ctx["journal"]=None
+  if Remove==True:
+    try:
+      os.remove(Journal["file"])
+    except OSError:
+      pass
+
+#----------------------------------------------------------------------------------------------------------------------
+# Record object that cannot be read (used when continuing on errors)
+#----------------------------------------------------------------------------------------------------------------------
+def AddObjectError(Ctx,From,Object,Message):
+  Ctx["errors"].append({"side":From,"kind":Object["kind"],"schema":Object["schema"],"object":Object["object"],"message":Message})
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get keys of objects that cannot be read (they are left out of comparisons on both sides)
+#----------------------------------------------------------------------------------------------------------------------
+def GetFailedObjectKeys(Ctx):
+  return set([GetObjectKey(Error["kind"],SchemaNameReplacements(Ctx,Error["schema"]),Error["object"]) for Error in Ctx["errors"]])
+
+#----------------------------------------------------------------------------------------------------------------------
+# Check object id belongs to failed objects
+#----------------------------------------------------------------------------------------------------------------------
+def IsObjectIdFailed(ObjectId,FailedKeys):
+  if len(FailedKeys)==0:
+    return False
+  SchemaName,ObjectName=ObjectId.split(":")[1].split(".")
+  return GetObjectKey(OBJECTID_CONF[ObjectId.split(":")[0]]["kind"],SchemaName,ObjectName) in FailedKeys
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get SQL definition of object from databricks instance metastore (detail query)
+#----------------------------------------------------------------------------------------------------------------------
+def FetchObjectCommand(Ctx,Cursor,Object):
+
+  #Get object details
+  Kind=Object["kind"]
+  SchemaName=Object["schema"]
+  ObjectName=Object["object"]
+
+  #Get table/View definition
+  if Kind=="TBVW":
+    Query=TBVW_DETL_QUERY.replace("<tablename>",SchemaName+"."+ObjectName)
+    Status,Message,Rows=ExecuteQuery(Ctx,Cursor,"TBVW_DETL_QUERY",Query)
+    if Status==False:
+      return False,Message,""
+    Command=""
+    for Row in Rows:
+      Command+=Row["createtab_stmt"]
+    return True,"",Command
+
+  #Get function attributes (without body when bodies are not compared)
+  if "bodies" in GetReadAspects(Ctx):
+    Query=FUNC_DETL_QUERY.replace("<functionname>",SchemaName+"."+ObjectName)
+    Status,Message,Rows=ExecuteQuery(Ctx,Cursor,"FUNC_DETL_QUERY",Query)
+  else:
+    Query=FUNC_TYPE_QUERY.replace("<functionname>",SchemaName+"."+ObjectName)
+    Status,Message,Rows=ExecuteQuery(Ctx,Cursor,"FUNC_TYPE_QUERY",Query)
+  if Status==False:
+    return False,Message,""
+  FunctionText=""
+  FunctionParms=[]
+  ReturnList=[]
+  FetchParms=False
+  FetchReturn=False
+  for Row in Rows:
+    Line=Row[0]
+    if Line.startswith("Type: "):
+      ObjectType=(OBJECTID_TABLEFUNC if TrimDoubleSpaces(Line.replace("Type: ",""))=="TABLE" else OBJECTID_SCALARFUNC)
+    elif Line.startswith("Input: "):
+      Line=Line.replace("Input: ","")
+      FetchParms=True
+    elif Line.startswith("Returns: "):
+      FetchParms=False
+      FetchReturn=True
+      Line=Line.replace("Returns: ","")
+    elif Line.startswith("Deterministic: "):
+      FetchReturn=False
+    elif Line.startswith("Body: "):
+      FunctionText=Line[len("Body: "):].strip()
+    if FetchParms==True:
+      Parms=TrimDoubleSpaces(Line)
+      ParmName=Parms.split(" ")[0]
+      ParmType=StandardType(Parms.split(" ")[1])
+      FunctionParms.append(ParmName+" "+ParmType)
+    if FetchReturn==True:
+      ReturnList.append(TrimDoubleSpaces(Line))
+  if ObjectType==OBJECTID_SCALARFUNC:
+    ReturnType=ReturnList[0]
+  else:
+    ReturnType=",".join(ReturnList)
+
+  #Build definition
+  if ObjectType==OBJECTID_SCALARFUNC:
+    Command=f"create function {SchemaName}.{ObjectName} ({','.join(FunctionParms)}) returns {ReturnType} return {FunctionText}"
+  elif ObjectType==OBJECTID_TABLEFUNC:
+    Command=f"create function {SchemaName}.{ObjectName} ({','.join(FunctionParms)}) returns table({ReturnType}) return {FunctionText}"
+  return True,"",Command
+
+#----------------------------------------------------------------------------------------------------------------------
+# Load latency history of detail queries (expected seconds by object)
+#----------------------------------------------------------------------------------------------------------------------
+def LoadLatencies(Ctx):
+  if Ctx["latencies"]!=None:
+    return Ctx["latencies"]
+  LatencyFile=Ctx["options"]["latencies"]
+  Latencies={}
+  if len(LatencyFile)!=0 and os.path.exists(LatencyFile):
+    try:
+      with open(LatencyFile,"r") as File:
+        Latencies=json.load(File)
+    except (OSError,ValueError):
+      Latencies={}
+  Ctx["latencies"]=Latencies
+  return Latencies
+
+#----------------------------------------------------------------------------------------------------------------------
+# Save latency history of detail queries (merged with file contents, so runs sharing the file keep their measures)
+#----------------------------------------------------------------------------------------------------------------------
+def SaveLatencies(Ctx):
+  LatencyFile=Ctx["options"]["latencies"]
+  if len(LatencyFile)==0 or Ctx["latencies"]==None:
+    return
+  Latencies=dict(Ctx["latencies"])
+  Ctx["latencies"]=None
+  Saved=LoadLatencies(Ctx)
+  Saved.update(Latencies)
+  try:
+    if len(os.path.dirname(LatencyFile))!=0:
+      os.makedirs(os.path.dirname(LatencyFile),exist_ok=True)
+    with open(LatencyFile,"w") as File:
+      json.dump(Saved,File,indent=0,sort_keys=True)
+  except OSError:
+    pass
+
+#----------------------------------------------------------------------------------------------------------------------
+# Update expected latency of object with measured one (latencies are not kept when there is no latency history file)
+#----------------------------------------------------------------------------------------------------------------------
+def UpdateLatency(Ctx,Key,Seconds):
+  if len(Ctx["options"]["latencies"])==0:
+    return
+  Latencies=LoadLatencies(Ctx)
+  Latencies[Key]=round((Latencies[Key]*(1-LATENCY_WEIGHT)+Seconds*LATENCY_WEIGHT if Key in Latencies else Seconds),6)
+
+#----------------------------------------------------------------------------------------------------------------------
+# Schedule detail queries longest expected first (objects without history get average latency of their kind)
+#----------------------------------------------------------------------------------------------------------------------
+def ScheduleObjects(Ctx,ObjectList):
+  Latencies=LoadLatencies(Ctx)
+  KindLatencies={}
+  for Key,Seconds in Latencies.items():
+    KindLatencies.setdefault(Key.split(":")[0],[]).append(Seconds)
+  KindEstimates=dict(LATENCY_KIND_DEFAULTS)
+  for Kind,Values in KindLatencies.items():
+    KindEstimates[Kind]=sum(Values)/len(Values)
+  def Expected(Object):
+    Key=Object["kind"]+":"+Object["schema"]+"."+Object["object"]
+    return Latencies.get(Key,KindEstimates.get(Object["kind"],0.0))
+  return sorted(ObjectList,key=Expected,reverse=True)
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get cursors for detail queries (given cursor plus additional connections up to parallel option)
+# (additional connections are kept in context so they are opened once by run, if one cannot be opened the ones already
+# opened are used)
+#----------------------------------------------------------------------------------------------------------------------
+def GetFetchCursors(Ctx,Cursor):
+  Worker=dict(Ctx)
+  Worker["progress"]={"enabled":False,"last":"","count":0}
+  while len(Ctx["cursors"])<Ctx["options"]["parallel"]-1:
+    if len(Ctx["options"]["replay"])!=0:
+      Status,Message,Extra=OpenReplayCursor(Worker)
+    else:
+      Status,Message,Parms=GetConnectionParms()
+      if Status==True:
+        Status,Message,Extra=Connect(Worker,Parms["server_hostname"],Parms["http_path"],Parms["access_token"])
+    if Status==False:
+      break
+    Ctx["cursors"].append(Extra)
+  return [Cursor]+Ctx["cursors"][:Ctx["options"]["parallel"]-1]
+
+#----------------------------------------------------------------------------------------------------------------------
+# Run detail queries of objects (in parallel when there are several cursors)
+# (generator yields object, status, message, definition and query seconds as queries finish)
+#----------------------------------------------------------------------------------------------------------------------
+def FetchObjectCommands(Ctx,Cursor,ObjectList):
+
+  #Sequential fetch
+  Cursors=(GetFetchCursors(Ctx,Cursor) if len(ObjectList)>1 else [Cursor])
+  if len(Cursors)==1:
+    for Object in ObjectList:
+      QueryStart=timer()
+      Status,Message,Command=FetchObjectCommand(Ctx,Cursor,Object)
+      yield Object,Status,Message,Command,timer()-QueryStart
+    return
+
+  #Parallel fetch (each thread takes an idle cursor, objects are taken in schedule order)
+  Idle=queue.Queue()
+  for Item in Cursors:
+    Idle.put(Item)
+  def Fetch(Object):
+    Worker=Idle.get()
+    try:
+      QueryStart=timer()
+      Status,Message,Command=FetchObjectCommand(Ctx,Worker,Object)
+      return Object,Status,Message,Command,timer()-QueryStart
+    finally:
+      Idle.put(Worker)
+  Executor=concurrent.futures.ThreadPoolExecutor(max_workers=len(Cursors))
+  try:
+    Futures=[Executor.submit(Fetch,Object) for Object in ObjectList]
+    for Future in concurrent.futures.as_completed(Futures):
+      yield Future.result()
+  finally:
+    Executor.shutdown(wait=True,cancel_futures=True)
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get definitions of listed objects from databricks instance metastore (detail queries)
+# (when spill is given definitions are written to external sorted runs instead of being returned)
+# (fetched objects are appended to journal and taken from it when resuming, failing objects are recorded as errors
+# instead of stopping when continuing on errors)
+# (detail queries are scheduled slowest first and their latencies are saved for next runs)
+# (only object type is read for objects without compared aspects that need detail queries)
+# (when sink is given definitions are passed to it as they are read, objects keep given order and can carry the side
+# they belong to, so both sides can be fetched together)
+#----------------------------------------------------------------------------------------------------------------------
+def FetchObjectDefinitions(Ctx,From,Cursor,ObjectList,Spill=None,Sink=None):
+
+  #Open journal
+  Status,Message,Journal=OpenJournal(Ctx)
+  if Status==False:
+    return False,Message,{}
+
+  #Take objects already fetched from journal and schedule detail queries of the others
+  Journaled=[]
+  Pending=[]
+  TypeOnly=[]
+  for Object in ObjectList:
+    JournalKey=Object["kind"]+":"+Object["schema"]+"."+Object["object"]
+    if IsDetailNeeded(Ctx,Object["kind"],Object.get("type"))==False:
+      TypeOnly.append(Object)
+    elif Journal!=None and JournalKey in Journal["commands"]:
+      Journaled.append((Object,True,"",Journal["commands"][JournalKey],None))
+    else:
+      Pending.append(Object)
+  Fetches=FetchObjectCommands(Ctx,Cursor,(ScheduleObjects(Ctx,Pending) if Sink==None else Pending))
+
   #Get object definitions
   SchemaDef={}
-  for i,Object in enumerate(ObjectList):
+  try:
+    for i,(Object,Status,Message,Command,Seconds) in enumerate(itertools.chain(Journaled,Fetches)):
+      ObjectStart=timer()
+      ObjectFrom=Object.get("side",From)
+      JournalKey=Object["kind"]+":"+Object["schema"]+"."+Object["object"]
+
+      #Parse definition
+      if Status==True:
+        ParseStart=ProfileBegin()
+        Status,Message,ObjectId,ObjectDef=GetObjectDefinition(Ctx,ObjectFrom,Command,[Object["schema"]],"*")
+        ProfileEnd(Ctx,"parse",ParseStart)
+
+      #Stop or record error
+      if Status==False:
+        if Ctx["options"]["continueonerror"]==False:
+          return False,Message,{}
+        AddObjectError(Ctx,ObjectFrom,Object,Message)
+        continue
+
+      #Save in journal and latency history
+      if Seconds!=None:
+        UpdateLatency(Ctx,JournalKey,Seconds)
+        Status,Message=JournalAdd(Journal,JournalKey,Command)
+        if Status==False:
+          return False,Message,{}
+
+      #Add definition
+      if ObjectId!=None and ObjectDef!=None:
+        if Sink!=None:
+          Sink(ObjectFrom,ObjectId,ObjectDef)
+        elif Spill!=None:
+          SpillAdd(Spill,ObjectId,ObjectDef)
+        else:
+          SchemaDef[ObjectId]=ObjectDef
+        ProfileObject(Ctx,ObjectId,timer()-ObjectStart+(Seconds if Seconds!=None else 0.0))
+        DisplayProgress(Ctx,ObjectFrom,i+1,len(Journaled)+len(Pending),ObjectId)
+
+  #Stop pending queries and save latencies
+  finally:
+    Fetches.close()
+    SaveLatencies(Ctx)
+
+  #Get types of objects without detail queries
+  for ObjectFrom in sorted(set([Object.get("side",From) for Object in TypeOnly])):
+    Status,Message,TypeDef=GetOneSidedObjects(Ctx,Cursor,[Object for Object in TypeOnly if Object.get("side",From)==ObjectFrom])
+    if Status==False:
+      return False,Message,{}
+    for ObjectId,ObjectDef in TypeDef.items():
+      if Sink!=None:
+        Sink(ObjectFrom,ObjectId,ObjectDef)
+      elif Spill!=None:
+        SpillAdd(Spill,ObjectId,ObjectDef)
+      else:
+        SchemaDef[ObjectId]=ObjectDef
+
+  #Return
+  return True,"",SchemaDef
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get schema info from databricks instance metastore
+#----------------------------------------------------------------------------------------------------------------------
+def GetSchemaFromMetastore(Ctx,From,Cursor,SchemaNames,PatternFilter,Spill=None):
+
+  #Spilled definitions are listed and fetched one schema at a time (object list of whole catalog is not kept)
+  if Spill!=None and len(set(SchemaNames.split(SCHEMA_ARG_SEPARATOR)))>1:
+    for SchemaName in sorted(set(SchemaNames.split(SCHEMA_ARG_SEPARATOR))):
+      Status,Message,SchemaDef=GetSchemaFromMetastore(Ctx,From,Cursor,SchemaName,PatternFilter,Spill)
+      if Status==False:
+        return False,Message,[]
+    return True,"",{}
+
+  #List objects and fetch their definitions
+  Status,Message,ObjectList=ListSchemaObjects(Ctx,Cursor,SchemaNames,PatternFilter)
+  if Status==False:
+    return False,Message,[]
+  return FetchObjectDefinitions(Ctx,From,Cursor,ObjectList,Spill)
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get key that matches objects between source and target (object kind, schema name after replacements and object name)
+#----------------------------------------------------------------------------------------------------------------------
+def GetObjectKey(Kind,SchemaName,ObjectName):
+  return Kind+":"+SchemaName+"."+ObjectName.lower()
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get definitions of objects that exist only on one side (only object type is read, no detail queries)
+#----------------------------------------------------------------------------------------------------------------------
+def GetOneSidedObjects(Ctx,Cursor,ObjectList):
+
+  #Get views of schemas with one sided tables or views (unless object type is known from listing)
+  Views={}
+  for SchemaName in sorted(set([Object["schema"] for Object in ObjectList if Object["kind"]=="TBVW" and "type" not in Object])):
+    Query=VIEW_LIST_QUERY.replace("<schemaname>",SchemaName)
+    Status,Message,Rows=ExecuteQuery(Ctx,Cursor,"VIEW_LIST_QUERY",Query)
+    if Status==False:
+      return False,Message,{}
+    Views[SchemaName]=set([Row["viewName"].lower() for Row in Rows if Row["isTemporary"]==False])
+
+  #Get function types of schemas with one sided functions with a single query by schema (schemas where information
+  #schema cannot be queried get the type of every function with its own query)
+  FunctionTypes={}
+  for SchemaName in sorted(set([Object["schema"] for Object in ObjectList if Object["kind"]=="FUNC"])):
+    CatalogName=(SchemaName.split(".")[0] if SchemaName.find(".")!=-1 else "")
+    InfoSchema=(CatalogName+"." if len(CatalogName)!=0 else "")+"information_schema"
+    Query=FUNC_TYPES_QUERY.replace("<infoschema>",InfoSchema).replace("<schemaname>",SchemaName.split(".")[-1].lower())
+    Status,Message,Rows=ExecuteQuery(Ctx,Cursor,"FUNC_TYPES_QUERY",Query)
+    if Status==True:
+      FunctionTypes[SchemaName]={Row["routine_name"].lower():(OBJECTID_TABLEFUNC if str(Row["data_type"]).upper()=="TABLE" else OBJECTID_SCALARFUNC) for Row in Rows}
+
+  #Get object types
+  SchemaDef={}
+  for Object in ObjectList:
+    SchemaName=Object["schema"]
+    ObjectName=Object["object"]
+    if Object["kind"]=="TBVW" and "type" in Object:
+      ObjectType=Object["type"]
+    elif Object["kind"]=="TBVW":
+      ObjectType=(OBJECTID_VIEW if ObjectName.lower() in Views[SchemaName] else OBJECTID_TABLE)
+    elif ObjectName.lower() in FunctionTypes.get(SchemaName,{}):
+      ObjectType=FunctionTypes[SchemaName][ObjectName.lower()]
+    else:
+      Query=FUNC_TYPE_QUERY.replace("<functionname>",SchemaName+"."+ObjectName)
+      Status,Message,Rows=ExecuteQuery(Ctx,Cursor,"FUNC_TYPE_QUERY",Query)
+      if Status==False:
+        return False,Message,{}
+      ObjectType=OBJECTID_SCALARFUNC
+      for Row in Rows:
+        if Row[0].startswith("Type: "):
+          ObjectType=(OBJECTID_TABLEFUNC if TrimDoubleSpaces(Row[0].replace("Type: ",""))=="TABLE" else OBJECTID_SCALARFUNC)
+    if IsObjectTypeRead(Ctx,ObjectType)==False:
+      continue
+    SchemaName=SchemaNameReplacements(Ctx,SchemaName)
+    SchemaDef[ObjectType+":"+SchemaName+"."+ObjectName]={"fullname":SchemaName+"."+ObjectName,"type":ObjectType}
+
+  #Return definitions
+  return True,"",SchemaDef
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get fingerprints of objects in schemas computed by warehouse (one query by schema on unity catalog information schema)
+# (schemas where information schema cannot be queried have no fingerprints, so their objects are fetched as usual)
+#----------------------------------------------------------------------------------------------------------------------
+def GetSchemaFingerprints(Ctx,Cursor,SchemaNames):
+  Fingerprints={}
+  for SchemaName in sorted(set(SchemaNames.split(SCHEMA_ARG_SEPARATOR))):
+    CatalogName=(SchemaName.split(".")[0] if SchemaName.find(".")!=-1 else "")
+    InfoSchema=(CatalogName+"." if len(CatalogName)!=0 else "")+"information_schema"
+    Query=FINGERPRINT_QUERY.replace("<infoschema>",InfoSchema).replace("<schemaname>",SchemaName.split(".")[-1].lower())
+    Status,Message,Rows=ExecuteQuery(Ctx,Cursor,"FINGERPRINT_QUERY",Query)
+    if Status==False:
+      continue
+    for Row in Rows:
+      Fingerprints[GetObjectKey(Row["kind"],SchemaNameReplacements(Ctx,SchemaName.split(".")[-1].lower()),Row["object"])]=Row["hash"]
+  return Fingerprints
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get schema info from databricks instance metastore for comparison
+# (objects are listed first on both sides, detail queries are done only for objects that exist on both sides)
+#----------------------------------------------------------------------------------------------------------------------
+def GetPlannedSchemaDefinitions(Ctx,Cursor,Sides,Definitions,PatternFilter,ObjectLists=None):
+
+  #List objects of metastore sides (unless already listed by background connection)
+  ObjectLists=(dict(ObjectLists) if ObjectLists!=None else {})
+  for From,Side in Sides:
+    if Side["kind"]=="schemas" and From not in ObjectLists:
+      Status,Message,ObjectLists[From]=ListSchemaObjects(Ctx,Cursor,Side["schemas"],PatternFilter)
+      if Status==False:
+        return False,Message+"\nError occured when retrieving definition of schema "+Side["schemas"]
+
+  #Get object keys of both sides
+  Keys={}
+  for From,Side in Sides:
+    if From in ObjectLists:
+      Keys[From]=set([GetObjectKey(Object["kind"],SchemaNameReplacements(Ctx,Object["schema"]),Object["object"]) for Object in ObjectLists[From]])
+    else:
+      Keys[From]=set([GetObjectKey(OBJECTID_CONF[ObjectId.split(":")[0]]["kind"],ObjectId.split(":")[1].split(".")[0],ObjectId.split(":")[1].split(".")[1]) for ObjectId in Definitions[From.lower()]])
+
+  #Leave out objects with equal fingerprints on both sides (they are counted as compared without reading definitions)
+  if Ctx["options"]["fingerprints"]==True and len(ObjectLists)==2:
+    Fingerprints={From:GetSchemaFingerprints(Ctx,Cursor,Side["schemas"]) for From,Side in Sides}
+    Equal=set([Key for Key,Hash in Fingerprints["SRC"].items() if Fingerprints["TGT"].get(Key)==Hash and Key in Keys["SRC"] and Key in Keys["TGT"]])
+    for From in ObjectLists:
+      ObjectLists[From]=[Object for Object in ObjectLists[From] if GetObjectKey(Object["kind"],SchemaNameReplacements(Ctx,Object["schema"]),Object["object"]) not in Equal]
+    Definitions["equal"]=Equal
+
+  #Get definitions (details only for objects on both sides, unless renames are detected among one sided objects)
+  for From in ObjectLists:
+    OtherKeys=Keys["TGT" if From=="SRC" else "SRC"]
+    BothSides=[]
+    OneSided=[]
+    for Object in ObjectLists[From]:
+      if GetObjectKey(Object["kind"],SchemaNameReplacements(Ctx,Object["schema"]),Object["object"]) in OtherKeys or Ctx["options"]["renames"]==True:
+        BothSides.append(Object)
+      else:
+        OneSided.append(Object)
+    Status,Message,Definitions[From.lower()]=FetchObjectDefinitions(Ctx,From,Cursor,BothSides)
+    if Status==False:
+      return False,Message
+    Status,Message,SchemaDef=GetOneSidedObjects(Ctx,Cursor,OneSided)
+    if Status==False:
+      return False,Message
+    Definitions[From.lower()].update(SchemaDef)
+
+  #Return status
+  return True,""
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get object id with short schema name
+#----------------------------------------------------------------------------------------------------------------------
+def GetShortObjectId(ObjectId,ShortNames):
+  ObjectType=ObjectId.split(":")[0]
+  SchemaName=ObjectId.split(":")[1].split(".")[0]
+  ObjectName=ObjectId.split(":")[1].split(".")[1]
+  ShortSchema=ShortNames[SchemaName]
+  return ObjectType+":"+ShortSchema+("." if len(ShortSchema)!=0 else "")+ObjectName
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get all different object names from both schemas sorted by object type and name
+#----------------------------------------------------------------------------------------------------------------------
+def GetSortedObjectNames(SrcSchemaDef,TgtSchemaDef):
+  Objects=list(set([(SrcSchemaDef[Name]["type"],Name) for Name in SrcSchemaDef]+[(TgtSchemaDef[Name]["type"],Name) for Name in TgtSchemaDef]))
+  Objects.sort(key=lambda x:str(OBJECTID_CONF[x[0]]["order"])+":"+x[1])
+  return [Obj[1] for Obj in Objects]
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get columnar representation of table columns in schema (sorted by object and column name)
+# (columns are filled with builtin map over each table, so no python code runs per column)
+#----------------------------------------------------------------------------------------------------------------------
+def GetColumnarCatalog(SchemaDef):
+  Columnar={"objects":[],"offsets":array("l",[0]),"names":[],"types":[],"nullables":array("b"),"comments":[]}
+  for ObjectName in sorted([ObjectName for ObjectName in SchemaDef if SchemaDef[ObjectName]["type"]==OBJECTID_TABLE and "columns" in SchemaDef[ObjectName]]):
+    Columns=SchemaDef[ObjectName]["columns"]
+    Names=sorted(Columns)
+    ColDefs=list(map(Columns.__getitem__,Names))
+    Columnar["objects"].append(ObjectName)
+    Columnar["names"].extend(Names)
+    Columnar["types"].extend(map(COLUMNAR_TYPE,ColDefs))
+    Columnar["nullables"].extend(map(COLUMNAR_NULLABLE,ColDefs))
+    Columnar["comments"].extend(map(COLUMNAR_COMMENT,ColDefs))
+    Columnar["offsets"].append(len(Columnar["names"]))
+  return Columnar
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get tables of both columnar catalogs that have equal columns (merge of sorted objects comparing column slices)
+#----------------------------------------------------------------------------------------------------------------------
+def GetEqualColumnObjects(SrcColumnar,TgtColumnar):
+  EqualColumns=set()
+  SrcObjects=SrcColumnar["objects"]
+  TgtObjects=TgtColumnar["objects"]
+  i=0
+  j=0
+  while i<len(SrcObjects) and j<len(TgtObjects):
+    if SrcObjects[i]<TgtObjects[j]:
+      i+=1
+    elif TgtObjects[j]<SrcObjects[i]:
+      j+=1
+    else:
+      SrcBeg,SrcEnd=SrcColumnar["offsets"][i],SrcColumnar["offsets"][i+1]
+      TgtBeg,TgtEnd=TgtColumnar["offsets"][j],TgtColumnar["offsets"][j+1]
+      if SrcEnd-SrcBeg==TgtEnd-TgtBeg \
+      and SrcColumnar["types"][SrcBeg:SrcEnd]==TgtColumnar["types"][TgtBeg:TgtEnd] \
+      and SrcColumnar["nullables"][SrcBeg:SrcEnd]==TgtColumnar["nullables"][TgtBeg:TgtEnd] \
+      and SrcColumnar["comments"][SrcBeg:SrcEnd]==TgtColumnar["comments"][TgtBeg:TgtEnd] \
+      and SrcColumnar["names"][SrcBeg:SrcEnd]==TgtColumnar["names"][TgtBeg:TgtEnd]:
+        EqualColumns.add(SrcObjects[i])
+      i+=1
+      j+=1
+  return EqualColumns
+
+#----------------------------------------------------------------------------------------------------------------------
+# Compare single object (object definition is None on the side where object does not exist)
+# (returns number of differences and comparison table rows or raw list items)
+#----------------------------------------------------------------------------------------------------------------------
+def CompareObject(Ctx,ObjectName,SrcObjectDef,TgtObjectDef,SrcIsFolder,TgtIsFolder,FullObjectId,RawOutput,ColumnsEqual=False):
+  
+  #Init comparison
+  Rows=[]
+  Differences=0
+
+  #Check all items missing in source schema
+  if SrcObjectDef==None:
+    if SrcIsFolder==False or (SrcIsFolder==True and IsObjectIgnored(Ctx,FullObjectId)==False):
+      if RawOutput==False:
+        Rows.append([ObjectName,"","","(object added)"])
+      else:
+        Rows.append([ObjectName,["Object added in target"]])
+      Differences+=1
+  
+  #Check all items missing in target schema
+  elif TgtObjectDef==None:
+    if TgtIsFolder==False or (TgtIsFolder==True and IsObjectIgnored(Ctx,FullObjectId)==False):
+      if RawOutput==False:
+        Rows.append([ObjectName,"","(object added)",""])
+      else:
+        Rows.append([ObjectName,["Object added in source"]])
+      Differences+=1
+
+  #Check all items missing in second schema
+  else:
+
+    #Compared aspects
+    Aspects=Ctx["options"]["compare"]
+    
+    #ComparisonTable of table and view attsributes
+    if SrcObjectDef["type"] in [OBJECTID_TABLE,OBJECTID_VIEW] and "comments" in Aspects:
+
+      #Objects have different comment
+      if SrcObjectDef["comment"]!=TgtObjectDef["comment"]:
+        if RawOutput==False:
+          Rows.append([ObjectName,"comment",SrcObjectDef["comment"],TgtObjectDef["comment"]])
+        else:
+          Rows.append([ObjectName,["Object comment is different","Source object comment: "+SrcObjectDef["comment"],"Target object comment: "+TgtObjectDef["comment"]]])
+        Differences+=1
+
+    #ComparisonTable of function attributes
+    if SrcObjectDef["type"] in [OBJECTID_SCALARFUNC,OBJECTID_TABLEFUNC]:
+
+      #Objects have different return type
+      if "returns" in Aspects:
+        SrcRetType=(",".join([Col["name"]+" "+Col["type"]+(" comment "+Col["comment"] if Col["comment"]!=NULL_COMMENT else "") for Col in SrcObjectDef["returns"]]) if SrcObjectDef["type"]==OBJECTID_TABLEFUNC else SrcObjectDef["returns"])
+        TgtRetType=(",".join([Col["name"]+" "+Col["type"]+(" comment "+Col["comment"] if Col["comment"]!=NULL_COMMENT else "") for Col in TgtObjectDef["returns"]]) if TgtObjectDef["type"]==OBJECTID_TABLEFUNC else TgtObjectDef["returns"])
+        if SrcRetType!=TgtRetType:
+          if RawOutput==False:
+            Rows.append([ObjectName,"returns",SrcRetType,TgtRetType])
+          else:
+            Rows.append([ObjectName,["Function return type is different","Source return type: "+SrcRetType,"Target return type: "+TgtRetType]])          
+          Differences+=1
+
+      #Objects have different parameters
+      if "parameters" in Aspects:
+        SrcParmList=",".join([Parm["name"]+" "+Parm["type"] for Parm in SrcObjectDef["parameters"]])
+        TgtParmList=",".join([Parm["name"]+" "+Parm["type"] for Parm in TgtObjectDef["parameters"]])
+        if SrcParmList!=TgtParmList:
+          if RawOutput==False:
+            Rows.append([ObjectName,"parameters",SrcParmList,TgtParmList])
+          else:
+            Rows.append([ObjectName,["Function parameters different","Source parameters: "+SrcParmList,"Target parameters: "+TgtParmList]])
+          Differences+=1
+
+    #ComparisonTable of view / function definitions (skipped with difflib when bodies are not compared, stored bodies
+    #are loaded only when their hashes are different)
+    if SrcObjectDef["type"] in [OBJECTID_VIEW,OBJECTID_SCALARFUNC,OBJECTID_TABLEFUNC] and "bodies" in Aspects and SrcObjectDef["text"]!=TgtObjectDef["text"]:
+      SrcText=BodyNameReplacements(Ctx,FullObjectId,SrcObjectDef["text"])
+      TgtText=BodyNameReplacements(Ctx,FullObjectId,TgtObjectDef["text"])
+      if SrcText!=TgtText:
+        SrcLines=[Line for Line in SrcText.split("\n")]
+        TgtLines=[Line for Line in TgtText.split("\n")]
+        SrcLineNr=0
+        TgtLineNr=0
+        TextComparison=[]
+        if RawOutput==False:
+          for Diff in difflib.unified_diff(SrcLines,TgtLines):
+            Diff=str(Diff)
+            if Diff.startswith("+++") or Diff.startswith("---"):
+              continue
+            if Diff.startswith("@@"):
+              SrcLineNr=int(Diff.replace("@","").strip().split(" ")[0].split(",")[0].replace("-",""))
+              TgtLineNr=int(Diff.replace("@","").strip().split(" ")[1].split(",")[0].replace("+",""))
+              continue
+            if Diff.startswith("+"):
+              TextComparison.append(["","","",str(TgtLineNr).rjust(3)+": "+Diff[1:]])
+              Differences+=1
+              TgtLineNr+=1
+            elif Diff.startswith("-"):
+              TextComparison.append(["","",str(SrcLineNr).rjust(3)+": "+Diff[1:],""])
+              Differences+=1
+              SrcLineNr+=1
+            else:
+              TextComparison.append(["","",str(SrcLineNr).rjust(3)+": "+Diff[1:],str(TgtLineNr).rjust(3)+": "+Diff[1:]])
+              SrcLineNr+=1
+              TgtLineNr+=1
+          if len(TextComparison)!=0:
+            if len(Rows)==0:
+              TextComparison[0][0]=ObjectName
+              TextComparison[0][1]="definition"
+            Rows.extend(TextComparison)
+        else:
+          DifferenceList=[]
+          for Diff in difflib.unified_diff(SrcLines,TgtLines):
+            if Diff.startswith("+++") or Diff.startswith("---"):
+              continue
+            if Diff.startswith("@@"):
+              continue
+            else:
+              DifferenceList.append(str(Diff))
+          Rows.append([ObjectName,["Object definition is different","Differences:\n"+"\n".join(DifferenceList)]])
+
+    #ComparisonTable of table and view columns (skipped when columnar comparison found them equal)
+    if SrcObjectDef["type"] == OBJECTID_TABLE and ColumnsEqual==False and ("columns" in Aspects or "comments" in Aspects):
+
+      #ComparisonTable of columns
+      ColNames=list(set([Name for Name in SrcObjectDef["columns"]]+[Name for Name in TgtObjectDef["columns"]]))
+      ColNames.sort()
+      ColComparison=[]
+      for ColName in ColNames:
+        if "columns" in Aspects and ColName in TgtObjectDef["columns"] and ColName not in SrcObjectDef["columns"]:
+          ColComparison.append(["","column:"+ColName,"","(column added)"])
+          Differences+=1
+        elif "columns" in Aspects and ColName in SrcObjectDef["columns"] and ColName not in TgtObjectDef["columns"]:
+          ColComparison.append(["","column:"+ColName,"(column added)",""])
+          Differences+=1
+        elif ColName in SrcObjectDef["columns"] and ColName in TgtObjectDef["columns"]:
+          if "columns" in Aspects and SrcObjectDef["columns"][ColName]["type"]!=TgtObjectDef["columns"][ColName]["type"]:
+            ColComparison.append(["","column:"+ColName,"type:"+SrcObjectDef["columns"][ColName]["type"],"type:"+TgtObjectDef["columns"][ColName]["type"]])
+            Differences+=1
+          if "columns" in Aspects and SrcObjectDef["columns"][ColName]["nullable"]!=TgtObjectDef["columns"][ColName]["nullable"]:
+            ColComparison.append(["","column:"+ColName,"nullable:"+str(SrcObjectDef["columns"][ColName]["nullable"]),"nullable:"+str(TgtObjectDef["columns"][ColName]["nullable"])])
+            Differences+=1
+          if "comments" in Aspects and SrcObjectDef["columns"][ColName]["comment"]!=TgtObjectDef["columns"][ColName]["comment"]:
+            ColComparison.append(["","column:"+ColName,"comment:"+SrcObjectDef["columns"][ColName]["comment"],"comment:"+TgtObjectDef["columns"][ColName]["comment"]])
+            Differences+=1
+      if len(ColComparison)!=0:
+        if RawOutput==False:
+          if len(Rows)==0:
+            ColComparison[0][0]=ObjectName
+            ColComparison[0][1]="definition"
+          Rows.extend(ColComparison)
+        else:
+          DifferenceList=[]
+          for Difference in ColComparison:
+            if Difference[2]=="" and Difference[3]=="(column added)":
+              DifferenceList.append(Difference[1]+" is added in target")
+            elif Difference[2]=="(column added)" and Difference[3]=="":
+              DifferenceList.append(Difference[1]+" is added in source")
+            else:
+              DifferenceList.append(Difference[1]+", Source "+Difference[2]+", Target "+Difference[3])
+          Rows.append([ObjectName,DifferenceList])
+
+  #Return object comparison
+  return Differences,Rows
+
+#----------------------------------------------------------------------------------------------------------------------
+# Join object comparisons given in object order (separation lines are inserted between objects if requested)
+# (object comparisons can be any iterable of differences and rows, i.e. a generator when comparing external sorted runs)
+#----------------------------------------------------------------------------------------------------------------------
+def GetComparisonResult(ObjectComparisons,SeparatorLine):
+  Result=[]
+  Differences=0
+  DiffObjects=0
+  for ObjectDifferences,Rows in ObjectComparisons:
+    Differences+=ObjectDifferences
+    if len(Rows)!=0:
+      if SeparatorLine==True and DiffObjects!=0:
+        Result.append([SEPARATOR_ID,"","",""])
+      Result.extend(Rows)
+      DiffObjects+=1
+  return Differences,DiffObjects,Result
+
+#----------------------------------------------------------------------------------------------------------------------
+# Join comparisons of objects given by full object id (objects are renamed with short names of given schemas and joined
+# in object order, returns number of objects, differences, different objects and rows)
+#----------------------------------------------------------------------------------------------------------------------
+def GetComparisonFromObjects(Ctx,SchemaNames,ObjectComparisons,ObjectTypes,RawOutput):
+  ShortNames=(GetSchemaShortNames(SchemaNames) if len(SchemaNames)!=0 else {})
+  ShortTypes={}
+  ShortComparisons={}
+  for ObjectId,(ObjectDifferences,Rows) in ObjectComparisons.items():
+    ObjectName=GetShortObjectId(ObjectId,ShortNames)
+    for Row in Rows:
+      if Row[0]==ObjectId:
+        Row[0]=ObjectName
+    ShortTypes[ObjectName]={"type":ObjectTypes[ObjectId]}
+    ShortComparisons[ObjectName]=(ObjectDifferences,Rows)
+  ObjectNames=GetSortedObjectNames(ShortTypes,{})
+  Differences,DiffObjects,Rows=GetComparisonResult([ShortComparisons[ObjectName] for ObjectName in ObjectNames],(Ctx["options"]["sep"]==True and RawOutput==False))
+  return len(ObjectNames),Differences,DiffObjects,Rows
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get comparison result returned by every comparison mode
+#----------------------------------------------------------------------------------------------------------------------
+def NewComparisonResult(Compared,Differences,DiffObjects,Rows,RawOutput,SrcLabel,TgtLabel,Errors,Elapsed):
+  return {
+    "compared":Compared,
+    "differences":Differences,
+    "diffobjects":DiffObjects,
+    "rows":Rows,
+    "raw":RawOutput,
+    "srclabel":SrcLabel,
+    "tgtlabel":TgtLabel,
+    "errors":Errors,
+    "elapsed":Elapsed
+  }
+
+#----------------------------------------------------------------------------------------------------------------------
+# Compare schemas
+#----------------------------------------------------------------------------------------------------------------------
+def CompareSchemas(Ctx,SrcSchemaDef,TgtSchemaDef,SrcIsFolder,TgtIsFolder,SeparatorLine,RawOutput,ShortNames=None,DiffObjectIds=None):
+  
+  #Init comparison
+  FullObjectIds={}
+  ObjectComparisons={}
+
+  #Calculate short schema names
+  if ShortNames==None:
+    SelectedSchemas=list(set([ObjectId.split(":")[1].split(".")[0] for ObjectId in SrcSchemaDef]+[ObjectId.split(":")[1].split(".")[0] for ObjectId in TgtSchemaDef]))
+    ShortNames=(GetSchemaShortNames(SelectedSchemas) if len(SelectedSchemas)!=0 else {})
+  for SchemaDef in [SrcSchemaDef,TgtSchemaDef]:
+    for ObjectId in [ObjectId for ObjectId in SchemaDef]:
+      ObjectDef=SchemaDef[ObjectId]
+      ShortObjectId=GetShortObjectId(ObjectId,ShortNames)
+      del SchemaDef[ObjectId]
+      SchemaDef[ShortObjectId]=ObjectDef
+      if not ShortObjectId in FullObjectIds:
+        FullObjectIds[ShortObjectId]=ObjectId
+
+  #Get all different object names from both schemas
+  ObjectNames=GetSortedObjectNames(SrcSchemaDef,TgtSchemaDef)
+
+  #Find tables with equal columns in columnar form when there are many columns (objects on one side have no columns)
+  EqualColumns=set()
+  if sum([len(ObjectDef["columns"]) for SchemaDef in [SrcSchemaDef,TgtSchemaDef] for ObjectDef in SchemaDef.values() if "columns" in ObjectDef])>=COLUMNAR_MIN_COLUMNS:
+    EqualColumns=GetEqualColumnObjects(GetColumnarCatalog(SrcSchemaDef),GetColumnarCatalog(TgtSchemaDef))
+
+  #Loop through all object names
+  for i,ObjectName in enumerate(ObjectNames):
+    DisplayProgress(Ctx,"CMP",i+1,len(ObjectNames),ObjectName)
+    ObjectComparisons[ObjectName]=CompareObject(Ctx,ObjectName,SrcSchemaDef.get(ObjectName),TgtSchemaDef.get(ObjectName),SrcIsFolder,TgtIsFolder,FullObjectIds[ObjectName],RawOutput,(ObjectName in EqualColumns))
+    if DiffObjectIds!=None and len(ObjectComparisons[ObjectName][1])!=0:
+      DiffObjectIds.add(FullObjectIds[ObjectName])
+
+  #Join object comparisons (different objects are the ones with comparison rows)
+  Differences,DiffObjects,Result=GetComparisonResult([ObjectComparisons[ObjectName] for ObjectName in ObjectNames],(SeparatorLine==True and RawOutput==False))
+
+  #Calculate compared objects
+  ComparedObjects=len(ObjectNames)
+
+  #Clear progress
+  DisplayProgress(Ctx,"CLR",0,0,"")
+
+  #Return comparison result
+  return ComparedObjects,Differences,DiffObjects,Result
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get similarity features of table or view (column names and types of tables, word shingles of view bodies)
+#----------------------------------------------------------------------------------------------------------------------
+def GetObjectFeatures(Ctx,ObjectDef):
+  if ObjectDef["type"]==OBJECTID_TABLE:
+    return set([ColName.lower()+" "+Column["type"] for ColName,Column in ObjectDef["columns"].items()])
+  Words=re.findall(r"\w+",ApplySchemaNameReplacements(Ctx["replacements"],BodyStoreGet(Ctx["bodies"],ObjectDef["text"])).lower())
+  return set([" ".join(Words[i:i+SHINGLE_WORDS]) for i in range(max(1,len(Words)-SHINGLE_WORDS+1))])-set([""])
+
+#----------------------------------------------------------------------------------------------------------------------
+# Calculate minhash signature of feature set (minimum of every hash function over features)
+#----------------------------------------------------------------------------------------------------------------------
+def MinHashSignature(Features,Coefficients):
+  Values=[int.from_bytes(hashlib.blake2b(Feature.encode("utf-8"),digest_size=8).digest(),"little") for Feature in Features]
+  return tuple([min([(A*Value+B)%MINHASH_PRIME for Value in Values]) for A,B in Coefficients])
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get column differences of renamed table (columns added, removed or with different type)
+#----------------------------------------------------------------------------------------------------------------------
+def GetRenameColumnDiff(SrcObjectDef,TgtObjectDef):
+  if SrcObjectDef["type"]!=OBJECTID_TABLE:
+    return ""
+  SrcColumns={ColName.lower():Column["type"] for ColName,Column in SrcObjectDef["columns"].items()}
+  TgtColumns={ColName.lower():Column["type"] for ColName,Column in TgtObjectDef["columns"].items()}
+  Diff=[]
+  for ColName in sorted(set(SrcColumns)|set(TgtColumns)):
+    if ColName not in TgtColumns:
+      Diff.append("-"+ColName)
+    elif ColName not in SrcColumns:
+      Diff.append("+"+ColName)
+    elif SrcColumns[ColName]!=TgtColumns[ColName]:
+      Diff.append(ColName+":"+SrcColumns[ColName]+">"+TgtColumns[ColName])
+  return (", ".join(Diff) if len(Diff)!=0 else "(equal columns)")
+
+#----------------------------------------------------------------------------------------------------------------------
+# Detect tables and views renamed or moved between schemas (objects that exist only on one side)
+# (candidate pairs are objects of the same type sharing a band of their minhash signatures, candidates are scored with
+# jaccard similarity of their features and paired best first)
+#----------------------------------------------------------------------------------------------------------------------
+def DetectRenames(Ctx,SrcSchemaDef,TgtSchemaDef,Similarity):
+
+  #Get features of one sided tables and views with details
+  OneSided=[]
+  for From,SchemaDef,OtherDef in [("SRC",SrcSchemaDef,TgtSchemaDef),("TGT",TgtSchemaDef,SrcSchemaDef)]:
+    for ObjectName,ObjectDef in SchemaDef.items():
+      if ObjectName not in OtherDef and ObjectDef["type"] in [OBJECTID_TABLE,OBJECTID_VIEW] and "columns" in ObjectDef:
+        Features=GetObjectFeatures(Ctx,ObjectDef)
+        if len(Features)!=0:
+          OneSided.append((From,ObjectName,Features))
+
+  #Find candidate pairs sharing a band of signatures
+  Generator=random.Random(MINHASH_SEED)
+  Coefficients=[(Generator.randrange(1,MINHASH_PRIME),Generator.randrange(0,MINHASH_PRIME)) for i in range(MINHASH_PERMUTATIONS)]
+  Rows=MINHASH_PERMUTATIONS//MINHASH_BANDS
+  Buckets={}
+  Features={}
+  for From,ObjectName,ObjectFeatures in OneSided:
+    Features[(From,ObjectName)]=ObjectFeatures
+    Signature=MinHashSignature(ObjectFeatures,Coefficients)
+    ObjectType=(SrcSchemaDef if From=="SRC" else TgtSchemaDef)[ObjectName]["type"]
+    for Band in range(MINHASH_BANDS):
+      Buckets.setdefault((ObjectType,Band,Signature[Band*Rows:(Band+1)*Rows]),{"SRC":[],"TGT":[]})[From].append(ObjectName)
+  Candidates=set()
+  for Bucket in Buckets.values():
+    for SrcName in Bucket["SRC"]:
+      for TgtName in Bucket["TGT"]:
+        Candidates.add((SrcName,TgtName))
+
+  #Score candidates and pair best first (every object is paired once)
+  Scored=[]
+  for SrcName,TgtName in Candidates:
+    SrcFeatures=Features[("SRC",SrcName)]
+    TgtFeatures=Features[("TGT",TgtName)]
+    Score=len(SrcFeatures&TgtFeatures)/len(SrcFeatures|TgtFeatures)
+    if Score>=Similarity:
+      Scored.append((-Score,SrcName,TgtName))
+  Scored.sort()
+  Paired=set()
+  Renames=[]
+  for Score,SrcName,TgtName in Scored:
+    if ("SRC",SrcName) in Paired or ("TGT",TgtName) in Paired:
+      continue
+    Paired.update([("SRC",SrcName),("TGT",TgtName)])
+    Renames.append({"source":SrcName,"target":TgtName,"similarity":-Score,"columns":GetRenameColumnDiff(SrcSchemaDef[SrcName],TgtSchemaDef[TgtName])})
+
+  #Return renames
+  return Renames
+
+#----------------------------------------------------------------------------------------------------------------------
+# Create body store (view and function bodies compressed by content hash, in memory or in folder shared between runs)
+#----------------------------------------------------------------------------------------------------------------------
+def NewBodyStore(Folder=""):
+  return {"folder":Folder,"blobs":{},"lock":threading.Lock()}
+
+#----------------------------------------------------------------------------------------------------------------------
+# Add body to store and get reference kept in definition instead of text (hash and length)
+# (short bodies and bodies without store are kept inline, blobs in folder are written once by hash)
+#----------------------------------------------------------------------------------------------------------------------
+def BodyStoreAdd(Store,Text):
+  if Store==None or len(Text)<BODY_STORE_MIN_LENGTH:
+    return Text
+  Data=Text.encode("utf-8")
+  Hash=hashlib.sha256(Data).hexdigest()
+  Reference={"hash":Hash,"length":len(Text)}
+  if len(Store["folder"])==0:
+    with Store["lock"]:
+      if Hash not in Store["blobs"]:
+        Store["blobs"][Hash]=zlib.compress(Data)
+    return Reference
+  BlobFile=os.path.join(Store["folder"],Hash[:2],Hash+".z")
+  if os.path.exists(BlobFile)==False:
+    os.makedirs(os.path.dirname(BlobFile),exist_ok=True)
+    TempFile=BlobFile+"."+str(threading.get_ident())+".tmp"
+    with open(TempFile,"wb") as File:
+      File.write(zlib.compress(Data))
+    os.replace(TempFile,BlobFile)
+  return Reference
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get body text from definition (inline text or reference loaded from store)
+# (missing blobs are returned as a marker text so that they show as differences)
+#----------------------------------------------------------------------------------------------------------------------
+def BodyStoreGet(Store,Text):
+  if isinstance(Text,str):
+    return Text
+  Hash=Text["hash"]
+  try:
+    if Store!=None and len(Store["folder"])==0:
+      Data=Store["blobs"][Hash]
+    elif Store!=None:
+      with open(os.path.join(Store["folder"],Hash[:2],Hash+".z"),"rb") as File:
+        Data=File.read()
+    else:
+      return f"(body {Hash} not available without body store)"
+    return zlib.decompress(Data).decode("utf-8")
+  except Exception as Ex:
+    return f"(body {Hash} not found in body store: {str(Ex)})"
+
+#----------------------------------------------------------------------------------------------------------------------
+# Create spill of object definitions (definitions are written to disk as runs sorted in comparison order)
+#----------------------------------------------------------------------------------------------------------------------
+def NewSpill(Folder,Name,RunObjects=None):
+  return {"folder":Folder,"name":Name,"runobjects":(RunObjects if RunObjects!=None else EXTERNAL_RUN_OBJECTS),"buffer":[],"runs":[],"files":0,"sequence":0,"schemas":set(),"objects":0}
+
+#----------------------------------------------------------------------------------------------------------------------
+# Add object definition to spill (sort key is object type order and full object id, that sorts the same way as the
+# short object ids, sequence keeps the last definition when an object is added twice)
+#----------------------------------------------------------------------------------------------------------------------
+def SpillAdd(Spill,ObjectId,ObjectDef):
+  Spill["buffer"].append([str(OBJECTID_CONF[ObjectDef["type"]]["order"])+":"+ObjectId,Spill["sequence"],ObjectId,ObjectDef])
+  Spill["sequence"]+=1
+  Spill["objects"]+=1
+  Spill["schemas"].add(ObjectId.split(":")[1].split(".")[0])
+  if len(Spill["buffer"])>=Spill["runobjects"]:
+    SpillFlush(Spill)
+
+#----------------------------------------------------------------------------------------------------------------------
+# Write buffered object definitions of spill as sorted run file
+#----------------------------------------------------------------------------------------------------------------------
+def SpillFlush(Spill):
+  if len(Spill["buffer"])==0:
+    return
+  Spill["buffer"].sort(key=lambda Item:(Item[0],Item[1]))
+  Spill["runs"].append(WriteSpillRun(Spill,Spill["buffer"]))
+  Spill["buffer"]=[]
+
+#----------------------------------------------------------------------------------------------------------------------
+# Write sorted items as new run file of spill
+#----------------------------------------------------------------------------------------------------------------------
+def WriteSpillRun(Spill,Items):
+  RunFile=os.path.join(Spill["folder"],Spill["name"]+"-"+str(Spill["files"])+".jsonl")
+  Spill["files"]+=1
+  with open(RunFile,"w") as File:
+    for Item in Items:
+      File.write(json.dumps(Item)+"\n")
+  return RunFile
+
+#----------------------------------------------------------------------------------------------------------------------
+# Read run file of spill (binary read with small buffer, so memory of a merge depends little on the number of runs)
+#----------------------------------------------------------------------------------------------------------------------
+def ReadSpillRun(RunFile):
+  with open(RunFile,"rb",buffering=EXTERNAL_READ_BUFFER) as File:
+    for Line in File:
+      yield json.loads(Line)
+
+#----------------------------------------------------------------------------------------------------------------------
+# Merge runs of spill in passes until they can be merged at once (every open run keeps a read buffer and a definition,
+# so the number of runs merged together is bounded to keep memory independent of catalog size)
+# (last pass merges only the runs needed to leave exactly the maximum, so the final merge of any catalog with more runs
+# than the maximum opens the same number of runs)
+#----------------------------------------------------------------------------------------------------------------------
+def SpillMergeRuns(Spill):
+  while len(Spill["runs"])>EXTERNAL_MERGE_RUNS:
+    Count=min(EXTERNAL_MERGE_RUNS,len(Spill["runs"])-EXTERNAL_MERGE_RUNS+1)
+    Runs=Spill["runs"][:Count]
+    RunFile=WriteSpillRun(Spill,heapq.merge(*[ReadSpillRun(RunFile) for RunFile in Runs],key=lambda Item:(Item[0],Item[1])))
+    for OldFile in Runs:
+      os.remove(OldFile)
+    Spill["runs"]=Spill["runs"][Count:]+[RunFile]
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get object ids and definitions of spill in comparison order (merge of all sorted runs)
+#----------------------------------------------------------------------------------------------------------------------
+def SpillObjects(Spill):
+  SpillFlush(Spill)
+  SpillMergeRuns(Spill)
+  Pending=None
+  for Item in heapq.merge(*[ReadSpillRun(RunFile) for RunFile in Spill["runs"]],key=lambda Item:(Item[0],Item[1])):
+    if Pending!=None and Pending[2]!=Item[2]:
+      yield Pending[2],Pending[3]
+    Pending=Item
+  if Pending!=None:
+    yield Pending[2],Pending[3]
+
+#----------------------------------------------------------------------------------------------------------------------
+# Compare spilled schemas as a merge join of both sorted streams (only one object per side is kept in memory)
+#----------------------------------------------------------------------------------------------------------------------
+def CompareSpilledSchemas(Ctx,SrcSpill,TgtSpill,SrcIsFolder,TgtIsFolder,SeparatorLine,RawOutput):
+  
+  #Calculate short schema names
+  SchemaNames=sorted(SrcSpill["schemas"]|TgtSpill["schemas"])
+  ShortNames=(GetSchemaShortNames(SchemaNames) if len(SchemaNames)!=0 else {})
+  FailedKeys=GetFailedObjectKeys(Ctx)
+  Compared=0
+
+  #Get object comparisons walking both streams in comparison order
+  def ObjectComparisons():
+    nonlocal Compared
+    SrcObjects=SpillObjects(SrcSpill)
+    TgtObjects=SpillObjects(TgtSpill)
+    Src=next(SrcObjects,None)
+    Tgt=next(TgtObjects,None)
+    while Src!=None or Tgt!=None:
+      SrcKey=(str(OBJECTID_CONF[Src[1]["type"]]["order"])+":"+Src[0] if Src!=None else None)
+      TgtKey=(str(OBJECTID_CONF[Tgt[1]["type"]]["order"])+":"+Tgt[0] if Tgt!=None else None)
+      if TgtKey==None or (SrcKey!=None and SrcKey<TgtKey):
+        ObjectId,SrcObjectDef,TgtObjectDef=Src[0],Src[1],None
+        Src=next(SrcObjects,None)
+      elif SrcKey==None or TgtKey<SrcKey:
+        ObjectId,SrcObjectDef,TgtObjectDef=Tgt[0],None,Tgt[1]
+        Tgt=next(TgtObjects,None)
+      else:
+        ObjectId,SrcObjectDef,TgtObjectDef=Src[0],Src[1],Tgt[1]
+        Src=next(SrcObjects,None)
+        Tgt=next(TgtObjects,None)
+      if IsObjectIdFailed(ObjectId,FailedKeys)==True:
+        continue
+      Compared+=1
+      ObjectName=GetShortObjectId(ObjectId,ShortNames)
+      DisplayProgress(Ctx,"CMP",Compared,SrcSpill["objects"]+TgtSpill["objects"],ObjectName)
+      yield CompareObject(Ctx,ObjectName,SrcObjectDef,TgtObjectDef,SrcIsFolder,TgtIsFolder,ObjectId,RawOutput)
+
+  #Join object comparisons
+  Differences,DiffObjects,Result=GetComparisonResult(ObjectComparisons(),(SeparatorLine==True and RawOutput==False))
+  DisplayProgress(Ctx,"CLR",0,0,"")
+  return Compared,Differences,DiffObjects,Result
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get last column that fits in maximun width and resulting table width
+#----------------------------------------------------------------------------------------------------------------------
+def GetFittingColumns(Lengths,MaxWidth):
+  TableWidth=1
+  for i,Len in enumerate(Lengths):
+    if TableWidth+Len+1>MaxWidth:
+      return i-1,TableWidth,True
+    TableWidth+=Len+1
+  return len(Lengths)-1,TableWidth,False
+
+#----------------------------------------------------------------------------------------------------------------------
+# Calculate table layout (column widths, last column to print and table width)
+# (when table does not fit, resizeable columns are limited to the same maximun width, calculated directly from the
+# space left by the other columns, and never below heading length)
+#----------------------------------------------------------------------------------------------------------------------
+def GetTableLayout(Heading,ColAttributes,Rows,MaxWidth):
+
+  #Calculate data column widths
+  Lengths=[max(len(Heading[i]),max(map(len,map(str,Fields)))) for i,Fields in enumerate(zip(*Rows))]
+
+  #Calculate max column to print according to data length and maximun width
+  MaxColumn,TableWidth,Truncated=GetFittingColumns(Lengths,MaxWidth)
+  Resizeable=[i for i in range(len(Lengths)) if ColAttributes[i].find("W")!=-1 and Lengths[i]>len(Heading[i])]
+  if Truncated==False or len(Resizeable)==0:
+    return Lengths,max(MaxColumn,0),TableWidth
+
+  #Find largest width for resizeable columns that fits (binary search over widths, width sum grows with limit)
+  Available=MaxWidth-1-sum([Lengths[i]+1 for i in range(len(Lengths)) if i not in Resizeable])-len(Resizeable)
+  Low=0
+  High=max([Lengths[i] for i in Resizeable])
+  while Low<High:
+    Limit=(Low+High+1)//2
+    if sum([max(len(Heading[i]),min(Lengths[i],Limit)) for i in Resizeable])<=Available:
+      Low=Limit
+    else:
+      High=Limit-1
+  for i in Resizeable:
+    Lengths[i]=max(len(Heading[i]),min(Lengths[i],Low))
+
+  #Calculate max column to print with resized columns
+  MaxColumn,TableWidth,Truncated=GetFittingColumns(Lengths,MaxWidth)
+  return Lengths,max(MaxColumn,0),TableWidth
+
+#----------------------------------------------------------------------------------------------------------------------
+# Word wrap text to width (words longer than width are split)
+#----------------------------------------------------------------------------------------------------------------------
+def WrapText(Text,Width):
+  if len(Text)<=Width:
+    return [Text]
+  if Width<=0:
+    return [""]
+  Lines=[]
+  while len(Text)>Width:
+    Cut=Text.rfind(" ",0,Width+1)
+    if Cut<=0:
+      Lines.append(Text[:Width])
+      Text=Text[Width:]
+    else:
+      Lines.append(Text[:Cut])
+      Text=Text[Cut+1:]
+  if len(Text)!=0:
+    Lines.append(Text)
+  return Lines
+
+#----------------------------------------------------------------------------------------------------------------------
+# PrintTable
+# (long fields of resizeable columns are wrapped on several lines, the rest are truncated, and output is written at once)
+#----------------------------------------------------------------------------------------------------------------------
+def PrintTable(Heading,ColAttributes,Rows,MaxWidth):
+
+  #Write all lines
+  Lines,WarnMessage=FormatTable(Heading,ColAttributes,Rows,MaxWidth)
+  sys.stdout.write("\n".join(Lines)+"\n")
+  sys.stdout.flush()
+
+  #Warning
+  if(len(WarnMessage)!=0):
+    print(WarnMessage)    
+
+#----------------------------------------------------------------------------------------------------------------------
+# Format table lines (returns lines and column count warning)
+#----------------------------------------------------------------------------------------------------------------------
+def FormatTable(Heading,ColAttributes,Rows,MaxWidth):
+
+  #Calculate layout
+  Lengths,MaxColumn,TableWidth=GetTableLayout(Heading,ColAttributes,Rows,MaxWidth)
+  Columns=range(MaxColumn+1)
+  Wrapped=[i for i in Columns if ColAttributes[i].find("W")!=-1]
+  Aligns=[(">" if ColAttributes[i].find("R")!=-1 else ("^" if ColAttributes[i].find("C")!=-1 else "<")) for i in Columns]
+  RowFormat="|"+"|".join(["{!s:"+Aligns[i]+str(Lengths[i])+"."+str(Lengths[i])+"}" for i in Columns])+"|"
+
+  #Separator line
+  Separator="-"*TableWidth
+  Lines=[]
+
+  #Column headings
+  Lines.append(Separator)
+  Lines.append("|"+"|".join([Heading[i].center(Lengths[i]) for i in Columns])+"|")
+  Lines.append(Separator)
+
+  #Data (rows are formatted in one step unless some field has to be wrapped)
+  DotLine="|"+"|".join(["·"*Lengths[i] for i in Columns])+"|"
+  for Row in Rows:
+    if Row[0]==SEPARATOR_ID:
+      Lines.append(DotLine)
+    elif len([i for i in Wrapped if len(str(Row[i]))>Lengths[i]])==0:
+      Lines.append(RowFormat.format(*Row))
+    else:
+      Cells=[(WrapText(str(Row[i]),Lengths[i]) if i in Wrapped else [Row[i]]) for i in Columns]
+      for j in range(max([len(Cell) for Cell in Cells])):
+        Lines.append(RowFormat.format(*[(Cell[j] if j<len(Cell) else "") for Cell in Cells]))
+  Lines.append(Separator)
+
+  #Column count warning
+  if(MaxColumn<len(Lengths)-1):
+    WarnMessage="Displaying {0} columns out of {1} columns due to console width".format(str(MaxColumn+1),str(len(Lengths)))
+  else:
+    WarnMessage=""
+
+  #Return lines
+  return Lines,WarnMessage
+
+#----------------------------------------------------------------------------------------------------------------------
+# Print raw output
+#----------------------------------------------------------------------------------------------------------------------
+def PrintRawOutput(Comparison):
+  PrevObjectName=""
+  for Item in Comparison:
+    ObjectName=Item[0]
+    DifferenceList=Item[1]
+    if ObjectName!=PrevObjectName:
+      print("\n--- Object: "+ObjectName+" ---")
+    for Diff in DifferenceList:
+      print(Diff)
+    PrevObjectName=ObjectName
+  if len(Comparison)!=0:
+    print("")
+
+#----------------------------------------------------------------------------------------------------------------------
+# Open snapshot store (SQLite database file, created if it does not exist)
+#----------------------------------------------------------------------------------------------------------------------
+def OpenSnapshotStore(FilePath):
+  
+  #Open database and create tables and indexes
+  try:
+    Db=sqlite3.connect(FilePath)
+    Db.executescript("""
+      create table if not exists snapshots(
+        snapshot_id  integer primary key autoincrement,
+        label        text not null,
+        kind         text not null,
+        schemas      text not null,
+        filter       text not null,
+        created      text not null,
+        object_count integer not null
+      );
+      create table if not exists definitions(
+        hash       text primary key,
+        definition text not null
+      );
+      create table if not exists snapshot_objects(
+        snapshot_id integer not null,
+        object_id   text not null,
+        object_type text not null,
+        schema_name text not null,
+        object_name text not null,
+        hash        text not null,
+        primary key(snapshot_id,object_id)
+      );
+      create index if not exists ix_snapshots_label on snapshots(label,created);
+      create index if not exists ix_snapshot_objects_name on snapshot_objects(snapshot_id,schema_name,object_type,object_name);
+      create index if not exists ix_snapshot_objects_object on snapshot_objects(schema_name,object_type,object_name,snapshot_id);
+    """)
+  except Exception as Ex:
+    Message=f"Exception opening snapshot store ({FilePath}): {str(Ex)}"
+    return False,Message,None
+
+  #Return database
+  return True,"",Db
+
+#----------------------------------------------------------------------------------------------------------------------
+# Calculate definition hash
+#----------------------------------------------------------------------------------------------------------------------
+def DefinitionHash(ObjectDef):
+  return hashlib.sha256(json.dumps(ObjectDef,sort_keys=True).encode("utf-8")).hexdigest()
+
+#----------------------------------------------------------------------------------------------------------------------
+# Save schema definition as timestamped snapshot (definitions are de-duplicated by content hash)
+#----------------------------------------------------------------------------------------------------------------------
+def SaveSnapshot(Db,Label,Kind,Schemas,PatternFilter,SchemaDef):
+  Created=datetime.now().isoformat(timespec="seconds")
+  try:
+    with Db:
+      Cursor=Db.execute("insert into snapshots(label,kind,schemas,filter,created,object_count) values(?,?,?,?,?,?)",(Label,Kind,Schemas,PatternFilter,Created,len(SchemaDef)))
+      SnapshotId=Cursor.lastrowid
+      Definitions=[]
+      Objects=[]
+      for ObjectId in SchemaDef:
+        ObjectDef=SchemaDef[ObjectId]
+        Hash=DefinitionHash(ObjectDef)
+        ObjectType=ObjectId.split(":")[0]
+        SchemaName=ObjectId.split(":")[1].split(".")[0]
+        ObjectName=ObjectId.split(":")[1].split(".")[1]
+        Definitions.append((Hash,json.dumps(ObjectDef,sort_keys=True)))
+        Objects.append((SnapshotId,ObjectId,ObjectType,SchemaName,ObjectName,Hash))
+      Db.executemany("insert or ignore into definitions(hash,definition) values(?,?)",Definitions)
+      Db.executemany("insert into snapshot_objects(snapshot_id,object_id,object_type,schema_name,object_name,hash) values(?,?,?,?,?,?)",Objects)
+  except Exception as Ex:
+    Message=f"Exception saving snapshot ({Label}): {str(Ex)}"
+    return False,Message,None
+  return True,"",SnapshotId
+
+#----------------------------------------------------------------------------------------------------------------------
+# Find snapshot by reference (<label>, <label>~<datetime> or #<id>)
+#----------------------------------------------------------------------------------------------------------------------
+def FindSnapshot(Db,Reference):
+  
+  #Find snapshot by id or by label and time (latest snapshot taken at or before given time)
+  Columns="snapshot_id,label,kind,schemas,filter,created,object_count"
+  if Reference.startswith(SNAPSHOT_ID_PREFIX):
+    Row=Db.execute(f"select {Columns} from snapshots where snapshot_id=?",(Reference[len(SNAPSHOT_ID_PREFIX):],)).fetchone()
+  else:
+    if Reference.find(SNAPSHOT_TIME_SEPARATOR)!=-1:
+      Label=Reference[:Reference.rfind(SNAPSHOT_TIME_SEPARATOR)]
+      AsOf=Reference[Reference.rfind(SNAPSHOT_TIME_SEPARATOR)+1:]
+      AsOf=(AsOf+"T23:59:59" if len(AsOf)==10 else AsOf.replace(" ","T"))
+    else:
+      Label=Reference
+      AsOf="9999-12-31T23:59:59"
+    Row=Db.execute(f"select {Columns} from snapshots where label=? and created<=? order by created desc,snapshot_id desc limit 1",(Label,AsOf)).fetchone()
+  if Row==None:
+    return False,f"Snapshot {Reference} not found in snapshot store",None
+  
+  #Return snapshot attributes
+  Snapshot={"id":Row[0],"label":Row[1],"kind":Row[2],"schemas":Row[3],"filter":Row[4],"created":Row[5],"objects":Row[6]}
+  return True,"",Snapshot
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get schema names of objects stored in snapshot
+#----------------------------------------------------------------------------------------------------------------------
+def GetSnapshotSchemas(Db,SnapshotId):
+  return [Row[0] for Row in Db.execute("select distinct schema_name from snapshot_objects where snapshot_id=? order by schema_name",(SnapshotId,))]
+
+#----------------------------------------------------------------------------------------------------------------------
+# Load schema definition from snapshot
+#----------------------------------------------------------------------------------------------------------------------
+def LoadSnapshot(Db,SnapshotId,PatternFilter):
+  SchemaDef={}
+  Query="select o.object_id,d.definition from snapshot_objects o join definitions d on d.hash=o.hash where o.snapshot_id=? and o.object_name glob ? order by o.object_id"
+  for Row in Db.execute(Query,(SnapshotId,PatternFilter)):
+    SchemaDef[Row[0]]=json.loads(Row[1])
+  return SchemaDef
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get drift between two snapshots
+# (objects are matched with indexed lookups on short names and only definitions of objects that are different are loaded)
+#----------------------------------------------------------------------------------------------------------------------
+def GetSnapshotDrift(Db,SrcSnapshotId,TgtSnapshotId,PatternFilter):
+
+  #Calculate short schema names from schemas stored in both snapshots
+  SchemaNames=[Row[0] for Row in Db.execute("select distinct schema_name from snapshot_objects where snapshot_id in (?,?)",(SrcSnapshotId,TgtSnapshotId))]
+  ShortNames=(GetSchemaShortNames(SchemaNames) if len(SchemaNames)!=0 else {})
+  Db.execute("create temp table if not exists schema_map(snapshot_id integer,schema_name text,short_name text,primary key(snapshot_id,schema_name))")
+  Db.execute("delete from schema_map")
+  Db.executemany("insert into schema_map(snapshot_id,schema_name,short_name) values(?,?,?)",[(Id,Name,ShortNames[Name]) for Id in [SrcSnapshotId,TgtSnapshotId] for Name in ShortNames])
+
+  #Objects of one snapshot keyed by type, short schema name and object name
+  Side="""
+    select o.object_id,o.object_type,m.short_name,o.object_name,o.hash
+    from snapshot_objects o join schema_map m on m.snapshot_id=o.snapshot_id and m.schema_name=o.schema_name
+    where o.snapshot_id=? and o.object_name glob ?
+  """
+
+  #Objects that are different, only in source or only in target
+  Query=f"""
+    with src as ({Side}),tgt as ({Side})
+    select src.object_id,tgt.object_id,src.hash,tgt.hash from src left join tgt on tgt.object_type=src.object_type and tgt.short_name=src.short_name and tgt.object_name=src.object_name
+    union all
+    select null,tgt.object_id,null,tgt.hash from tgt left join src on src.object_type=tgt.object_type and src.short_name=tgt.short_name and src.object_name=tgt.object_name
+    where src.object_id is null
+  """
+  SrcIds=[]
+  TgtIds=[]
+  TotalObjects=0
+  for Row in Db.execute(Query,(SrcSnapshotId,PatternFilter,TgtSnapshotId,PatternFilter)):
+    TotalObjects+=1
+    if Row[2]==Row[3]:
+      continue
+    if Row[0]!=None:
+      SrcIds.append(Row[0])
+    if Row[1]!=None:
+      TgtIds.append(Row[1])
+  
+  #Load definitions of different objects only
+  SrcSchemaDef=LoadSnapshotObjects(Db,SrcSnapshotId,SrcIds)
+  TgtSchemaDef=LoadSnapshotObjects(Db,TgtSnapshotId,TgtIds)
+  
+  #Return result
+  return SrcSchemaDef,TgtSchemaDef,ShortNames,TotalObjects
+
+#----------------------------------------------------------------------------------------------------------------------
+# Load selected object definitions from snapshot
+#----------------------------------------------------------------------------------------------------------------------
+def LoadSnapshotObjects(Db,SnapshotId,ObjectIds):
+  SchemaDef={}
+  Query="select o.object_id,d.definition from snapshot_objects o join definitions d on d.hash=o.hash where o.snapshot_id=? and o.object_id=?"
+  for ObjectId in ObjectIds:
+    for Row in Db.execute(Query,(SnapshotId,ObjectId)):
+      SchemaDef[Row[0]]=json.loads(Row[1])
+  return SchemaDef
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get list of snapshots in store
+#----------------------------------------------------------------------------------------------------------------------
+def GetSnapshotList(Db,PatternFilter):
+  Rows=[]
+  Query="select snapshot_id,label,kind,schemas,filter,created,object_count from snapshots where label glob ? order by label,created"
+  for Row in Db.execute(Query,(PatternFilter,)):
+    Rows.append([SNAPSHOT_ID_PREFIX+str(Row[0]),Row[1],Row[2],Row[3],Row[4],Row[5],str(Row[6])])
+  return Rows
+
+#----------------------------------------------------------------------------------------------------------------------
+# Load configuration file (defaults are used for missing entries or when file does not exist)
+#----------------------------------------------------------------------------------------------------------------------
+def LoadConfig(FilePath=DBSC_CONFIG_FILE):
+  Config={}
+  if os.path.exists(FilePath)==True:
+    Status,Config,Message=JsonFileParser(FilePath)
+    if Status==False:
+      return False,Message,None
+  for Item in CONFIG_DEFAULTS:
+    if Item not in Config:
+      Config[Item]=CONFIG_DEFAULTS[Item]
+  return True,"",Config
+
+#----------------------------------------------------------------------------------------------------------------------
+# Create run context (configuration, run options, progress indicator state and profiling data)
+#----------------------------------------------------------------------------------------------------------------------
+def NewContext(Config=None,Options=None):
+  Ctx={}
+  Ctx["config"]=dict(CONFIG_DEFAULTS)
+  if Config!=None:
+    Ctx["config"].update(Config)
+  Ctx["options"]=dict(RUN_OPTIONS)
+  Ctx["options"]["progress"]=False
+  if Options!=None:
+    Ctx["options"].update(Options)
+  Ctx["progress"]={"enabled":Ctx["options"]["progress"],"last":"","count":0}
+  Ctx["profile"]=None
+  Ctx["replacements"]=CompileSchemaNameReplacements(Ctx["config"]["schema_name_replacements"])
+  Ctx["journal"]=None
+  Ctx["errors"]=[]
+  Ctx["latencies"]=None
+  Ctx["cursors"]=[]
+  Ctx["bodies"]=(NewBodyStore(Ctx["options"]["bodyfolder"]) if Ctx["options"]["bodystore"]==True else None)
+  Status,Message,Ctx["shard"]=ParseShard(Ctx["options"]["shard"])
+  return Ctx
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get source from argument (snapshot reference, project folder or schema names / schema group)
+#----------------------------------------------------------------------------------------------------------------------
+def GetSource(Ctx,Argument):
+  Source={"argument":Argument,"kind":"","schemas":"","folder":"","snapshot":"","label":Argument}
+  if Argument.startswith(SNAPSHOT_PREFIX):
+    Source["kind"]="snapshot"
+    Source["snapshot"]=Argument[len(SNAPSHOT_PREFIX):]
+  elif os.path.exists(Argument):
+    Source["kind"]="folder"
+    Source["folder"]=Argument
+  else:
+    Source["kind"]="schemas"
+    Source["schemas"]=(Ctx["config"]["schema_groups"][Argument] if Argument in Ctx["config"]["schema_groups"] else Argument)
+    Source["label"]=Source["schemas"]
+  return Source
+
+#----------------------------------------------------------------------------------------------------------------------
+# Read schema definitions of source and target (target is None in dump mode)
+# (complete definitions of objects that exist only on one side are read only when Complete is set, i.e. in watch mode)
+#----------------------------------------------------------------------------------------------------------------------
+def ReadSchemaDefinitions(Ctx,Source,Target,Cursor=None,Fetcher=None,Complete=False):
+  
+  #Init definitions
+  PatternFilter=Ctx["options"]["filter"]
+  StoreFile=Ctx["options"]["store"]
+  Sides=[("SRC",Source)]+([("TGT",Target)] if Target!=None else [])
+  Definitions={"src":{},"tgt":{},"srcfolder":False,"tgtfolder":False,"srclabel":Source["label"],"tgtlabel":(Target["label"] if Target!=None else ""),"shortnames":None,"compared":None,"equal":set(),"srcfiles":None,"tgtfiles":None,"selection":None}
+  
+  #Check sources
+  if Target!=None and Source["kind"]=="folder" and Target["kind"]=="folder":
+    return False,"Source and target cannot be both folders",None
+  if len(StoreFile)==0 and len([Side for Side in Sides if Side[1]["kind"]=="snapshot"])!=0:
+    return False,"Must provide snapshot store file (--store:<file>) when using snapshots",None
+
+  #Start connection and object listing of databricks metastore on background while the rest is read
+  Metastore=[(From,Side) for From,Side in Sides if Side["kind"]=="schemas"]
+  Planned=(Fetcher==None and Target!=None and len(StoreFile)==0 and Complete==False)
+  if len(Metastore)!=0 and Fetcher==None:
+    Pending=StartConnection(Ctx,Cursor,([(From,Side["schemas"]) for From,Side in Metastore] if Planned==True else []),PatternFilter)
+
+  #Open snapshot store and find snapshots (schemas stored in snapshot are used as selection for project folders)
+  Selection={"SRC":Source["schemas"],"TGT":(Target["schemas"] if Target!=None else "")}
+  Snapshots={}
+  if len(StoreFile)!=0:
+    Status,Message,SnapshotDb=OpenSnapshotStore(StoreFile)
+    if Status==False:
+      return False,Message,None
+    for From,Side in Sides:
+      if Side["kind"]=="snapshot":
+        Status,Message,Snapshots[From]=FindSnapshot(SnapshotDb,Side["snapshot"])
+        if Status==False:
+          return False,Message,None
+        Definitions[From.lower()+"label"]=SNAPSHOT_PREFIX+Snapshots[From]["label"]+SNAPSHOT_TIME_SEPARATOR+Snapshots[From]["created"]
+        Selection[From]=Snapshots[From]["schemas"]
+        if len(Selection[From])==0:
+          Selection[From]=SCHEMA_ARG_SEPARATOR.join(GetSnapshotSchemas(SnapshotDb,Snapshots[From]["id"]))
+
+  #Get definitions from project folders
+  for From,Side in Sides:
+    if Side["kind"]=="folder":
+      Definitions[From.lower()+"folder"]=True
+      Definitions[From.lower()+"files"]={}
+      Status,Message,Definitions[From.lower()]=GetSchemaFromProject(Ctx,From,Side["folder"],Selection["TGT" if From=="SRC" else "SRC"],PatternFilter,Definitions[From.lower()+"files"])
+      if Status==False:
+        return False,Message+"\nError occured when retrieving definitions from folder "+Side["folder"],None
+
+  #Get definitions from databricks metastore (fetcher can be replaced, i.e. by daemon mode cache)
+  #(when comparing, detail queries are only done for objects on both sides unless complete definitions are needed)
+  if len(Metastore)!=0:
+    if Fetcher==None:
+      Status,Message,Cursor=WaitConnection(Ctx,Pending)
+      if Status==False:
+        return False,Message,None
+      Fetcher=lambda Ctx,From,SchemaNames,PatternFilter:GetSchemaFromMetastore(Ctx,From,Cursor,SchemaNames,PatternFilter)
+    if Planned==True:
+      Status,Message=GetPlannedSchemaDefinitions(Ctx,Cursor,Sides,Definitions,PatternFilter,Pending["lists"])
+      if Status==False:
+        return False,Message,None
+    else:
+      for From,Side in Metastore:
+        Status,Message,Definitions[From.lower()]=Fetcher(Ctx,From,Side["schemas"],PatternFilter)
+        if Status==False:
+          return False,Message+"\nError occured when retrieving definition of schema "+Side["schemas"],None
+
+  #Save snapshots of definitions read from metastore or project folders
+  if len(StoreFile)!=0:
+    for From,Side in Sides:
+      if Side["kind"]!="snapshot":
+        Kind=("project" if Side["kind"]=="folder" else "metastore")
+        Schemas=(Side["schemas"] if Side["kind"]=="schemas" else Selection["TGT" if From=="SRC" else "SRC"])
+        Status,Message,SnapshotId=SaveSnapshot(SnapshotDb,Side["argument"],Kind,Schemas,PatternFilter,Definitions[From.lower()])
+        if Status==False:
+          return False,Message,None
+
+  #Get definitions from snapshots (when comparing two snapshots only different objects are loaded, except for shards)
+  if len(Snapshots)==2 and Ctx["shard"]==None:
+    Definitions["src"],Definitions["tgt"],Definitions["shortnames"],Definitions["compared"]=GetSnapshotDrift(SnapshotDb,Snapshots["SRC"]["id"],Snapshots["TGT"]["id"],PatternFilter)
+  else:
+    for From in Snapshots:
+      SchemaDef=LoadSnapshot(SnapshotDb,Snapshots[From]["id"],PatternFilter)
+      Definitions[From.lower()]={ObjectId:SchemaDef[ObjectId] for ObjectId in SchemaDef if IsObjectIdInShard(Ctx,ObjectId)==True}
+  for From in Snapshots:
+    Definitions[From.lower()+"folder"]=(Snapshots[From]["kind"]=="project")
+  Definitions["selection"]=Selection
+
+  #Leave out object types not compared (i.e. definitions from snapshots or daemon cache)
+  if len(Ctx["options"]["types"])!=len(OBJECTID_CONF):
+    for From,Side in Sides:
+      Definitions[From.lower()]={ObjectId:ObjectDef for ObjectId,ObjectDef in Definitions[From.lower()].items() if ObjectId.split(":")[0] in Ctx["options"]["types"]}
+
+  #Leave out objects that could not be read on both sides
+  FailedKeys=GetFailedObjectKeys(Ctx)
+  if len(FailedKeys)!=0:
+    for From,Side in Sides:
+      Definitions[From.lower()]={ObjectId:ObjectDef for ObjectId,ObjectDef in Definitions[From.lower()].items() if IsObjectIdFailed(ObjectId,FailedKeys)==False}
+
+  #Return definitions
+  return True,"",Definitions
+
+#----------------------------------------------------------------------------------------------------------------------
+# Compare schema definitions
+#----------------------------------------------------------------------------------------------------------------------
+def CompareSchemaDefinitions(Ctx,Definitions,DiffObjectIds=None):
+  CompareStart=ProfileBegin()
+  ComparedObjects,Differences,DiffObjects,Comparison=CompareSchemas(Ctx,Definitions["src"],Definitions["tgt"],Definitions["srcfolder"],Definitions["tgtfolder"],Ctx["options"]["sep"],Ctx["options"]["raw"],Definitions["shortnames"],DiffObjectIds)
+  if Definitions["compared"]!=None:
+    ComparedObjects=Definitions["compared"]
+  ComparedObjects+=len(Definitions["equal"])
+  Renames=(DetectRenames(Ctx,Definitions["src"],Definitions["tgt"],Ctx["options"]["similarity"]) if Ctx["options"]["renames"]==True else None)
+  ProfileEnd(Ctx,"compare",CompareStart)
+  Result=NewComparisonResult(ComparedObjects,Differences,DiffObjects,Comparison,Ctx["options"]["raw"],Definitions["srclabel"],Definitions["tgtlabel"],Ctx["errors"],0.0)
+  if Renames!=None:
+    Result["renames"]=Renames
+  return Result
+
+#----------------------------------------------------------------------------------------------------------------------
+# Compare source and target (schema names, schema groups, project folders or snapshot references)
+#----------------------------------------------------------------------------------------------------------------------
+def Compare(Ctx,Source,Target,Cursor=None,Fetcher=None):
+  if Ctx["options"]["catalog"]==True:
+    return CompareCatalog(Ctx,Source,Target,Cursor)
+  if Ctx["options"]["external"]==True:
+    return CompareExternal(Ctx,Source,Target,Cursor)
+  if Ctx["options"]["pipeline"]==True:
+    return ComparePipelined(Ctx,Source,Target,Cursor)
+  if len(Ctx["options"]["sample"])!=0:
+    return CompareSample(Ctx,Source,Target,Cursor)
+  Start=timer()
+  Status,Message,Definitions=ReadSchemaDefinitions(Ctx,GetSource(Ctx,Source),GetSource(Ctx,Target),Cursor,Fetcher)
+  if Status==False:
+    return False,Message,None
+  Result=CompareSchemaDefinitions(Ctx,Definitions)
+  Result["elapsed"]=timer()-Start
+  return True,"",Result
+
+#----------------------------------------------------------------------------------------------------------------------
+# Compare source and target with bounded memory (schema names, schema groups or project folders)
+# (definitions of each side are spilled to disk as sorted runs and compared as a merge join of both streams)
+#----------------------------------------------------------------------------------------------------------------------
+def CompareExternal(Ctx,Source,Target,Cursor=None):
+
+  #Check sources
+  Start=timer()
+  PatternFilter=Ctx["options"]["filter"]
+  Sides=[("SRC",GetSource(Ctx,Source)),("TGT",GetSource(Ctx,Target))]
+  if len([Side for From,Side in Sides if Side["kind"]=="snapshot"])!=0 or len(Ctx["options"]["store"])!=0:
+    return False,"Snapshots cannot be used in external comparison",None
+  if Sides[0][1]["kind"]=="folder" and Sides[1][1]["kind"]=="folder":
+    return False,"Source and target cannot be both folders",None
+
+  #Spill folder
+  try:
+    SpillFolder=tempfile.mkdtemp(prefix="dbsc-",dir=(Ctx["options"]["externalfolder"] if len(Ctx["options"]["externalfolder"])!=0 else None))
+  except Exception as Ex:
+    return False,f"Unable to create spill folder: {str(Ex)}",None
+  try:
+
+    #Spill definitions of both sides (connection is opened on background while project folder is read)
+    Spills={"SRC":NewSpill(SpillFolder,"src"),"TGT":NewSpill(SpillFolder,"tgt")}
+    Pending=StartConnection(Ctx,Cursor,[],PatternFilter)
+    for From,Side in Sides:
+      if Side["kind"]=="folder":
+        Status,Message=SpillSchemaFromProject(Ctx,From,Side["folder"],Sides[1 if From=="SRC" else 0][1]["schemas"],PatternFilter,Spills[From])
+        if Status==False:
+          return False,Message+"\nError occured when retrieving definitions from folder "+Side["folder"],None
+      else:
+        Status,Message,Cursor=WaitConnection(Ctx,Pending)
+        if Status==False:
+          return False,Message,None
+        Status,Message,SchemaDef=GetSchemaFromMetastore(Ctx,From,Cursor,Side["schemas"],PatternFilter,Spills[From])
+        if Status==False:
+          return False,Message+"\nError occured when retrieving definition of schema "+Side["schemas"],None
+
+    #Compare sorted streams
+    CompareStart=ProfileBegin()
+    ComparedObjects,Differences,DiffObjects,Comparison=CompareSpilledSchemas(Ctx,Spills["SRC"],Spills["TGT"],Sides[0][1]["kind"]=="folder",Sides[1][1]["kind"]=="folder",Ctx["options"]["sep"],Ctx["options"]["raw"])
+    ProfileEnd(Ctx,"compare",CompareStart)
+
+  #Remove spill folder
+  finally:
+    shutil.rmtree(SpillFolder,ignore_errors=True)
+
+  #Return result
+  return True,"",NewComparisonResult(ComparedObjects,Differences,DiffObjects,Comparison,Ctx["options"]["raw"],Sides[0][1]["label"],Sides[1][1]["label"],Ctx["errors"],timer()-Start)
+
+#----------------------------------------------------------------------------------------------------------------------
+# Compare source and target as definitions are fetched (schema names, schema groups or project folders)
+# (detail queries of both sides run on background in object order and feed a bounded queue, objects are compared as
+# soon as both definitions are available, so comparison overlaps fetching and metastore definitions are kept only until
+# the other side arrives, project folder sides are read whole before fetching starts)
+# (when comparison fails the fetch is stopped and the queue is drained, so the background thread always ends)
+#----------------------------------------------------------------------------------------------------------------------
+def ComparePipelined(Ctx,Source,Target,Cursor=None):
+
+  #Check sources
+  Start=timer()
+  PatternFilter=Ctx["options"]["filter"]
+  RawOutput=Ctx["options"]["raw"]
+  Sides=[("SRC",GetSource(Ctx,Source)),("TGT",GetSource(Ctx,Target))]
+  if len([Side for From,Side in Sides if Side["kind"]=="snapshot"])!=0 or len(Ctx["options"]["store"])!=0:
+    return False,"Snapshots cannot be used in pipelined comparison",None
+  if Sides[0][1]["kind"]=="folder" and Sides[1][1]["kind"]=="folder":
+    return False,"Source and target cannot be both folders",None
+  IsFolder={From:(Side["kind"]=="folder") for From,Side in Sides}
+
+  #Start connection and object listing of databricks metastore on background while project folder is read
+  Metastore=[(From,Side) for From,Side in Sides if Side["kind"]=="schemas"]
+  Pending=StartConnection(Ctx,Cursor,[(From,Side["schemas"]) for From,Side in Metastore],PatternFilter)
+
+  #Match definitions by object id (objects are compared as soon as the other side arrives)
+  Unpaired={"SRC":{},"TGT":{}}
+  ObjectComparisons={}
+  ObjectTypes={}
+  def CompareMatched(ObjectId,SrcObjectDef,TgtObjectDef):
+    CompareStart=ProfileBegin()
+    ObjectComparisons[ObjectId]=CompareObject(Ctx,ObjectId,SrcObjectDef,TgtObjectDef,IsFolder["SRC"],IsFolder["TGT"],ObjectId,RawOutput)
+    ObjectTypes[ObjectId]=(SrcObjectDef if SrcObjectDef!=None else TgtObjectDef)["type"]
+    ProfileEnd(Ctx,"compare",CompareStart)
+  def Match(From,ObjectId,ObjectDef):
+    Other=("TGT" if From=="SRC" else "SRC")
+    if ObjectId in Unpaired[Other]:
+      OtherDef=Unpaired[Other].pop(ObjectId)
+      CompareMatched(ObjectId,(ObjectDef if From=="SRC" else OtherDef),(OtherDef if From=="SRC" else ObjectDef))
+    else:
+      Unpaired[From][ObjectId]=ObjectDef
+
+  #Get definitions from project folders
+  Keys={}
+  for From,Side in Sides:
+    if Side["kind"]=="folder":
+      Status,Message,SchemaDef=GetSchemaFromProject(Ctx,From,Side["folder"],Sides[1 if From=="SRC" else 0][1]["schemas"],PatternFilter)
+      if Status==False:
+        return False,Message+"\nError occured when retrieving definitions from folder "+Side["folder"],None
+      Keys[From]=set([GetObjectKey(OBJECTID_CONF[ObjectId.split(":")[0]]["kind"],ObjectId.split(":")[1].split(".")[0],ObjectId.split(":")[1].split(".")[1]) for ObjectId in SchemaDef])
+      for ObjectId,ObjectDef in SchemaDef.items():
+        Match(From,ObjectId,ObjectDef)
+
+  #Wait for object lists of metastore sides
+  Status,Message,Cursor=WaitConnection(Ctx,Pending)
+  if Status==False:
+    return False,Message,None
+  ObjectLists=Pending["lists"]
+  for From in ObjectLists:
+    Keys[From]=set([GetObjectKey(Object["kind"],SchemaNameReplacements(Ctx,Object["schema"]),Object["object"]) for Object in ObjectLists[From]])
+
+  #Interleave objects on both sides in key order (detail queries only for objects on both sides)
+  BothSides=[]
+  OneSided={}
+  for From in ObjectLists:
+    OtherKeys=Keys["TGT" if From=="SRC" else "SRC"]
+    OneSided[From]=[]
+    for Object in ObjectLists[From]:
+      Key=GetObjectKey(Object["kind"],SchemaNameReplacements(Ctx,Object["schema"]),Object["object"])
+      if Key in OtherKeys:
+        BothSides.append((Key,From,dict(Object,side=From)))
+      else:
+        OneSided[From].append(Object)
+  BothSides.sort(key=lambda x:(x[0],x[1]))
+
+  #Fetch definitions on background (definitions are put in bounded queue, end of fetch is signaled with none, fetch is
+  #stopped on next definition when stop is set)
+  Fetched=queue.Queue(maxsize=Ctx["options"]["queuesize"])
+  Produced={"status":True,"message":""}
+  Stop=threading.Event()
+  def Put(From,ObjectId,ObjectDef):
+    if Stop.is_set()==True:
+      raise Exception("comparison stopped")
+    Fetched.put((From,ObjectId,ObjectDef))
+  def Produce():
+    try:
+      Status,Message,SchemaDef=FetchObjectDefinitions(Ctx,None,Cursor,[Object for Key,From,Object in BothSides],Sink=Put)
+      for From in OneSided:
+        if Status==True:
+          Status,Message,SchemaDef=GetOneSidedObjects(Ctx,Cursor,OneSided[From])
+          for ObjectId,ObjectDef in SchemaDef.items():
+            Put(From,ObjectId,ObjectDef)
+      Produced["status"],Produced["message"]=Status,Message
+    except Exception as Ex:
+      Produced["status"],Produced["message"]=False,"Unable to fetch definitions: "+str(Ex)
+    finally:
+      Fetched.put(None)
+  Producer=threading.Thread(target=Produce,daemon=True)
+  Producer.start()
+
+  #Compare pairs as they are fetched (when comparison fails, fetch is stopped and queue drained until its end)
+  Finished=False
+  try:
+    while True:
+      Item=Fetched.get()
+      if Item==None:
+        Finished=True
+        break
+      Match(*Item)
+  finally:
+    if Finished==False:
+      Stop.set()
+      while Fetched.get()!=None:
+        pass
+    Producer.join()
+  if Produced["status"]==False:
+    return False,Produced["message"],None
+
+  #Compare objects on one side only (objects that could not be read on the other side are left out)
+  FailedKeys=GetFailedObjectKeys(Ctx)
+  for From in Unpaired:
+    for ObjectId,ObjectDef in Unpaired[From].items():
+      if IsObjectIdFailed(ObjectId,FailedKeys)==False:
+        CompareMatched(ObjectId,(ObjectDef if From=="SRC" else None),(ObjectDef if From=="TGT" else None))
+
+  #Rename objects with short schema names and join object comparisons
+  CompareStart=ProfileBegin()
+  SchemaNames=sorted(set([ObjectId.split(":")[1].split(".")[0] for ObjectId in ObjectComparisons]))
+  ComparedObjects,Differences,DiffObjects,Comparison=GetComparisonFromObjects(Ctx,SchemaNames,ObjectComparisons,ObjectTypes,RawOutput)
+  ProfileEnd(Ctx,"compare",CompareStart)
+  DisplayProgress(Ctx,"CLR",0,0,"")
+
+  #Return result
+  return True,"",NewComparisonResult(ComparedObjects,Differences,DiffObjects,Comparison,RawOutput,Sides[0][1]["label"],Sides[1][1]["label"],Ctx["errors"],timer()-Start)
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get key that matches objects between source and target from object id
+#----------------------------------------------------------------------------------------------------------------------
+def GetObjectIdKey(ObjectId):
+  SchemaName,ObjectName=ObjectId.split(":")[1].split(".")
+  return GetObjectKey(OBJECTID_CONF[ObjectId.split(":")[0]]["kind"],SchemaName,ObjectName)
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get sampling stratum of objects on both sides (schema after replacements and object type)
+# (tables are told from views with view list of schema, functions are a single stratum since their type is only known
+# with a query by function)
+#----------------------------------------------------------------------------------------------------------------------
+def GetSampleStrata(Ctx,Cursor,ObjectLists,Definitions):
+  Strata={}
+  for From in ["SRC","TGT"]:
+
+    #Objects in project folders
+    if From not in ObjectLists:
+      for ObjectId in Definitions[From.lower()]:
+        ObjectType=ObjectId.split(":")[0]
+        Stratum=(ObjectId.split(":")[1].split(".")[0],(ObjectType if OBJECTID_CONF[ObjectType]["kind"]=="TBVW" else "func"))
+        Strata.setdefault(GetObjectIdKey(ObjectId),Stratum)
+      continue
+
+    #Get views of schemas (unless object type is known from listing)
+    Views={}
+    for SchemaName in sorted(set([Object["schema"] for Object in ObjectLists[From] if Object["kind"]=="TBVW" and "type" not in Object])):
+      Query=VIEW_LIST_QUERY.replace("<schemaname>",SchemaName)
+      Status,Message,Rows=ExecuteQuery(Ctx,Cursor,"VIEW_LIST_QUERY",Query)
+      if Status==False:
+        return False,Message,{}
+      Views[SchemaName]=set([Row["viewName"].lower() for Row in Rows if Row["isTemporary"]==False])
+
+    #Objects in metastore
+    for Object in ObjectLists[From]:
+      SchemaName=SchemaNameReplacements(Ctx,Object["schema"])
+      if Object["kind"]=="TBVW":
+        ObjectType=Object.get("type",(OBJECTID_VIEW if Object["object"].lower() in Views.get(Object["schema"],set()) else OBJECTID_TABLE))
+      else:
+        ObjectType="func"
+      Strata.setdefault(GetObjectKey(Object["kind"],SchemaName,Object["object"]),(SchemaName,ObjectType))
+
+  #Return strata
+  return True,"",Strata
+
+#----------------------------------------------------------------------------------------------------------------------
+# Pick stratified random sample of object keys (sample size is split among strata in proportion to their size)
+# (every stratum is sampled with its own generator seeded by seed and stratum, so the same seed gives the same sample
+# of a stratum even when other strata change)
+#----------------------------------------------------------------------------------------------------------------------
+def SampleObjectKeys(Strata,Size,Seed):
+  Groups={}
+  for Key,Stratum in Strata.items():
+    Groups.setdefault(Stratum,[]).append(Key)
+  if Size[0]=="pct":
+    Counts={Stratum:math.ceil(len(Groups[Stratum])*Size[1]/100) for Stratum in Groups}
+  else:
+    Counts=AllocateSample(Groups,min(Size[1],len(Strata)))
+  Sampled=set()
+  for Stratum in sorted(Groups):
+    Keys=sorted(Groups[Stratum])
+    Sampled.update(random.Random(str(Seed)+":"+Stratum[0]+":"+Stratum[1]).sample(Keys,min(Counts[Stratum],len(Keys))))
+  return Sampled
+
+#----------------------------------------------------------------------------------------------------------------------
+# Split sample size among strata in proportion to their size with largest remainder rounding (counts add up exactly to
+# sample size, so strata smaller than their share may get no sampled object when sample size is below strata count)
+#----------------------------------------------------------------------------------------------------------------------
+def AllocateSample(Groups,Count):
+  Total=sum([len(Keys) for Keys in Groups.values()])
+  if Total==0:
+    return {Stratum:0 for Stratum in Groups}
+  Quotas={Stratum:Count*len(Keys)/Total for Stratum,Keys in Groups.items()}
+  Counts={Stratum:math.floor(Quota) for Stratum,Quota in Quotas.items()}
+  Remainder=Count-sum(Counts.values())
+  for Stratum in sorted(Groups,key=lambda Stratum:(Counts[Stratum]-Quotas[Stratum],Stratum))[:Remainder]:
+    Counts[Stratum]+=1
+  return Counts
+
+#----------------------------------------------------------------------------------------------------------------------
+# Estimate drift rate from stratified sample with confidence interval
+# (strata are given as objects, sampled objects and different objects, interval is wilson score interval on effective
+# sample size of stratified estimate with finite population correction)
+#----------------------------------------------------------------------------------------------------------------------
+def GetDriftEstimate(Strata):
+  Strata=[(Objects,Sampled,Different) for Objects,Sampled,Different in Strata if Sampled!=0]
+  Population=sum([Objects for Objects,Sampled,Different in Strata])
+  if Population==0:
+    return None,None,None
+  Drift=sum([Objects*Different/Sampled for Objects,Sampled,Different in Strata])/Population
+  if len([1 for Objects,Sampled,Different in Strata if Sampled<Objects])==0:
+    return Drift,Drift,Drift
+  Variance=sum([(Objects/Population)**2*(1-Sampled/Objects)*(Different/Sampled)*(1-Different/Sampled)/(Sampled-1) for Objects,Sampled,Different in Strata if Sampled>1])
+  Size=(Drift*(1-Drift)/Variance if Variance>0 else sum([Sampled for Objects,Sampled,Different in Strata]))
+  Z2=SAMPLE_CONFIDENCE_Z**2
+  Center=(Drift+Z2/(2*Size))/(1+Z2/Size)
+  Half=SAMPLE_CONFIDENCE_Z*math.sqrt(Drift*(1-Drift)/Size+Z2/(4*Size*Size))/(1+Z2/Size)
+  return Drift,max(0.0,Center-Half),min(1.0,Center+Half)
+
+#----------------------------------------------------------------------------------------------------------------------
+# Compare random sample of source and target objects and estimate drift by schema (schema names, schema groups or
+# project folders)
+# (objects are listed on both sides, only sampled ones are fetched and compared)
+#----------------------------------------------------------------------------------------------------------------------
+def CompareSample(Ctx,Source,Target,Cursor=None):
+
+  #Check sources
+  Start=timer()
+  PatternFilter=Ctx["options"]["filter"]
+  Status,Message,Size=ParseSample(Ctx["options"]["sample"])
+  if Status==False:
+    return False,Message,None
+  Sides=[("SRC",GetSource(Ctx,Source)),("TGT",GetSource(Ctx,Target))]
+  if len([Side for From,Side in Sides if Side["kind"]=="snapshot"])!=0 or len(Ctx["options"]["store"])!=0:
+    return False,"Snapshots cannot be used in sampled comparison",None
+  if Sides[0][1]["kind"]=="folder" and Sides[1][1]["kind"]=="folder":
+    return False,"Source and target cannot be both folders",None
+  Definitions={"src":{},"tgt":{},"srcfolder":False,"tgtfolder":False,"srclabel":Sides[0][1]["label"],"tgtlabel":Sides[1][1]["label"],"shortnames":None,"compared":None,"equal":set()}
+
+  #Start connection and object listing of databricks metastore on background while project folder is read
+  Metastore=[(From,Side) for From,Side in Sides if Side["kind"]=="schemas"]
+  Pending=StartConnection(Ctx,Cursor,[(From,Side["schemas"]) for From,Side in Metastore],PatternFilter)
+  for From,Side in Sides:
+    if Side["kind"]=="folder":
+      Definitions[From.lower()+"folder"]=True
+      Status,Message,Definitions[From.lower()]=GetSchemaFromProject(Ctx,From,Side["folder"],Sides[1 if From=="SRC" else 0][1]["schemas"],PatternFilter)
+      if Status==False:
+        return False,Message+"\nError occured when retrieving definitions from folder "+Side["folder"],None
+  Status,Message,Cursor=WaitConnection(Ctx,Pending)
+  if Status==False:
+    return False,Message,None
+
+  #Pick sample and keep only sampled objects
+  Status,Message,Strata=GetSampleStrata(Ctx,Cursor,Pending["lists"],Definitions)
+  if Status==False:
+    return False,Message,None
+  Sampled=SampleObjectKeys(Strata,Size,Ctx["options"]["seed"])
+  ObjectLists={From:[Object for Object in ObjectList if GetObjectKey(Object["kind"],SchemaNameReplacements(Ctx,Object["schema"]),Object["object"]) in Sampled] for From,ObjectList in Pending["lists"].items()}
+  for From,Side in Sides:
+    if Side["kind"]=="folder":
+      Definitions[From.lower()]={ObjectId:ObjectDef for ObjectId,ObjectDef in Definitions[From.lower()].items() if GetObjectIdKey(ObjectId) in Sampled}
+
+  #Get definitions of sampled objects (objects that could not be read are left out on both sides)
+  Status,Message=GetPlannedSchemaDefinitions(Ctx,Cursor,Sides,Definitions,PatternFilter,ObjectLists)
+  if Status==False:
+    return False,Message,None
+  FailedKeys=GetFailedObjectKeys(Ctx)
+  if len(FailedKeys)!=0:
+    for From,Side in Sides:
+      Definitions[From.lower()]={ObjectId:ObjectDef for ObjectId,ObjectDef in Definitions[From.lower()].items() if IsObjectIdFailed(ObjectId,FailedKeys)==False}
+
+  #Compare sampled objects
+  DiffObjectIds=set()
+  Result=CompareSchemaDefinitions(Ctx,Definitions,DiffObjectIds)
+  DiffKeys=set([GetObjectIdKey(ObjectId) for ObjectId in DiffObjectIds])
+
+  #Count objects, sampled objects and different objects by stratum
+  Counts={}
+  for Key,Stratum in Strata.items():
+    Count=Counts.setdefault(Stratum,[0,0,0])
+    Count[0]+=1
+    if Key in Sampled and Key not in FailedKeys:
+      Count[1]+=1
+      Count[2]+=(1 if Key in DiffKeys else 0)
+
+  #Estimate drift by schema and overall (schemas are named with short names as in comparison)
+  Estimates=[]
+  SchemaNames=sorted(set([Stratum[0] for Stratum in Counts]))
+  ShortNames=(GetSchemaShortNames(SchemaNames) if len(SchemaNames)!=0 else {})
+  for SchemaName in SchemaNames+[None]:
+    SchemaCounts=[Count for Stratum,Count in Counts.items() if SchemaName==None or Stratum[0]==SchemaName]
+    Drift,Low,High=GetDriftEstimate(SchemaCounts)
+    Estimates.append({
+      "schema":((ShortNames[SchemaName] if len(ShortNames[SchemaName])!=0 else SchemaName) if SchemaName!=None else None),
+      "objects":sum([Count[0] for Count in SchemaCounts]),
+      "sampled":sum([Count[1] for Count in SchemaCounts]),
+      "different":sum([Count[2] for Count in SchemaCounts]),
+      "drift":Drift,
+      "low":Low,
+      "high":High
+    })
+
+  #Return result
+  Result["sample"]={"size":Ctx["options"]["sample"],"seed":Ctx["options"]["seed"],"schemas":Estimates[:-1],"total":Estimates[-1]}
+  Result["elapsed"]=timer()-Start
+  return True,"",Result
+
+#----------------------------------------------------------------------------------------------------------------------
+# Pair source and target schemas of catalog (schemas matching source and target patterns are paired by name after
+# replacements, schemas without pair have None on the other side)
+#----------------------------------------------------------------------------------------------------------------------
+def GetCatalogSchemaPairs(Ctx,Cursor,SrcPattern,TgtPattern):
+  Status,Message,Rows=ExecuteQuery(Ctx,Cursor,"SCHEMA_LIST_QUERY",SCHEMA_LIST_QUERY)
+  if Status==False:
+    return False,Message,{}
+  Schemas={"SRC":{},"TGT":{}}
+  for Row in Rows:
+    SchemaName=Row[0]
+    for From,Pattern in [("SRC",SrcPattern),("TGT",TgtPattern)]:
+      if fnmatch(SchemaName,Pattern)==False:
+        continue
+      PairName=SchemaNameReplacements(Ctx,SchemaName)
+      if PairName in Schemas[From]:
+        return False,f"Schemas {Schemas[From][PairName]} and {SchemaName} of {'source' if From=='SRC' else 'target'} have the same name after replacements ({PairName})",{}
+      Schemas[From][PairName]=SchemaName
+  Pairs={PairName:(Schemas["SRC"].get(PairName),Schemas["TGT"].get(PairName)) for PairName in sorted(set(Schemas["SRC"])|set(Schemas["TGT"]))}
+  return True,"",Pairs
+
+#----------------------------------------------------------------------------------------------------------------------
+# Compare all schemas of catalog (source and target are schema name patterns, schemas are paired by name after
+# replacements)
+# (schemas are listed with a single query, objects of all paired schemas are listed and fetched from shared queues)
+#----------------------------------------------------------------------------------------------------------------------
+def CompareCatalog(Ctx,Source,Target,Cursor=None):
+
+  #Connect and pair schemas
+  Start=timer()
+  Pending=StartConnection(Ctx,Cursor,[],Ctx["options"]["filter"])
+  Status,Message,Cursor=WaitConnection(Ctx,Pending)
+  if Status==False:
+    return False,Message,None
+  Status,Message,Pairs=GetCatalogSchemaPairs(Ctx,Cursor,Source,Target)
+  if Status==False:
+    return False,Message,None
+  Paired=[PairName for PairName in Pairs if Pairs[PairName][0]!=None and Pairs[PairName][1]!=None]
+  if len(Paired)==0:
+    return False,f"No schemas could be paired between source ({Source}) and target ({Target})",None
+
+  #Read and compare definitions of paired schemas
+  Sides=[]
+  for i,Pattern in enumerate([Source,Target]):
+    Sides.append({"argument":Pattern,"kind":"schemas","schemas":SCHEMA_ARG_SEPARATOR.join([Pairs[PairName][i] for PairName in Paired]),"folder":"","snapshot":"","label":Pattern})
+  Status,Message,Definitions=ReadSchemaDefinitions(Ctx,Sides[0],Sides[1],Cursor)
+  if Status==False:
+    return False,Message,None
+
+  #Count objects by schema before comparison renames them to short names (objects with equal fingerprints are counted
+  #on both sides)
+  Counts={PairName:[0,0,set()] for PairName in Pairs}
+  for i,From in enumerate(["src","tgt"]):
+    for ObjectId in Definitions[From]:
+      Counts.setdefault(ObjectId.split(":")[1].split(".")[0],[0,0,set()])[i]+=1
+    for Key in Definitions["equal"]:
+      Counts.setdefault(Key.split(":")[1].split(".")[0],[0,0,set()])[i]+=1
+
+  #Compare and count different objects by schema
+  DiffObjectIds=set()
+  Result=CompareSchemaDefinitions(Ctx,Definitions,DiffObjectIds)
+  for ObjectId in DiffObjectIds:
+    Counts.setdefault(ObjectId.split(":")[1].split(".")[0],[0,0,set()])[2].add(GetObjectIdKey(ObjectId))
+
+  #Return result
+  Schemas=[]
+  for PairName in Pairs:
+    Schemas.append({"schema":PairName,"source":Pairs[PairName][0],"target":Pairs[PairName][1],"srcobjects":Counts[PairName][0],"tgtobjects":Counts[PairName][1],"different":len(Counts[PairName][2])})
+  Result["catalog"]={
+    "schemas":Schemas,
+    "srcunpaired":len([PairName for PairName in Pairs if Pairs[PairName][1]==None]),
+    "tgtunpaired":len([PairName for PairName in Pairs if Pairs[PairName][0]==None])
+  }
+  Result["elapsed"]=timer()-Start
+  return True,"",Result
+
+#----------------------------------------------------------------------------------------------------------------------
+# Compare shard of source and target and get partial result
+# (objects are named by full object id, short names are calculated when partial results are merged)
+#----------------------------------------------------------------------------------------------------------------------
+def CompareShard(Ctx,Source,Target,Cursor=None,Fetcher=None):
+  Start=timer()
+  if Ctx["shard"]==None:
+    return False,"Shard must be specified (i.e. --shard:1/4)",None
+  if Ctx["options"]["fingerprints"]==True:
+    return False,"Fingerprints cannot be used in sharded comparison (objects left out have no type to merge them)",None
+  Status,Message,Definitions=ReadSchemaDefinitions(Ctx,GetSource(Ctx,Source),GetSource(Ctx,Target),Cursor,Fetcher)
+  if Status==False:
+    return False,Message,None
+  CompareStart=ProfileBegin()
+  SrcSchemaDef=Definitions["src"]
+  TgtSchemaDef=Definitions["tgt"]
+  SchemaNames=sorted(set([ObjectId.split(":")[1].split(".")[0] for SchemaDef in [SrcSchemaDef,TgtSchemaDef] for ObjectId in SchemaDef]))
+  Objects={}
+  for ObjectName in GetSortedObjectNames(SrcSchemaDef,TgtSchemaDef):
+    SrcObjectDef=SrcSchemaDef.get(ObjectName)
+    TgtObjectDef=TgtSchemaDef.get(ObjectName)
+    Differences,Rows=CompareObject(Ctx,ObjectName,SrcObjectDef,TgtObjectDef,Definitions["srcfolder"],Definitions["tgtfolder"],ObjectName,Ctx["options"]["raw"])
+    Objects[ObjectName]={"type":(SrcObjectDef if SrcObjectDef!=None else TgtObjectDef)["type"],"differences":Differences,"rows":Rows}
+  ProfileEnd(Ctx,"compare",CompareStart)
+  Partial={
+    "shard":Ctx["shard"][0],
+    "shards":Ctx["shard"][1],
+    "source":Source,
+    "target":Target,
+    "filter":Ctx["options"]["filter"],
+    "raw":Ctx["options"]["raw"],
+    "srclabel":Definitions["srclabel"],
+    "tgtlabel":Definitions["tgtlabel"],
+    "schemas":SchemaNames,
+    "objects":Objects,
+    "errors":Ctx["errors"],
+    "elapsed":timer()-Start
+  }
+  return True,"",Partial
+
+#----------------------------------------------------------------------------------------------------------------------
+# Merge partial results of all shards into comparison result (same result as comparison without shards)
+#----------------------------------------------------------------------------------------------------------------------
+def MergePartials(Ctx,Partials):
+
+  #Check partial results belong to the same run and all shards are present
+  if len(Partials)==0:
+    return False,"No partial results to merge",None
+  First=Partials[0]
+  for Partial in Partials:
+    for Key in ["shards","source","target","filter","raw"]:
+      if Partial[Key]!=First[Key]:
+        return False,f"Partial results do not belong to the same run (different {Key}: {Partial[Key]} and {First[Key]})",None
+  Shards=sorted([Partial["shard"] for Partial in Partials])
+  if Shards!=list(range(1,First["shards"]+1)):
+    Missing=[str(Shard) for Shard in range(1,First["shards"]+1) if Shard not in Shards]
+    Repeated=sorted(set([str(Shard) for Shard in Shards if Shards.count(Shard)>1]))
+    return False,"Partial results must contain every shard once"+(" (missing shards: "+",".join(Missing)+")" if len(Missing)!=0 else "")+(" (repeated shards: "+",".join(Repeated)+")" if len(Repeated)!=0 else ""),None
+
+  #Rename objects with short schema names of all shards and join object comparisons
+  SchemaNames=sorted(set([SchemaName for Partial in Partials for SchemaName in Partial["schemas"]]))
+  ObjectComparisons={ObjectId:(Object["differences"],Object["rows"]) for Partial in Partials for ObjectId,Object in Partial["objects"].items()}
+  ObjectTypes={ObjectId:Object["type"] for Partial in Partials for ObjectId,Object in Partial["objects"].items()}
+  ComparedObjects,Differences,DiffObjects,Rows=GetComparisonFromObjects(Ctx,SchemaNames,ObjectComparisons,ObjectTypes,First["raw"])
+  Errors=[Error for Partial in Partials for Error in Partial["errors"]]
+  return True,"",NewComparisonResult(ComparedObjects,Differences,DiffObjects,Rows,First["raw"],First["srclabel"],First["tgtlabel"],Errors,max([Partial["elapsed"] for Partial in Partials]))
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get schema definition of source (schema names, schema group, project folder or snapshot reference)
+#----------------------------------------------------------------------------------------------------------------------
+def Dump(Ctx,Source,Cursor=None,Fetcher=None):
+  Ctx["options"]["dump"]=True
+  Status,Message,Definitions=ReadSchemaDefinitions(Ctx,GetSource(Ctx,Source),None,Cursor,Fetcher)
+  if Status==False:
+    return False,Message,None
+  return True,"",Definitions["src"]
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get files changed in repository folder since they were read (new or modified files and deleted files)
+#----------------------------------------------------------------------------------------------------------------------
+def GetChangedProjectFiles(ProjFolder,FileObjects):
+  Files=GetProjectFiles(ProjFolder)
+  Changed=[]
+  for File in Files:
+    try:
+      MTime=os.stat(File).st_mtime
+    except OSError:
+      continue
+    if File not in FileObjects or FileObjects[File]["mtime"]!=MTime:
+      Changed.append((File,MTime))
+  Existing=set(Files)
+  Deleted=[File for File in FileObjects if File not in Existing]
+  return Files,Changed,Deleted
+
+#----------------------------------------------------------------------------------------------------------------------
+# Watch project folder and compare again objects defined in files that change
+# (metastore or snapshot side is read only once, only changed files are parsed and only affected objects compared)
+#----------------------------------------------------------------------------------------------------------------------
+def Watch(Ctx,Source,Target,MaxWidth,Cursor=None,Fetcher=None,Interval=WATCH_INTERVAL):
+
+  #Read definitions of both sides
+  Start=timer()
+  SrcSource=GetSource(Ctx,Source)
+  TgtSource=GetSource(Ctx,Target)
+  Status,Message,Definitions=ReadSchemaDefinitions(Ctx,SrcSource,TgtSource,Cursor,Fetcher,Complete=True)
+  if Status==False:
+    return False,Message
+  if Definitions["srcfiles"]==None and Definitions["tgtfiles"]==None:
+    return False,"Watch mode requires a project folder as source or target"
+  From=("src" if Definitions["srcfiles"]!=None else "tgt")
+  ProjFolder=(SrcSource["folder"] if From=="src" else TgtSource["folder"])
+  if IsProjectArchive(ProjFolder)==True:
+    return False,"Watch mode cannot be used with project archives"
+  FileObjects=Definitions[From+"files"]
+  SelectedSchemas=GetSelectedSchemas(Ctx,Definitions["selection"]["TGT" if From=="src" else "SRC"])
+  PatternFilter=Ctx["options"]["filter"]
+  RawOutput=Ctx["options"]["raw"]
+  SeparatorLine=(Ctx["options"]["sep"]==True and RawOutput==False)
+
+  #Comparison state (object definitions by full object id and object comparisons by short object id)
+  Full={"src":Definitions["src"],"tgt":Definitions["tgt"]}
+  ShortIds={"src":{},"tgt":{}}
+  ObjectComparisons={}
+  ShortNames={}
+
+  #Compare affected objects again (all objects when short schema names change)
+  def UpdateComparison(ObjectIds):
+    nonlocal ShortNames
+    SchemaNames=list(set([ObjectId.split(":")[1].split(".")[0] for Side in Full for ObjectId in Full[Side]]))
+    NewShortNames=(GetSchemaShortNames(SchemaNames) if len(SchemaNames)!=0 else {})
+    if NewShortNames!=ShortNames:
+      ShortNames=NewShortNames
+      ShortIds["src"]={}
+      ShortIds["tgt"]={}
+      ObjectComparisons.clear()
+      ObjectIds=[(Side,ObjectId) for Side in Full for ObjectId in Full[Side]]
+    Affected=set()
+    for Side,ObjectId in ObjectIds:
+      ShortObjectId=GetShortObjectId(ObjectId,ShortNames) if ObjectId.split(":")[1].split(".")[0] in ShortNames else None
+      if ShortObjectId==None:
+        continue
+      if ObjectId in Full[Side]:
+        ShortIds[Side][ShortObjectId]=ObjectId
+      elif ShortIds[Side].get(ShortObjectId)==ObjectId:
+        del ShortIds[Side][ShortObjectId]
+      Affected.add(ShortObjectId)
+    for ObjectName in Affected:
+      SrcObjectId=ShortIds["src"].get(ObjectName)
+      TgtObjectId=ShortIds["tgt"].get(ObjectName)
+      if SrcObjectId==None and TgtObjectId==None:
+        ObjectComparisons.pop(ObjectName,None)
+        continue
+      SrcObjectDef=(Full["src"][SrcObjectId] if SrcObjectId!=None else None)
+      TgtObjectDef=(Full["tgt"][TgtObjectId] if TgtObjectId!=None else None)
+      ObjectComparisons[ObjectName]=CompareObject(Ctx,ObjectName,SrcObjectDef,TgtObjectDef,Definitions["srcfolder"],Definitions["tgtfolder"],(SrcObjectId if SrcObjectId!=None else TgtObjectId),RawOutput)
+    ObjectNames=GetSortedObjectNames({Name:Full["src"][ShortIds["src"][Name]] for Name in ShortIds["src"]},{Name:Full["tgt"][ShortIds["tgt"][Name]] for Name in ShortIds["tgt"]})
+    Differences,DiffObjects,Rows=GetComparisonResult([ObjectComparisons[ObjectName] for ObjectName in ObjectNames],SeparatorLine)
+    return len(Affected),NewComparisonResult(len(ObjectNames),Differences,DiffObjects,Rows,RawOutput,Definitions["srclabel"],Definitions["tgtlabel"],Ctx["errors"],0.0)
+
+  #Initial comparison
+  Compared,Result=UpdateComparison([(Side,ObjectId) for Side in Full for ObjectId in Full[Side]])
+  Result["elapsed"]=timer()-Start
+  PrintComparison(Ctx,Result,MaxWidth)
+  print(f"Watching {ProjFolder} for changes (Ctrl+C to stop)")
+  Ctx["progress"]["enabled"]=False
+
+  #Poll project folder for changed files
+  try:
+    while True:
+      time.sleep(Interval)
+      Files,Changed,Deleted=GetChangedProjectFiles(ProjFolder,FileObjects)
+      if len(Changed)==0 and len(Deleted)==0:
+        continue
+      Start=timer()
+
+      #Parse changed files (files with errors keep previous definitions until saved again)
+      ObjectIds=set()
+      Errors=[]
+      for File in Deleted:
+        ObjectIds.update(FileObjects[File]["objects"])
+        del FileObjects[File]
+      for File,MTime in Changed:
+        Status,Message,Objects=ParseProjectFile(Ctx,From.upper(),File,SelectedSchemas,PatternFilter)
+        if Status==False:
+          Errors.append(Message)
+          FileObjects.setdefault(File,{"mtime":MTime,"objects":{}})["mtime"]=MTime
+          continue
+        if File in FileObjects:
+          ObjectIds.update(FileObjects[File]["objects"])
+        ObjectIds.update(Objects)
+        FileObjects[File]={"mtime":MTime,"objects":Objects}
+
+      #Update definitions of affected objects (when object is defined in several files the last one read is kept)
+      for ObjectId in ObjectIds:
+        ObjectDef=None
+        for File in Files:
+          if File in FileObjects and ObjectId in FileObjects[File]["objects"]:
+            ObjectDef=FileObjects[File]["objects"][ObjectId]
+        if ObjectDef!=None:
+          Full[From][ObjectId]=ObjectDef
+        else:
+          Full[From].pop(ObjectId,None)
+
+      #Compare affected objects and print results
+      Compared,Result=UpdateComparison([(From,ObjectId) for ObjectId in ObjectIds])
+      Result["elapsed"]=timer()-Start
+      print("")
+      print(f"[{datetime.now().strftime('%H:%M:%S')}] {len(Changed)+len(Deleted)} file(s) changed, compared again {Compared} object(s)")
+      for Message in Errors:
+        print(Message)
+      PrintComparison(Ctx,Result,MaxWidth)
+  except KeyboardInterrupt:
+    pass
+
+  #Return status
+  return True,""
+
+#----------------------------------------------------------------------------------------------------------------------
+# List snapshots in snapshot store
+#----------------------------------------------------------------------------------------------------------------------
+def ListSnapshots(Ctx,StoreFile):
+  Status,Message,SnapshotDb=OpenSnapshotStore(StoreFile)
+  if Status==False:
+    return False,Message,None
+  return True,"",GetSnapshotList(SnapshotDb,Ctx["options"]["filter"])
+
+#----------------------------------------------------------------------------------------------------------------------
+# Print comparison result
+#----------------------------------------------------------------------------------------------------------------------
+def PrintComparison(Ctx,Result,MaxWidth):
+  PrintStart=ProfileBegin()
+  if len(Result["rows"])!=0:
+    if Result["raw"]==True:
+      PrintRawOutput(Result["rows"])
+    else:
+      PrintTable(["Object","Item",Result["srclabel"],Result["tgtlabel"]],["L","L","LW","LW"],Result["rows"],MaxWidth)
+      print("Legend: "+", ".join([Id+"="+OBJECTID_CONF[Id]["description"] for Id in OBJECTID_CONF]))
+  ProfileEnd(Ctx,"print",PrintStart)
+  for Error in Result["errors"]:
+    print(f"[Error] Unable to read {'source' if Error['side']=='SRC' else 'target'} object {Error['schema']}.{Error['object']}: {Error['message']}")
+  print(("[Diff]" if Result["differences"]!=0 else ("[Incomplete]" if len(Result["errors"])!=0 else "[Ok]"))+f" Compared {Result['compared']} object(s), found {Result['diffobjects']} object(s) different and {Result['differences']} difference(s)"+(f", {len(Result['errors'])} object(s) could not be read" if len(Result["errors"])!=0 else "")+" ["+f"{Result['elapsed']:.2f}s"+"]")
+  if "sample" in Result:
+    PrintSampleEstimates(Result["sample"],MaxWidth)
+  if "renames" in Result:
+    PrintRenames(Result["renames"],MaxWidth)
+  if "catalog" in Result:
+    PrintCatalogSummary(Result["catalog"],MaxWidth)
 
-    #Get object details
-    Kind=Object["kind"]
-    SchemaName=Object["schema"]
-    ObjectName=Object["object"]
+#----------------------------------------------------------------------------------------------------------------------
+# Print drift estimates of sampled comparison
+#----------------------------------------------------------------------------------------------------------------------
+def PrintSampleEstimates(Sample,MaxWidth):
+  Percent=lambda Value:(f"{100*Value:.1f}%" if Value!=None else "-")
+  Rows=[]
+  for Estimate in Sample["schemas"]+[Sample["total"]]:
+    Rows.append([(Estimate["schema"] if Estimate["schema"]!=None else "(all)"),Estimate["objects"],Estimate["sampled"],Estimate["different"],Percent(Estimate["drift"]),Percent(Estimate["low"])+" - "+Percent(Estimate["high"])])
+  PrintTable(["Schema","Objects","Sampled","Different","Drift","95% CI"],["L","R","R","R","R","R"],Rows,MaxWidth)
+  Total=Sample["total"]
+  print(f"[Sample] Estimated drift {Percent(Total['drift'])} (95% CI {Percent(Total['low'])} - {Percent(Total['high'])}) from {Total['sampled']} of {Total['objects']} object(s), sample {Sample['size']}, seed {Sample['seed']}")
 
-    #Get table/View definition
-    if Kind=="TBVW":
-      Query=TBVW_DETL_QUERY.replace("<tablename>",SchemaName+"."+ObjectName)
-      try:
-        Cursor.execute(Query)
-      except Exception as Ex:
-        Message="Query error: "+str(Ex)+" (SQL: "+Query+")"
-        return False,Message,[]
-      Command=""
-      for Row in Cursor.fetchall():
-        Command+=Row["createtab_stmt"]
-      Status,Message,ObjectId,ObjectDef=GetObjectDefinition(From,Command,[SchemaName],"*")
-      if Status==False:
-        return False,Message,{}
-      if ObjectId!=None and ObjectDef!=None:
-        SchemaDef[ObjectId]=ObjectDef
-        DisplayProgress(From,i+1,len(ObjectList),ObjectId)
+#----------------------------------------------------------------------------------------------------------------------
+# Print likely renamed objects
+#----------------------------------------------------------------------------------------------------------------------
+def PrintRenames(Renames,MaxWidth):
+  if len(Renames)!=0:
+    PrintTable(["Source object","Target object","Similarity","Column differences"],["L","L","R","LW"],[[Rename["source"],Rename["target"],f"{100*Rename['similarity']:.1f}%",Rename["columns"]] for Rename in Renames],MaxWidth)
+  print(f"[Renames] Found {len(Renames)} likely renamed or moved object(s)")
 
-    #Get function definition
-    elif Kind=="FUNC":
-      
-      #Get function attributes
-      Query=FUNC_DETL_QUERY.replace("<functionname>",SchemaName+"."+ObjectName)
-      try:
-        Cursor.execute(Query)
-      except Exception as Ex:
-        Message="Query error: "+str(Ex)+" (SQL: "+Query+")"
-        return False,Message,[]
-      FunctionParms=[]
-      ReturnList=[]
-      FetchParms=False
-      FetchReturn=False
-      for Row in Cursor.fetchall():
-        Line=Row[0]
-        if Line.startswith("Type: "):
-          ObjectType=(OBJECTID_TABLEFUNC if TrimDoubleSpaces(Line.replace("Type: ",""))=="TABLE" else OBJECTID_SCALARFUNC)
-        elif Line.startswith("Input: "):
-          Line=Line.replace("Input: ","")
-          FetchParms=True
-        elif Line.startswith("Returns: "):
-          FetchParms=False
-          FetchReturn=True
-          Line=Line.replace("Returns: ","")
-        elif Line.startswith("Deterministic: "):
-          FetchReturn=False
-        elif Line.startswith("Body: "):
-          FunctionText=Line[len("Body: "):].strip()
-        if FetchParms==True:
-          Parms=TrimDoubleSpaces(Line)
-          ParmName=Parms.split(" ")[0]
-          ParmType=StandardType(Parms.split(" ")[1])
-          FunctionParms.append(ParmName+" "+ParmType)
-        if FetchReturn==True:
-          ReturnList.append(TrimDoubleSpaces(Line))
-      if ObjectType==OBJECTID_SCALARFUNC:
-        ReturnType=ReturnList[0]
+#----------------------------------------------------------------------------------------------------------------------
+# Get differences of object with cheap checks (differing items without line comparison of bodies, every column counts
+# as a difference and a body as one)
+#----------------------------------------------------------------------------------------------------------------------
+def GetQuickDifferences(Ctx,ObjectId,SrcObjectDef,TgtObjectDef):
+
+  #Objects on one side
+  if SrcObjectDef==None:
+    return 1,"(object added in target)"
+  if TgtObjectDef==None:
+    return 1,"(object added in source)"
+
+  #Object attributes
+  Aspects=Ctx["options"]["compare"]
+  Items=[]
+  Differences=0
+  if SrcObjectDef["type"] in [OBJECTID_TABLE,OBJECTID_VIEW] and "comments" in Aspects and SrcObjectDef["comment"]!=TgtObjectDef["comment"]:
+    Items.append("comment")
+  if SrcObjectDef["type"] in [OBJECTID_SCALARFUNC,OBJECTID_TABLEFUNC]:
+    if "returns" in Aspects and SrcObjectDef["returns"]!=TgtObjectDef["returns"]:
+      Items.append("returns")
+    if "parameters" in Aspects and SrcObjectDef["parameters"]!=TgtObjectDef["parameters"]:
+      Items.append("parameters")
+  if SrcObjectDef["type"] in [OBJECTID_VIEW,OBJECTID_SCALARFUNC,OBJECTID_TABLEFUNC] and "bodies" in Aspects and SrcObjectDef["text"]!=TgtObjectDef["text"]:
+    if isinstance(SrcObjectDef["text"],dict) or isinstance(TgtObjectDef["text"],dict) or BodyNameReplacements(Ctx,ObjectId,SrcObjectDef["text"])!=BodyNameReplacements(Ctx,ObjectId,TgtObjectDef["text"]):
+      Items.append("body")
+  Differences+=len(Items)
+
+  #Table columns
+  if SrcObjectDef["type"]==OBJECTID_TABLE and ("columns" in Aspects or "comments" in Aspects):
+    Columns=0
+    for ColName in set(SrcObjectDef["columns"])|set(TgtObjectDef["columns"]):
+      SrcColumn=SrcObjectDef["columns"].get(ColName)
+      TgtColumn=TgtObjectDef["columns"].get(ColName)
+      if SrcColumn==None or TgtColumn==None:
+        Columns+=(1 if "columns" in Aspects else 0)
       else:
-        ReturnType=",".join(ReturnList)
-
-      #Build definition and parse
-      if ObjectType==OBJECTID_SCALARFUNC:
-        Command=f"create function {SchemaName}.{ObjectName} ({','.join(FunctionParms)}) returns {ReturnType} return {FunctionText}"
-      elif ObjectType==OBJECTID_TABLEFUNC:
-        Command=f"create function {SchemaName}.{ObjectName} ({','.join(FunctionParms)}) returns table({ReturnType}) return {FunctionText}"
-      Status,Message,ObjectId,ObjectDef=GetObjectDefinition(From,Command,[SchemaName],"*")
-      if Status==False:
-        return False,Message,{}
-      if ObjectId!=None and ObjectDef!=None:
-        SchemaDef[ObjectId]=ObjectDef
-        DisplayProgress(From,i+1,len(ObjectList),ObjectId)
+        Columns+=(1 if "columns" in Aspects and SrcColumn["type"]!=TgtColumn["type"] else 0)
+        Columns+=(1 if "columns" in Aspects and SrcColumn["nullable"]!=TgtColumn["nullable"] else 0)
+        Columns+=(1 if "comments" in Aspects and SrcColumn["comment"]!=TgtColumn["comment"] else 0)
+    if Columns!=0:
+      Items.append(f"{Columns} column difference(s)")
+      Differences+=Columns
 
-  #Return
-  return True,"",SchemaDef
+  #Return differences
+  return Differences,", ".join(Items)
 
 #----------------------------------------------------------------------------------------------------------------------
-# Compare schemas
+# Get object list of browser with cheap differences (objects are named with short names as in comparison)
 #----------------------------------------------------------------------------------------------------------------------
-def CompareSchemas(SrcSchemaDef,TgtSchemaDef,SrcIsFolder,TgtIsFolder,SeparatorLine,RawOutput):
-  
-  #Init comparison
-  FullObjectIds={}
-  ComparisonTable=[]
-  ComparisonList=[]
-  Differences=0
+def GetBrowseObjects(Ctx,Definitions):
+  SrcSchemaDef=Definitions["src"]
+  TgtSchemaDef=Definitions["tgt"]
+  SchemaNames=sorted(set([ObjectId.split(":")[1].split(".")[0] for SchemaDef in [SrcSchemaDef,TgtSchemaDef] for ObjectId in SchemaDef]))
+  ShortNames=(Definitions["shortnames"] if Definitions["shortnames"]!=None else (GetSchemaShortNames(SchemaNames) if len(SchemaNames)!=0 else {}))
+  Objects=[]
+  for ObjectId in GetSortedObjectNames(SrcSchemaDef,TgtSchemaDef):
+    SrcObjectDef=SrcSchemaDef.get(ObjectId)
+    TgtObjectDef=TgtSchemaDef.get(ObjectId)
+    if (SrcObjectDef==None and Definitions["srcfolder"]==True) or (TgtObjectDef==None and Definitions["tgtfolder"]==True):
+      if IsObjectIgnored(Ctx,ObjectId)==True:
+        continue
+    Differences,Items=GetQuickDifferences(Ctx,ObjectId,SrcObjectDef,TgtObjectDef)
+    Objects.append({"name":GetShortObjectId(ObjectId,ShortNames),"id":ObjectId,"differences":Differences,"items":Items})
+  return Objects
 
-  #Calculate short schema names
-  SelectedSchemas=list(set([ObjectId.split(":")[1].split(".")[0] for ObjectId in SrcSchemaDef]+[ObjectId.split(":")[1].split(".")[0] for ObjectId in TgtSchemaDef]))
-  ShortNames=GetSchemaShortNames(SelectedSchemas)
-  for ObjectId in [ObjectId for ObjectId in SrcSchemaDef]:
-    ObjectDef=SrcSchemaDef[ObjectId]
-    ObjectType=ObjectId.split(":")[0]
-    SchemaName=ObjectId.split(":")[1].split(".")[0]
-    ObjectName=ObjectId.split(":")[1].split(".")[1]
-    ShortSchema=ShortNames[SchemaName]
-    ShortObjectId=ObjectType+":"+ShortSchema+("." if len(ShortSchema)!=0 else "")+ObjectName
-    del SrcSchemaDef[ObjectId]
-    SrcSchemaDef[ShortObjectId]=ObjectDef
-    if not ShortObjectId in FullObjectIds:
-      FullObjectIds[ShortObjectId]=ObjectId
-  for ObjectId in [ObjectId for ObjectId in TgtSchemaDef]:
-    ObjectDef=TgtSchemaDef[ObjectId]
-    ObjectType=ObjectId.split(":")[0]
-    SchemaName=ObjectId.split(":")[1].split(".")[0]
-    ObjectName=ObjectId.split(":")[1].split(".")[1]
-    ShortSchema=ShortNames[SchemaName]
-    ShortObjectId=ObjectType+":"+ShortSchema+("." if len(ShortSchema)!=0 else "")+ObjectName
-    del TgtSchemaDef[ObjectId]
-    TgtSchemaDef[ShortObjectId]=ObjectDef
-    if not ShortObjectId in FullObjectIds:
-      FullObjectIds[ShortObjectId]=ObjectId
+#----------------------------------------------------------------------------------------------------------------------
+# Get comparison lines of browsed object for screen width (object is compared when first opened, rendered lines are
+# kept in least recently used cache)
+#----------------------------------------------------------------------------------------------------------------------
+def GetBrowseLines(Ctx,Browser,Object,Width):
+  Key=(Object["id"],Width)
+  Cache=Browser["cache"]
+  if Key in Cache:
+    Cache.move_to_end(Key)
+    return Cache[Key]
+  Definitions=Browser["definitions"]
+  Differences,Rows=CompareObject(Ctx,Object["name"],Definitions["src"].get(Object["id"]),Definitions["tgt"].get(Object["id"]),Definitions["srcfolder"],Definitions["tgtfolder"],Object["id"],False)
+  if len(Rows)!=0:
+    Lines,WarnMessage=FormatTable(["Object","Item",Definitions["srclabel"],Definitions["tgtlabel"]],["L","L","LW","LW"],Rows,Width)
+    Lines+=([WarnMessage] if len(WarnMessage)!=0 else [])+[f"{Differences} difference(s)"]
+  else:
+    Lines=[Object["name"],"(no differences)"]
+  Cache[Key]=Lines
+  if len(Cache)>BROWSE_CACHE_SIZE:
+    Cache.popitem(last=False)
+  return Lines
 
-  #Get all different object names from both schemas
-  Objects=list(set([(SrcSchemaDef[Name]["type"],Name) for Name in SrcSchemaDef]+[(TgtSchemaDef[Name]["type"],Name) for Name in TgtSchemaDef]))
-  Objects.sort(key=lambda x:str(OBJECTID_CONF[x[0]]["order"])+":"+x[1])
-  ObjectNames=[Obj[1] for Obj in Objects]
+#----------------------------------------------------------------------------------------------------------------------
+# Browse comparison of source and target in terminal (schema names, schema groups, project folders or snapshots)
+#----------------------------------------------------------------------------------------------------------------------
+def Browse(Ctx,Source,Target,Cursor=None):
+  try:
+    import curses
+  except ImportError:
+    return False,"Curses module is not available (pip install windows-curses)"
+  if sys.stdout.isatty()==False:
+    return False,"Browser needs a terminal"
+  if Ctx["options"]["fingerprints"]==True:
+    return False,"Browser cannot show objects left out by fingerprints"
+  Status,Message,Definitions=ReadSchemaDefinitions(Ctx,GetSource(Ctx,Source),GetSource(Ctx,Target),Cursor)
+  if Status==False:
+    return False,Message
+  Browser={"definitions":Definitions,"objects":GetBrowseObjects(Ctx,Definitions),"cache":OrderedDict()}
+  curses.wrapper(BrowseScreen,Ctx,Browser)
+  return True,""
 
-  #Loop through all object names
-  for i,ObjectName in enumerate(ObjectNames):
+#----------------------------------------------------------------------------------------------------------------------
+# Browser screen loop (object list and comparison of opened object)
+#----------------------------------------------------------------------------------------------------------------------
+def BrowseScreen(Screen,Ctx,Browser):
+  import curses
 
-    #Show progress
-    DisplayProgress("CMP",i+1,len(ObjectNames),ObjectName)
+  #Screen state
+  try:
+    curses.curs_set(0)
+  except curses.error:
+    pass
+  Definitions=Browser["definitions"]
+  ShowAll=False
+  Selected=0
+  Top=0
+  Opened=None
+  Scroll=0
+  
+  #Draw screen and process keys until quit
+  while(True):
+    Height,Width=Screen.getmaxyx()
+    Page=max(1,Height-2)
+    Objects=[Object for Object in Browser["objects"] if ShowAll==True or Object["differences"]!=0]
+    Different=len([Object for Object in Browser["objects"] if Object["differences"]!=0])
+    Selected=max(0,min(Selected,len(Objects)-1))
+    Screen.erase()
 
-    #Check all items missing in source schema
-    if ObjectName in TgtSchemaDef and ObjectName not in SrcSchemaDef:
-      if SrcIsFolder==False or (SrcIsFolder==True and IsObjectIgnored(FullObjectIds[ObjectName])==False):
-        if RawOutput==False:
-          ComparisonTable.append([ObjectName,"","","(object added)"])
-        else:
-          ComparisonList.append([ObjectName,["Object added in target"]])
-        Differences+=1
+    #Object list
+    if Opened==None:
+      Top=max(min(Top,Selected),Selected-Page+1)
+      Title=f"{Definitions['srclabel']} vs {Definitions['tgtlabel']}: {Different} of {len(Browser['objects'])} object(s) different ({'all objects' if ShowAll==True else 'different objects'})"
+      Keys="[Enter] open  [a] all/different objects  [q] quit"
+      NameWidth=max([len(Object["name"]) for Object in Objects]+[6])
+      Lines=[(f"{Object['name']:<{NameWidth}} {Object['differences']:>5}  {Object['items']}",i==Selected) for i,Object in enumerate(Objects)][Top:Top+Page]
     
-    #Check all items missing in target schema
-    elif ObjectName in SrcSchemaDef and ObjectName not in TgtSchemaDef:
-      if TgtIsFolder==False or (TgtIsFolder==True and IsObjectIgnored(FullObjectIds[ObjectName])==False):
-        if RawOutput==False:
-          ComparisonTable.append([ObjectName,"","(object added)",""])
-        else:
-          ComparisonList.append([ObjectName,["Object added in source"]])
-        Differences+=1
+    #Opened object
+    else:
+      Rendered=GetBrowseLines(Ctx,Browser,Opened,Width-1)
+      Scroll=max(0,min(Scroll,len(Rendered)-Page))
+      Title=Opened["name"]
+      Keys="[Up/Down/PgUp/PgDn] scroll  [Left/q] back to list"
+      Lines=[(Line,False) for Line in Rendered[Scroll:Scroll+Page]]
+
+    #Draw lines (last screen position cannot be written)
+    try:
+      Screen.addnstr(0,0,Title,Width-1,curses.A_BOLD)
+      for i,(Line,Highlight) in enumerate(Lines):
+        Screen.addnstr(i+1,0,Line,Width-1,(curses.A_REVERSE if Highlight==True else curses.A_NORMAL))
+      Screen.addnstr(Height-1,0,Keys,Width-1,curses.A_DIM)
+    except curses.error:
+      pass
+    Screen.refresh()
 
-    #Check all items missing in second schema
-    elif ObjectName in SrcSchemaDef and ObjectName in TgtSchemaDef:
-      
-      #ComparisonTable of table and view attsributes
-      if SrcSchemaDef[ObjectName]["type"] in [OBJECTID_TABLE,OBJECTID_VIEW]:
+    #Keys of object list
+    Key=Screen.getch()
+    if Opened==None:
+      if Key in [ord("q"),27]:
+        break
+      elif Key in [curses.KEY_UP,ord("k")]:
+        Selected-=1
+      elif Key in [curses.KEY_DOWN,ord("j")]:
+        Selected+=1
+      elif Key==curses.KEY_PPAGE:
+        Selected-=Page
+      elif Key==curses.KEY_NPAGE:
+        Selected+=Page
+      elif Key==curses.KEY_HOME:
+        Selected=0
+      elif Key==curses.KEY_END:
+        Selected=len(Objects)-1
+      elif Key==ord("a"):
+        Current=(Objects[Selected] if len(Objects)!=0 else None)
+        ShowAll=not ShowAll
+        Objects=[Object for Object in Browser["objects"] if ShowAll==True or Object["differences"]!=0]
+        Selected=(Objects.index(Current) if Current in Objects else 0)
+      elif Key in [curses.KEY_ENTER,10,13,curses.KEY_RIGHT] and len(Objects)!=0:
+        Opened=Objects[Selected]
+        Scroll=0
 
-        #Objects have different comment
-        if SrcSchemaDef[ObjectName]["comment"]!=TgtSchemaDef[ObjectName]["comment"]:
-          if RawOutput==False:
-            ComparisonTable.append([ObjectName,"comment",SrcSchemaDef[ObjectName]["comment"],TgtSchemaDef[ObjectName]["comment"]])
-          else:
-            ComparisonList.append([ObjectName,["Object comment is different","Source object comment: "+SrcSchemaDef[ObjectName]["comment"],"Target object comment: "+TgtSchemaDef[ObjectName]["comment"]]])
-          Differences+=1
+    #Keys of opened object
+    else:
+      if Key in [ord("q"),27,curses.KEY_LEFT,curses.KEY_BACKSPACE]:
+        Opened=None
+      elif Key in [curses.KEY_UP,ord("k")]:
+        Scroll-=1
+      elif Key in [curses.KEY_DOWN,ord("j")]:
+        Scroll+=1
+      elif Key==curses.KEY_PPAGE:
+        Scroll-=Page
+      elif Key==curses.KEY_NPAGE:
+        Scroll+=Page
+      elif Key==curses.KEY_HOME:
+        Scroll=0
+      elif Key==curses.KEY_END:
+        Scroll=len(Rendered)
 
-      #ComparisonTable of function attributes
-      if SrcSchemaDef[ObjectName]["type"] in [OBJECTID_SCALARFUNC,OBJECTID_TABLEFUNC]:
+#----------------------------------------------------------------------------------------------------------------------
+# Print schema summary of catalog comparison
+#----------------------------------------------------------------------------------------------------------------------
+def PrintCatalogSummary(Catalog,MaxWidth):
+  Rows=[]
+  for Schema in Catalog["schemas"]:
+    Paired=(Schema["source"]!=None and Schema["target"]!=None)
+    Rows.append([Schema["schema"],(Schema["source"] if Schema["source"]!=None else "-"),(Schema["target"] if Schema["target"]!=None else "-"),(Schema["srcobjects"] if Paired else "-"),(Schema["tgtobjects"] if Paired else "-"),(Schema["different"] if Paired else "-")])
+  PrintTable(["Schema","Source","Target","Source objects","Target objects","Different"],["L","L","L","R","R","R"],Rows,MaxWidth)
+  Paired=len([Schema for Schema in Catalog["schemas"] if Schema["source"]!=None and Schema["target"]!=None])
+  print(f"[Catalog] Paired {Paired} schema(s), {Catalog['srcunpaired']} source schema(s) and {Catalog['tgtunpaired']} target schema(s) without pair")
 
-        #Objects have different return type
-        SrcRetType=(",".join([Col["name"]+" "+Col["type"]+(" comment "+Col["comment"] if Col["comment"]!=NULL_COMMENT else "") for Col in SrcSchemaDef[ObjectName]["returns"]]) if SrcSchemaDef[ObjectName]["type"]==OBJECTID_TABLEFUNC else SrcSchemaDef[ObjectName]["returns"])
-        TgtRetType=(",".join([Col["name"]+" "+Col["type"]+(" comment "+Col["comment"] if Col["comment"]!=NULL_COMMENT else "") for Col in TgtSchemaDef[ObjectName]["returns"]]) if TgtSchemaDef[ObjectName]["type"]==OBJECTID_TABLEFUNC else TgtSchemaDef[ObjectName]["returns"])
-        if SrcRetType!=TgtRetType:
-          if RawOutput==False:
-            ComparisonTable.append([ObjectName,"returns",SrcRetType,TgtRetType])
-          else:
-            ComparisonList.append([ObjectName,["Function return type is different","Source return type: "+SrcRetType,"Target return type: "+TgtRetType]])          
-          Differences+=1
+#----------------------------------------------------------------------------------------------------------------------
+# Create connection pool (connections are opened on demand up to pool size and reused between requests)
+#----------------------------------------------------------------------------------------------------------------------
+def NewConnectionPool(Parms,Size):
+  return {"parms":Parms,"size":Size,"idle":queue.Queue(),"created":0,"lock":threading.Lock()}
 
-        #Objects have different parameters
-        SrcParmList=",".join([Parm["name"]+" "+Parm["type"] for Parm in SrcSchemaDef[ObjectName]["parameters"]])
-        TgtParmList=",".join([Parm["name"]+" "+Parm["type"] for Parm in TgtSchemaDef[ObjectName]["parameters"]])
-        if SrcParmList!=TgtParmList:
-          if RawOutput==False:
-            ComparisonTable.append([ObjectName,"parameters",SrcParmList,TgtParmList])
-          else:
-            ComparisonList.append([ObjectName,["Function parameters different","Source parameters: "+SrcParmList,"Target parameters: "+TgtParmList]])
-          Differences+=1
+#----------------------------------------------------------------------------------------------------------------------
+# Get cursor from connection pool (waits for an idle one when all connections are in use, up to acquire timeout)
+#----------------------------------------------------------------------------------------------------------------------
+def PoolAcquire(Ctx,Pool):
+  try:
+    return True,"",Pool["idle"].get_nowait()
+  except queue.Empty:
+    pass
+  with Pool["lock"]:
+    Create=(Pool["created"]<Pool["size"])
+    if Create==True:
+      Pool["created"]+=1
+  if Create==False:
+    try:
+      return True,"",Pool["idle"].get(timeout=DAEMON_ACQUIRE_TIMEOUT)
+    except queue.Empty:
+      return False,"Timeout waiting for idle connection after "+str(DAEMON_ACQUIRE_TIMEOUT)+" seconds",None
+  Status,Message,Cursor=Connect(Ctx,Pool["parms"]["server_hostname"],Pool["parms"]["http_path"],Pool["parms"]["access_token"])
+  if Status==False:
+    with Pool["lock"]:
+      Pool["created"]-=1
+  return Status,Message,Cursor
 
-      #ComparisonTable of view / function definitions
-      if SrcSchemaDef[ObjectName]["type"] in [OBJECTID_VIEW,OBJECTID_SCALARFUNC,OBJECTID_TABLEFUNC]:
-        SrcText=SchemaNameReplacements(SrcSchemaDef[ObjectName]["text"])
-        TgtText=SchemaNameReplacements(TgtSchemaDef[ObjectName]["text"])
-        if SrcText!=TgtText:
-          SrcLines=[Line for Line in SrcText.split("\n")]
-          TgtLines=[Line for Line in TgtText.split("\n")]
-          SrcLineNr=0
-          TgtLineNr=0
-          TextComparison=[]
-          if RawOutput==False:
-            for Diff in difflib.unified_diff(SrcLines,TgtLines):
-              Diff=str(Diff)
-              if Diff.startswith("+++") or Diff.startswith("---"):
-                continue
-              if Diff.startswith("@@"):
-                SrcLineNr=int(Diff.replace("@","").strip().split(" ")[0].split(",")[0].replace("-",""))
-                TgtLineNr=int(Diff.replace("@","").strip().split(" ")[1].split(",")[0].replace("+",""))
-                continue
-              if Diff.startswith("+"):
-                TextComparison.append(["","","",str(TgtLineNr).rjust(3)+": "+Diff[1:]])
-                Differences+=1
-                TgtLineNr+=1
-              elif Diff.startswith("-"):
-                TextComparison.append(["","",str(SrcLineNr).rjust(3)+": "+Diff[1:],""])
-                Differences+=1
-                SrcLineNr+=1
-              else:
-                TextComparison.append(["","",str(SrcLineNr).rjust(3)+": "+Diff[1:],str(TgtLineNr).rjust(3)+": "+Diff[1:]])
-                SrcLineNr+=1
-                TgtLineNr+=1
-            if len(TextComparison)!=0:
-              if len(ComparisonTable)!=0:
-                if ComparisonTable[-1][0]!=ObjectName:  
-                  TextComparison[0][0]=ObjectName
-                  TextComparison[0][1]="definition"
-              else:
-                TextComparison[0][0]=ObjectName
-                TextComparison[0][1]="definition"
-              ComparisonTable.extend(TextComparison)
-          else:
-            DifferenceList=[]
-            for Diff in difflib.unified_diff(SrcLines,TgtLines):
-              if Diff.startswith("+++") or Diff.startswith("---"):
-                continue
-              if Diff.startswith("@@"):
-                continue
-              else:
-                DifferenceList.append(str(Diff))
-            ComparisonList.append([ObjectName,["Object definition is different","Differences:\n"+"\n".join(DifferenceList)]])
-
-      #ComparisonTable of table and view columns
-      if SrcSchemaDef[ObjectName]["type"] == OBJECTID_TABLE:
-
-        #ComparisonTable of columns
-        ColNames=list(set([Name for Name in SrcSchemaDef[ObjectName]["columns"]]+[Name for Name in TgtSchemaDef[ObjectName]["columns"]]))
-        ColNames.sort()
-        ColComparison=[]
-        for ColName in ColNames:
-          if ColName in TgtSchemaDef[ObjectName]["columns"] and ColName not in SrcSchemaDef[ObjectName]["columns"]:
-            ColComparison.append(["","column:"+ColName,"","(column added)"])
-            Differences+=1
-          elif ColName in SrcSchemaDef[ObjectName]["columns"] and ColName not in TgtSchemaDef[ObjectName]["columns"]:
-            ColComparison.append(["","column:"+ColName,"(column added)",""])
-            Differences+=1
-          elif ColName in SrcSchemaDef[ObjectName]["columns"] and ColName in TgtSchemaDef[ObjectName]["columns"]:
-            if SrcSchemaDef[ObjectName]["columns"][ColName]["type"]!=TgtSchemaDef[ObjectName]["columns"][ColName]["type"]:
-              ColComparison.append(["","column:"+ColName,"type:"+SrcSchemaDef[ObjectName]["columns"][ColName]["type"],"type:"+TgtSchemaDef[ObjectName]["columns"][ColName]["type"]])
-              Differences+=1
-            if SrcSchemaDef[ObjectName]["columns"][ColName]["nullable"]!=TgtSchemaDef[ObjectName]["columns"][ColName]["nullable"]:
-              ColComparison.append(["","column:"+ColName,"nullable:"+str(SrcSchemaDef[ObjectName]["columns"][ColName]["nullable"]),"nullable:"+str(TgtSchemaDef[ObjectName]["columns"][ColName]["nullable"])])
-              Differences+=1
-            if SrcSchemaDef[ObjectName]["columns"][ColName]["comment"]!=TgtSchemaDef[ObjectName]["columns"][ColName]["comment"]:
-              ColComparison.append(["","column:"+ColName,"comment:"+SrcSchemaDef[ObjectName]["columns"][ColName]["comment"],"comment:"+TgtSchemaDef[ObjectName]["columns"][ColName]["comment"]])
-              Differences+=1
-        if len(ColComparison)!=0:
-          if RawOutput==False:
-            if len(ComparisonTable)!=0:
-              if ComparisonTable[-1][0]!=ObjectName:  
-                ColComparison[0][0]=ObjectName
-                ColComparison[0][1]="definition"
-            else:
-              ColComparison[0][0]=ObjectName
-              ColComparison[0][1]="definition"
-            ComparisonTable.extend(ColComparison)
-          else:
-            DifferenceList=[]
-            for Difference in ColComparison:
-              if Difference[2]=="" and Difference[3]=="(column added)":
-                DifferenceList.append(Difference[1]+" is added in target")
-              elif Difference[2]=="(column added)" and Difference[3]=="":
-                DifferenceList.append(Difference[1]+" is added in source")
-              else:
-                DifferenceList.append(Difference[1]+", Source "+Difference[2]+", Target "+Difference[3])
-            ComparisonList.append([ObjectName,DifferenceList])
+#----------------------------------------------------------------------------------------------------------------------
+# Return cursor to connection pool (broken connections are discarded)
+#----------------------------------------------------------------------------------------------------------------------
+def PoolRelease(Pool,Cursor,Broken=False):
+  if Broken==True:
+    with Pool["lock"]:
+      Pool["created"]-=1
+    try:
+      Cursor.close()
+    except Exception:
+      pass
+  else:
+    Pool["idle"].put(Cursor)
+
+#----------------------------------------------------------------------------------------------------------------------
+# Create schema definition cache (entries expire after ttl seconds, least recently used are evicted above size)
+#----------------------------------------------------------------------------------------------------------------------
+def NewSchemaCache(Ttl,Size):
+  return {"ttl":Ttl,"size":Size,"entries":OrderedDict(),"flights":{},"lock":threading.Lock(),"hits":0,"misses":0,"shared":0}
 
+#----------------------------------------------------------------------------------------------------------------------
+# Get schema definition from cache or load it (concurrent requests for the same key share a single load)
+#----------------------------------------------------------------------------------------------------------------------
+def CacheGetSchema(Cache,Key,Loader):
   
-  #Count different objects
-  if RawOutput==False:
-    Diffs=[[Diff[0]] for Diff in ComparisonTable]
-  else:
-    Diffs=[[Diff[0]] for Diff in ComparisonList]
-  DiffObjects=0
-  PrevObject=None
-  for Diff in Diffs:
-    if PrevObject!=Diff and (len(Diff)!=0 and PrevObject!=None):
-      DiffObjects+=1
-    PrevObject=Diff
-  if len(Diffs)!=0:
-    DiffObjects+=1
-
-  #Prepare result for comparison table
-  if RawOutput==False:
-
-    #Insert separation lines between objects and count ojects different
-    if SeparatorLine==True:
-      Result=[]
-      PrevObject=None
-      for Diff in ComparisonTable:
-        if PrevObject!=Diff[0] and (len(Diff[0])!=0 and PrevObject!=None):
-          Result.append([SEPARATOR_ID,"","",""])
-        Result.append(Diff)
-        PrevObject=Diff[0]
+  #Find entry in cache or join a load that is already running
+  with Cache["lock"]:
+    Entry=Cache["entries"].get(Key)
+    if Entry!=None and timer()-Entry["time"]<=Cache["ttl"]:
+      Cache["entries"].move_to_end(Key)
+      Cache["hits"]+=1
+      return True,"",Entry["schemadef"]
+    Flight=Cache["flights"].get(Key)
+    Leader=(Flight==None)
+    if Leader==True:
+      Flight={"event":threading.Event(),"result":(False,"Schema load did not complete",None)}
+      Cache["flights"][Key]=Flight
+      Cache["misses"]+=1
     else:
-      Result=ComparisonTable
+      Cache["shared"]+=1
+  if Leader==False:
+    Flight["event"].wait()
+    return Flight["result"]
 
-  #Results for raw output
-  else:
-    Result=ComparisonList
+  #Load schema and store it in cache
+  try:
+    Flight["result"]=Loader()
+  except Exception as Ex:
+    Flight["result"]=(False,"Exception loading schema "+Key+": "+str(Ex),None)
+  finally:
+    with Cache["lock"]:
+      if Flight["result"][0]==True:
+        Cache["entries"][Key]={"time":timer(),"schemadef":Flight["result"][2]}
+        Cache["entries"].move_to_end(Key)
+        while len(Cache["entries"])>Cache["size"]:
+          Cache["entries"].popitem(last=False)
+      del Cache["flights"][Key]
+    Flight["event"].set()
+  return Flight["result"]
 
-  #Calculate compared objects
-  ComparedObjects=len(ObjectNames)
+#----------------------------------------------------------------------------------------------------------------------
+# Get metastore fetcher that reads every schema through cache and connection pool
+# (schemas are cached without filter or shard, so that requests with different filters share cached definitions)
+#----------------------------------------------------------------------------------------------------------------------
+def GetCachedFetcher(Pool,Cache):
+  def Fetcher(Ctx,From,SchemaNames,PatternFilter):
+    SchemaDef={}
+    for SchemaName in sorted(set(SchemaNames.split(SCHEMA_ARG_SEPARATOR))):
+      def Loader():
+        Status,Message,Cursor=PoolAcquire(Ctx,Pool)
+        if Status==False:
+          return False,Message,None
+        Status=False
+        try:
+          Status,Message,Definition=GetSchemaFromMetastore(NewContext(Ctx["config"]),From,Cursor,SchemaName,"*")
+        finally:
+          PoolRelease(Pool,Cursor,Broken=(Status==False))
+        return Status,Message,Definition
+      Status,Message,Definition=CacheGetSchema(Cache,SchemaName.lower(),Loader)
+      if Status==False:
+        return False,Message,{}
+      for ObjectId in Definition:
+        if fnmatch(ObjectId.split(":")[1].split(".")[1],PatternFilter)==True and IsObjectIdInShard(Ctx,ObjectId)==True:
+          SchemaDef[ObjectId]=Definition[ObjectId]
+    return True,"",SchemaDef
+  return Fetcher
 
-  #Clear progress
-  DisplayProgress("CLR",0,0,"")
+#----------------------------------------------------------------------------------------------------------------------
+# Daemon request handler (POST /compare, POST /dump, GET /status)
+#----------------------------------------------------------------------------------------------------------------------
+class DaemonRequestHandler(http.server.BaseHTTPRequestHandler):
 
-  #Return comparison result
-  return ComparedObjects,Differences,DiffObjects,Result
+  #Send json response
+  def SendJson(self,Code,Response):
+    Body=json.dumps(Response).encode("utf-8")
+    self.send_response(Code)
+    self.send_header("Content-Type","application/json")
+    self.send_header("Content-Length",str(len(Body)))
+    self.end_headers()
+    self.wfile.write(Body)
+
+  #Status request
+  def do_GET(self):
+    Daemon=self.server.Daemon
+    if self.path!="/status":
+      self.SendJson(404,{"status":False,"message":"Unknown request "+self.path})
+      return
+    Cache=Daemon["cache"]
+    with Cache["lock"]:
+      Result={"cached":list(Cache["entries"]),"hits":Cache["hits"],"misses":Cache["misses"],"shared":Cache["shared"],"connections":Daemon["pool"]["created"],"requests":Daemon["requests"]}
+    self.SendJson(200,{"status":True,"message":"","result":Result})
+
+  #Compare and dump requests (invalid requests get 400 response and failures inside comparison or dump get 500 response,
+  #so the client always gets a json answer)
+  def do_POST(self):
+    Daemon=self.server.Daemon
+    try:
+      Body=self.rfile.read(int(self.headers.get("Content-Length","0")))
+    except Exception as Ex:
+      self.SendJson(400,{"status":False,"message":"Invalid request: "+str(Ex)})
+      return
+    if self.path not in DAEMON_REQUEST_KEYS:
+      self.SendJson(404,{"status":False,"message":"Unknown request "+self.path})
+      return
+    try:
+      Request=json.loads(Body.decode("utf-8"))
+      if isinstance(Request,dict)==False:
+        raise ValueError("json object expected")
+      Missing=[Key for Key in DAEMON_REQUEST_KEYS[self.path] if isinstance(Request.get(Key),str)==False or len(Request[Key])==0]
+      if len(Missing)!=0:
+        raise ValueError("missing "+", ".join(Missing))
+      Options=dict(Request.get("options",{}))
+      Options["progress"]=False
+      Options["profile"]=False
+    except Exception as Ex:
+      self.SendJson(400,{"status":False,"message":"Invalid request: "+str(Ex)})
+      return
+    with Daemon["lock"]:
+      Daemon["requests"]+=1
+    try:
+      Ctx=NewContext(Daemon["config"],Options)
+      if self.path=="/compare":
+        Status,Message,Result=Compare(Ctx,Request["source"],Request["target"],Fetcher=Daemon["fetcher"])
+      else:
+        Status,Message,Result=Dump(Ctx,Request["source"],Fetcher=Daemon["fetcher"])
+    except Exception as Ex:
+      self.SendJson(500,{"status":False,"message":"Request failed: "+str(Ex)})
+      return
+    self.SendJson(200,{"status":Status,"message":Message,"result":Result})
+
+  #Request log
+  def log_message(self,Format,*Args):
+    if self.server.Daemon["verbose"]==True:
+      sys.stderr.write(datetime.now().isoformat(timespec="seconds")+" "+(Format%Args)+"\n")
 
 #----------------------------------------------------------------------------------------------------------------------
-# PrintTable
+# Daemon servers (localhost http and unix socket)
 #----------------------------------------------------------------------------------------------------------------------
-def PrintTable(Heading,ColAttributes,Rows,MaxWidth):
+class DaemonHttpServer(http.server.ThreadingHTTPServer):
+  daemon_threads=True
 
-  #Calculate data column widths
-  Lengths=[0]*len(Rows[0])
-  for Row in Rows:
-    i=0
-    for Field in Row:
-      Lengths[i]=max(max(Lengths[i],len(str(Field))),len(Heading[i]))
-      i+=1
+if hasattr(socketserver,"UnixStreamServer"):
+  class DaemonUnixServer(socketserver.ThreadingMixIn,socketserver.UnixStreamServer):
+    daemon_threads=True
 
-  #Calculate max column to print according to data length and maximun width
-  i=0
-  TableWidth=1
-  MaxColumn=0
-  Truncated=False
-  for Len in Lengths:
-    TableWidth+=Len+1
-    MaxColumn=i
-    if(TableWidth>MaxWidth):
-      Truncated=True
-      MaxColumn-=1
-      TableWidth-=(Len+1)
-      break
-    i+=1
+#----------------------------------------------------------------------------------------------------------------------
+# Run daemon mode (warm connections and schema definition cache shared by all requests)
+#----------------------------------------------------------------------------------------------------------------------
+def Serve(Config,Address,PoolSize,Ttl,CacheSize,Verbose=False):
 
-  #Adjust lengths if table is truncated and has resizeable columns
-  if Truncated==True and "".join(ColAttributes).find("W")!=-1:
-    while(True):
-      i=0
-      Resized=False
-      for ColHeader in Heading:
-        if Lengths[i]>len(ColHeader) and ColAttributes[i].find("W")!=-1:
-          Lengths[i]-=1
-          Resized=True
-        i+=1
-      if Resized==False:
-        break
-      i=0
-      TableWidth=1
-      MaxColumn=0
-      Truncated=False
-      for Len in Lengths:
-        TableWidth+=Len+1
-        MaxColumn=i
-        if(TableWidth>MaxWidth):
-          Truncated=True
-          MaxColumn-=1
-          TableWidth-=(Len+1)
-          break
-        i+=1
-      if Truncated==False:
-        break
+  #Connection parameters, pool and cache
+  Status,Message,Parms=GetConnectionParms()
+  if Status==False:
+    return False,Message
+  Ctx=NewContext(Config)
+  Pool=NewConnectionPool(Parms,PoolSize)
+  Cache=NewSchemaCache(Ttl,CacheSize)
 
-  #Separator line
-  Separator="-"*TableWidth
+  #Open first connection so that warehouse is awake when first request arrives
+  Status,Message,Cursor=PoolAcquire(Ctx,Pool)
+  if Status==False:
+    return False,Message
+  PoolRelease(Pool,Cursor)
 
-  #Print column headings
-  print(Separator)
-  print("|",end="",flush=True)
-  i=0
-  for Col in Heading:
-    print(Col.center(Lengths[i])+"|",end="",flush=True)
-    if(i>=MaxColumn):
-      break
-    i+=1
-  print("")
-  i=0
-  print(Separator)
+  #Create server
+  try:
+    if Address.startswith(DAEMON_UNIX_PREFIX):
+      SocketPath=Address[len(DAEMON_UNIX_PREFIX):]
+      if os.path.exists(SocketPath):
+        os.remove(SocketPath)
+      Server=DaemonUnixServer(SocketPath,DaemonRequestHandler)
+    else:
+      Host,Port=GetHttpAddress(Address)
+      Server=DaemonHttpServer((Host,Port),DaemonRequestHandler)
+  except Exception as Ex:
+    return False,f"Unable to start daemon on {Address}: {str(Ex)}"
+  Server.Daemon={"config":Config,"pool":Pool,"cache":Cache,"fetcher":GetCachedFetcher(Pool,Cache),"lock":threading.Lock(),"requests":0,"verbose":Verbose}
 
-  #Print data
-  for Row in Rows:
-    if Row[0]==SEPARATOR_ID:
-      i=0
-      print("|",end="",flush=True)
-      for Field in Row:
-        print("·"*Lengths[i]+"|",end="",flush=True)
-        if(i>=MaxColumn):
-          break
-        i+=1
-      print("")
+  #Serve requests until interrupted
+  print(f"Daemon listening on {Address} (pool size {PoolSize}, cache ttl {Ttl}s, cache size {CacheSize})")
+  try:
+    Server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    Server.server_close()
+  return True,""
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get host and port from http address (http://host:port or host:port)
+#----------------------------------------------------------------------------------------------------------------------
+def GetHttpAddress(Address):
+  HostPort=Address.replace("http://","").rstrip("/")
+  Host=(HostPort.split(":")[0] if len(HostPort.split(":")[0])!=0 else DAEMON_HOST)
+  Port=(int(HostPort.split(":")[1]) if HostPort.find(":")!=-1 else DAEMON_PORT)
+  return Host,Port
+
+#----------------------------------------------------------------------------------------------------------------------
+# Http connection over unix socket (used by client to reach daemon)
+#----------------------------------------------------------------------------------------------------------------------
+class UnixHTTPConnection(http.client.HTTPConnection):
+  def __init__(self,SocketPath,Timeout):
+    super().__init__("localhost",timeout=Timeout)
+    self.SocketPath=SocketPath
+  def connect(self):
+    self.sock=socket.socket(socket.AF_UNIX,socket.SOCK_STREAM)
+    self.sock.settimeout(self.timeout)
+    self.sock.connect(self.SocketPath)
+
+#----------------------------------------------------------------------------------------------------------------------
+# Send request to daemon
+#----------------------------------------------------------------------------------------------------------------------
+def DaemonRequest(Address,Path,Payload,Timeout=DAEMON_TIMEOUT):
+  try:
+    if Address.startswith(DAEMON_UNIX_PREFIX):
+      Connection=UnixHTTPConnection(Address[len(DAEMON_UNIX_PREFIX):],Timeout)
     else:
-      i=0
-      print("|",end="",flush=True)
-      for Field in Row:
-        if ColAttributes[i].find("L")!=-1:
-          print(str(Field)[:Lengths[i]].ljust(Lengths[i])+"|",end="",flush=True)
-        elif ColAttributes[i].find("R")!=-1:
-          print(str(Field)[:Lengths[i]].rjust(Lengths[i])+"|",end="",flush=True)
-        elif ColAttributes[i].find("C")!=-1:
-          print(str(Field)[:Lengths[i]].center(Lengths[i])+"|",end="",flush=True)
-        if(i>=MaxColumn):
-          break
-        i+=1
-      print("")
-  print(Separator)
+      Host,Port=GetHttpAddress(Address)
+      Connection=http.client.HTTPConnection(Host,Port,timeout=Timeout)
+    if Payload==None:
+      Connection.request("GET",Path)
+    else:
+      Connection.request("POST",Path,body=json.dumps(Payload).encode("utf-8"),headers={"Content-Type":"application/json"})
+    Response=json.loads(Connection.getresponse().read().decode("utf-8"))
+    Connection.close()
+  except Exception as Ex:
+    return False,f"Unable to send request to daemon on {Address}: {str(Ex)}",None
+  return Response["status"],Response["message"],Response.get("result")
 
-  #Column count warning
-  if(MaxColumn<len(Lengths)-1):
-    WarnMessage="Displaying {0} columns out of {1} columns due to console width".format(str(MaxColumn+1),str(len(Lengths)))
-  else:
-    WarnMessage=""
+#----------------------------------------------------------------------------------------------------------------------
+# Get source argument to send to daemon (schema groups are expanded and folders made absolute on client side)
+#----------------------------------------------------------------------------------------------------------------------
+def GetDaemonSource(Ctx,Argument):
+  Source=GetSource(Ctx,Argument)
+  if Source["kind"]=="folder":
+    return os.path.abspath(Source["folder"])
+  elif Source["kind"]=="schemas":
+    return Source["schemas"]
+  return Argument
 
-  #Warning
-  if(len(WarnMessage)!=0):
-    print(WarnMessage)    
+#----------------------------------------------------------------------------------------------------------------------
+# Compare shard and save partial result
+#----------------------------------------------------------------------------------------------------------------------
+def RunShard(Ctx):
+  Options=Ctx["options"]
+  Status,Message,Partial=CompareShard(Ctx,Options["source"],Options["target"])
+  if Status==False:
+    PrintRunError(Ctx,Message)
+    return 1
+  PartialFile=Options["partial"]
+  if len(PartialFile)==0:
+    PartialFile=SHARD_PARTIAL_FILE.replace("<i>",str(Partial["shard"])).replace("<n>",str(Partial["shards"]))
+  try:
+    with open(PartialFile,"w") as File:
+      json.dump(Partial,File)
+  except Exception as Ex:
+    print(f"Exception writing partial result ({PartialFile}): {str(Ex)}")
+    return 1
+  Differences=sum([Object["differences"] for Object in Partial["objects"].values()])
+  print(f"Shard {Partial['shard']}/{Partial['shards']}: compared {len(Partial['objects'])} object(s), found {Differences} difference(s)"+(f", {len(Partial['errors'])} object(s) could not be read" if len(Partial["errors"])!=0 else "")+f", partial result saved in {PartialFile} ["+f"{Partial['elapsed']:.2f}s"+"]")
+  CloseJournal(Ctx,len(Ctx["errors"])==0)
+  return 0
 
 #----------------------------------------------------------------------------------------------------------------------
-# Print raw output
+# Print error that stopped the run (fetch journal is kept so the run can be resumed)
 #----------------------------------------------------------------------------------------------------------------------
-def PrintRawOutput(Comparison):
-  PrevObjectName=""
-  for Item in Comparison:
-    ObjectName=Item[0]
-    DifferenceList=Item[1]
-    if ObjectName!=PrevObjectName:
-      print("\n--- Object: "+ObjectName+" ---")
-    for Diff in DifferenceList:
-      print(Diff)
-    PrevObjectName=ObjectName
-  if len(Comparison)!=0:
-    print("")
+def PrintRunError(Ctx,Message):
+  print(Message)
+  Kept=(Ctx["journal"]!=None and (len(Ctx["journal"]["commands"])!=0 or Ctx["journal"]["appended"]!=0))
+  if Kept==True:
+    print(f"Fetched objects are kept in journal {Ctx['journal']['file']}, run again with --resume to skip them")
+  CloseJournal(Ctx,Kept==False)
+
+#----------------------------------------------------------------------------------------------------------------------
+# Merge partial results of shards and print results
+#----------------------------------------------------------------------------------------------------------------------
+def RunMerge(Ctx,MaxWidth):
+  Partials=[]
+  for PartialFile in Ctx["options"]["merge"]:
+    try:
+      with open(PartialFile,"r") as File:
+        Partials.append(json.load(File))
+    except Exception as Ex:
+      print(f"Exception reading partial result ({PartialFile}): {str(Ex)}")
+      return 1
+  Status,Message,Result=MergePartials(Ctx,Partials)
+  if Status==False:
+    print(Message)
+    return 1
+  PrintComparison(Ctx,Result,MaxWidth)
+  return 0
+
+#----------------------------------------------------------------------------------------------------------------------
+# Run comparison or dump on daemon and print results
+#----------------------------------------------------------------------------------------------------------------------
+def RunClient(Ctx,MaxWidth):
+  Options=Ctx["options"]
+  Request={"source":GetDaemonSource(Ctx,Options["source"]),"options":{"filter":Options["filter"],"sep":Options["sep"],"raw":Options["raw"],"store":(os.path.abspath(Options["store"]) if len(Options["store"])!=0 else "")}}
+  if Options["dump"]==True:
+    Status,Message,SchemaDef=DaemonRequest(Options["server"],"/dump",Request)
+    if Status==False:
+      print(Message)
+      return 1
+    print(json.dumps(SchemaDef,indent=2))
+  else:
+    Request["target"]=GetDaemonSource(Ctx,Options["target"])
+    Status,Message,Result=DaemonRequest(Options["server"],"/compare",Request)
+    if Status==False:
+      print(Message)
+      return 1
+    PrintComparison(Ctx,Result,MaxWidth)
+  return 0
 
 #----------------------------------------------------------------------------------------------------------------------
 # Main
 #----------------------------------------------------------------------------------------------------------------------
+def Main(Argv):
 
-#Get configuration file if it exists
-_Config={}
-if os.path.exists(DBSC_CONFIG_FILE)==True:
-  Status,_Config,Message=JsonFileParser(DBSC_CONFIG_FILE)
+  #Get configuration file if it exists
+  Status,Message,Config=LoadConfig()
   if Status==False:
     print(Message)
-    exit()
-
-#Get command line arguments
-Options=[]
-if(GetCommandLineOptions(Options)):
-  SrcFolder=Options[0]
-  SrcSchemas=Options[1]
-  TgtFolder=Options[2]
-  TgtSchemas=Options[3]
-  PatternFilter=Options[4]
-  SeparatorLine=Options[5]
-  RawOutput=Options[6]
-  ShowProgress=Options[7]
-  DumpMode=Options[8]
-else:
-  exit()
-
-#Set global show progress flag
-_ShowProgress=ShowProgress
-
-#Get console size
-if(sys.stdout.isatty()):
-  Console=os.get_terminal_size()
-  ConsoleWidth=Console.columns-1
-else:
-  ConsoleWidth=9999
-  _ShowProgress=False
-
-#Replace schema groups by actual selected schemas
-if len(SrcSchemas)!=0:
-  if SrcSchemas in _Config["schema_groups"]:
-    SrcSchemas=_Config["schema_groups"][SrcSchemas]
-if len(TgtSchemas)!=0:
-  if TgtSchemas in _Config["schema_groups"]:
-    TgtSchemas=_Config["schema_groups"][TgtSchemas]
-
-#Get databricks instance details from environment variables
-if len(SrcSchemas)!=0 or len(TgtSchemas)!=0:
-  ServerHostName=(os.environ["DATABRICKS_SERVER_HOSTNAME"] if "DATABRICKS_SERVER_HOSTNAME" in os.environ else "")
-  if len(ServerHostName)==0:
-    print("Unable to get databricks server hostname from environment variable DATABRICKS_SERVER_HOSTNAME")
-    exit()
-  HttpPath=(os.environ["DATABRICKS_HTTP_PATH"] if "DATABRICKS_HTTP_PATH" in os.environ else "")
-  if len(HttpPath)==0:
-    print("Unable to get databricks server hostname from environment variable DATABRICKS_HTTP_PATH")
-    exit()
-  AccessToken=(os.environ["DATABRICKS_TOKEN"] if "DATABRICKS_TOKEN" in os.environ else "")
-  if len(AccessToken)==0:
-    print("Unable to get databricks server hostname from environment variable DATABRICKS_TOKEN")
-    exit()
-
-#Get start time
-Start=timer()
-
-#Get definitions from project folders
-SrcIsFolder=False
-TgtIsFolder=False
-if len(SrcFolder)!=0:
-  SrcIsFolder=True
-  State,Message,SrcSchemaDef=GetSchemaFromProject("SRC",SrcFolder,TgtSchemas,PatternFilter,DumpMode)
-  if State==False:
-    print(Message)
-    print("Error occured when retrieving definitions from folder "+SrcFolder)
-    exit()
-if len(TgtFolder)!=0:
-  TgtIsFolder=True
-  State,Message,TgtSchemaDef=GetSchemaFromProject("TGT",TgtFolder,SrcSchemas,PatternFilter,DumpMode)
-  if State==False:
-    print(Message)
-    print("Error occured when retrieving definitions from folder "+TgtFolder)
-    exit()
-
-#Get definitions from databricks metastore
-if len(SrcSchemas)!=0 or len(TgtSchemas)!=0:
-  State,Cursor=Connect(ServerHostName,HttpPath,AccessToken)
-  if State==False:
-    exit()
-  if len(SrcSchemas)!=0:
-    State,Message,SrcSchemaDef=GetSchemaFromMetastore("SRC",Cursor,SrcSchemas,PatternFilter)
-    if State==False:
+    return 1
+
+  #Get command line arguments
+  Options={}
+  if GetCommandLineOptions(Argv,Config,Options)==False:
+    return 1
+
+  #Get console size
+  if(sys.stdout.isatty()):
+    Console=os.get_terminal_size()
+    ConsoleWidth=Console.columns-1
+  else:
+    ConsoleWidth=9999
+    Options["progress"]=False
+
+  #Create run context
+  Ctx=NewContext(Config,Options)
+  if Options["profile"]==True:
+    ProfileStart(Ctx)
+
+  #Daemon mode
+  if Options["serve"]==True:
+    Status,Message=Serve(Config,Options["address"],Options["pool"],Options["ttl"],Options["cachesize"],Options["verbose"])
+    if Status==False:
       print(Message)
-      print("Error occured when retrieving definition of schema "+SrcSchemas)
-      exit()
-  if len(TgtSchemas)!=0:
-    State,Message,TgtSchemaDef=GetSchemaFromMetastore("TGT",Cursor,TgtSchemas,PatternFilter)
-    if State==False:
+      return 1
+    return 0
+
+  #Watch mode (project folder is compared again on every change)
+  if Options["watch"]==True:
+    Status,Message=Watch(Ctx,Options["source"],Options["target"],ConsoleWidth,Interval=Options["interval"])
+    if Status==False:
       print(Message)
-      print("Error occured when retrieving definition of schema "+TgtSchemas)
-      exit()
+      return 1
+    return 0
 
-#Dump mode (no comparison)
-if DumpMode==True:
-  print(json.dumps(SrcSchemaDef,indent=2))
+  #Shard mode (partial result is saved to file)
+  if len(Options["shard"])!=0:
+    return RunShard(Ctx)
 
-#Schema comparison mode
-else:
+  #Merge mode (partial results of shards are reported as a single comparison)
+  if len(Options["merge"])!=0:
+    return RunMerge(Ctx,ConsoleWidth)
 
-  #Compare schemas
-  ComparedObjects,Differences,DiffObjects,Comparison=CompareSchemas(SrcSchemaDef,TgtSchemaDef,SrcIsFolder,TgtIsFolder,SeparatorLine,RawOutput)
+  #Client mode (comparison or dump is done by daemon)
+  if len(Options["server"])!=0:
+    return RunClient(Ctx,ConsoleWidth)
 
-  #Print schema comparison
-  if len(Comparison)!=0:
-    if RawOutput==True:
-      PrintRawOutput(Comparison)
-    else:
-      PrintTable(["Object","Item",(SrcSchemas if len(SrcSchemas)!=0 else SrcFolder),(TgtSchemas if len(TgtSchemas)!=0 else TgtFolder)],["L","L","LW","LW"],Comparison,ConsoleWidth)
-      print("Legend: "+", ".join([Id+"="+OBJECTID_CONF[Id]["description"] for Id in OBJECTID_CONF]))
+  #Snapshot list mode (no comparison)
+  if Options["snapshots"]==True:
+    Status,Message,Snapshots=ListSnapshots(Ctx,Options["store"])
+    if Status==False:
+      print(Message)
+      return 1
+    if len(Snapshots)!=0:
+      PrintTable(["Id","Label","Kind","Schemas","Filter","Created","Objects"],["R","L","L","LW","L","L","R"],Snapshots,ConsoleWidth)
+    print(f"Found {len(Snapshots)} snapshot(s)")
+    return 0
+
+  #Dump mode (no comparison)
+  if Options["dump"]==True:
+    Status,Message,SchemaDef=Dump(Ctx,Options["source"])
+    if Status==False:
+      PrintRunError(Ctx,Message)
+      return 1
+    PrintStart=ProfileBegin()
+    print(json.dumps(SchemaDef,indent=2))
+    ProfileEnd(Ctx,"print",PrintStart)
+    for Error in Ctx["errors"]:
+      print(f"[Error] Unable to read object {Error['schema']}.{Error['object']}: {Error['message']}",file=sys.stderr)
+
+  #Browse mode (objects are compared when opened)
+  elif Options["browse"]==True:
+    Status,Message=Browse(Ctx,Options["source"],Options["target"])
+    if Status==False:
+      PrintRunError(Ctx,Message)
+      return 1
+
+  #Schema comparison mode
+  else:
+    Status,Message,Result=Compare(Ctx,Options["source"],Options["target"])
+    if Status==False:
+      PrintRunError(Ctx,Message)
+      return 1
+    PrintComparison(Ctx,Result,ConsoleWidth)
+
+  #Fetch journal is kept only when some objects could not be read
+  Incomplete=(len(Ctx["errors"])!=0)
+  CloseJournal(Ctx,Incomplete==False)
+
+  #Profiling report
+  if Options["profile"]==True:
+    Report=GetProfileReport(Ctx)
+    with contextlib.redirect_stdout(sys.stderr if Options["dump"]==True else sys.stdout):
+      PrintProfileReport(Report,ConsoleWidth)
+    if len(Options["profilefile"])!=0:
+      try:
+        with open(Options["profilefile"],"w") as File:
+          json.dump(Report,File,indent=2)
+      except Exception as Ex:
+        print(f"Exception writing profiling report ({Options['profilefile']}): {str(Ex)}")
+        return 1
+
+  #Return code (run fails when some objects could not be read)
+  return (1 if Incomplete==True else 0)
 
-  #Difference counter
-  ElapsedTime=timer()-Start
-  print(("[Ok]" if Differences==0 else "[Diff]")+f" Compared {ComparedObjects} object(s), found {DiffObjects} object(s) different and {Differences} difference(s) ["+f"{ElapsedTime:.2f}s"+"]")
\ No newline at end of file
+#Run main
+if __name__=="__main__":
+  sys.exit(Main(sys.argv))
@@ -0,0 +1,672 @@
+#Import libraries
+import io
+import os
+import sys
+import json
+import time
+import math
+import copy
+import random
+import hashlib
+import shutil
+import tempfile
+import contextlib
+import zipfile
+import tracemalloc
+from timeit import default_timer as timer
+import dbsc
+
+#Constants
+BENCH_SCALES=[1,2,4,8]
+BENCH_REPEAT=5
+SUPERLINEAR_SLOPE=1.25
+MIN_MEASURABLE_TIME=0.005
+MIN_SAMPLE_TIME=0.05 #Minimum duration of every timed run (fast benchmarks are called several times)
+REGRESSION_TOLERANCE=0.25
+MEMORY_RUN_OBJECTS=2   #Spill run size in external comparison memory benchmark (several runs and merge passes)
+MEMORY_FLAT_SLOPE=0.25 #Maximum scaling exponent of external comparison peak memory
+SRC_PREFIX="dev_"
+TGT_PREFIX="prod_"
+SCHEMA_SUFFIXES=["bronze","silver","gold","platinum"]
+COLUMN_TYPES=["BIGINT","INT","STRING","DOUBLE","DATE","TIMESTAMP","DECIMAL(18,2)","BOOLEAN"]
+FUNCTION_TYPES=["INT","STRING","DOUBLE","BIGINT"]
+
+#Benchmark configuration (base counts per schema for scale 1)
+BENCH_CONFIG={
+  "schemas":2,
+  "tables":20,
+  "columns":12,
+  "views":10,
+  "viewlines":25,
+  "functions":4,
+  "latency":0.0,
+  "jitter":0.0,
+  "mutation":0.1,
+  "seed":1
+}
+
+#Configuration used by dbsc during benchmarks
+DBSC_CONFIG={
+  "schema_groups":{},
+  "schema_name_replacements":[
+    {"substring":SRC_PREFIX,"replacement":"_${env}_"},
+    {"substring":TGT_PREFIX,"replacement":"_${env}_"}
+  ],
+  "ignored_objects_in_repo":[]
+}
+
+#----------------------------------------------------------------------------------------------------------------------
+# Show help
+#----------------------------------------------------------------------------------------------------------------------
+def ShowHelp():
+  print("Databricks schema compare tool benchmarks")
+  print("")
+  print("Usage: python dbsc_bench.py [--scales:<list>] [--schemas:<n>] [--tables:<n>] [--columns:<n>] [--views:<n>]")
+  print("                            [--viewlines:<n>] [--functions:<n>] [--latency:<ms>] [--jitter:<ms>] [--mutation:<pct>]")
+  print("                            [--seed:<n>] [--repeat:<n>] [--save:<file>] [--baseline:<file>] [--tolerance:<pct>]")
+  print("       python dbsc_bench.py --generate:<folder> [--schemas:<n>] [--tables:<n>] [--columns:<n>] [--views:<n>]")
+  print("                            [--viewlines:<n>] [--functions:<n>] [--seed:<n>]")
+  print("")
+  print("--scales:<list>    : Comma separated list of scale factors applied to object counts (default "+",".join([str(x) for x in BENCH_SCALES])+")")
+  print("--schemas:<n>      : Number of schemas on each side")
+  print("--tables:<n>       : Number of tables per schema (at scale 1)")
+  print("--columns:<n>      : Number of columns per table")
+  print("--views:<n>        : Number of views per schema (at scale 1)")
+  print("--viewlines:<n>    : Number of lines in view bodies")
+  print("--functions:<n>    : Number of functions per schema (at scale 1)")
+  print("--latency:<ms>     : Latency injected in every query of the fake cursor")
+  print("--jitter:<ms>      : Random latency added to injected latency")
+  print("--mutation:<pct>   : Percentage of objects that are different in target")
+  print("--seed:<n>         : Random seed for synthetic catalog generation")
+  print("--repeat:<n>       : Number of repetitions per benchmark (best time is taken)")
+  print("--save:<file>      : Save results as json baseline file")
+  print("--baseline:<file>  : Compare results against json baseline file")
+  print("--tolerance:<pct>  : Allowed slowdown against baseline before reporting regression (default "+str(int(REGRESSION_TOLERANCE*100))+")")
+  print("--generate:<folder>: No benchmarks, just generate synthetic project folder")
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get command line arguments
+#----------------------------------------------------------------------------------------------------------------------
+def GetCommandLineOptions(Options):
+
+  #Default values for options
+  Config=dict(BENCH_CONFIG)
+  Scales=list(BENCH_SCALES)
+  Repeat=BENCH_REPEAT
+  SaveFile=""
+  BaselineFile=""
+  Tolerance=REGRESSION_TOLERANCE
+  GenerateFolder=""
+
+  #Get arguments
+  try:
+    for item in sys.argv[1:]:
+      if item in ["--help","-h","/?"]:
+        ShowHelp()
+        return False
+      elif item.startswith("--scales:"):
+        Scales=[int(x) for x in item.replace("--scales:","").split(",")]
+      elif item.startswith("--latency:"):
+        Config["latency"]=float(item.replace("--latency:",""))/1000
+      elif item.startswith("--jitter:"):
+        Config["jitter"]=float(item.replace("--jitter:",""))/1000
+      elif item.startswith("--mutation:"):
+        Config["mutation"]=float(item.replace("--mutation:",""))/100
+      elif item.startswith("--repeat:"):
+        Repeat=int(item.replace("--repeat:",""))
+      elif item.startswith("--save:"):
+        SaveFile=item.replace("--save:","")
+      elif item.startswith("--baseline:"):
+        BaselineFile=item.replace("--baseline:","")
+      elif item.startswith("--tolerance:"):
+        Tolerance=float(item.replace("--tolerance:",""))/100
+      elif item.startswith("--generate:"):
+        GenerateFolder=item.replace("--generate:","")
+      elif item.startswith("--") and item[2:item.find(":")] in ["schemas","tables","columns","views","viewlines","functions","seed"]:
+        Config[item[2:item.find(":")]]=int(item[item.find(":")+1:])
+      else:
+        print("Invalid option: ",item)
+        return False
+  except ValueError:
+    print("Invalid numeric value in option: ",item)
+    return False
+
+  #Return arguments
+  Options.append(Config)
+  Options.append(Scales)
+  Options.append(Repeat)
+  Options.append(SaveFile)
+  Options.append(BaselineFile)
+  Options.append(Tolerance)
+  Options.append(GenerateFolder)
+  return True
+
+#----------------------------------------------------------------------------------------------------------------------
+# Generate synthetic catalog
+# (returns dictionary of schemas, each one with its tables, views and functions)
+#----------------------------------------------------------------------------------------------------------------------
+def GenerateCatalog(Config,Scale,Prefix):
+  Rnd=random.Random(Config["seed"])
+  Catalog={}
+  for s in range(Config["schemas"]):
+    SchemaName=Prefix+SCHEMA_SUFFIXES[s%len(SCHEMA_SUFFIXES)]+("" if s<len(SCHEMA_SUFFIXES) else str(s//len(SCHEMA_SUFFIXES)))
+    Schema={"tables":{},"views":{},"functions":{}}
+
+    #Tables
+    for t in range(Config["tables"]*Scale):
+      Columns=[]
+      for c in range(Config["columns"]):
+        Columns.append({
+          "name":f"col_{t}_{c}",
+          "type":Rnd.choice(COLUMN_TYPES),
+          "nullable":(Rnd.random()<0.2),
+          "comment":(f"'Column {c} of table {t}'" if Rnd.random()<0.5 else dbsc.NULL_COMMENT)
+        })
+      Schema["tables"][f"tab_{t}"]={"columns":Columns,"comment":f"'Table {t}'"}
+
+    #Views
+    for v in range(Config["views"]*Scale):
+      Table=f"tab_{Rnd.randrange(max(Config['tables']*Scale,1))}"
+      Lines=["select"]
+      for l in range(Config["viewlines"]):
+        Lines.append(f"  coalesce(a.col_{l}, 'value {l}') as view_col_{l}"+("," if l<Config["viewlines"]-1 else ""))
+      Lines.append(f"from {SchemaName}.{Table} a")
+      Lines.append("where a.col_0 is not null")
+      Schema["views"][f"view_{v}"]={"lines":Lines}
+
+    #Functions
+    for f in range(Config["functions"]*Scale):
+      Parms=[{"name":f"p{p}","type":Rnd.choice(FUNCTION_TYPES)} for p in range(1+Rnd.randrange(3))]
+      if f%4==3:
+        Returns=[{"name":f"r{r}","type":Rnd.choice(FUNCTION_TYPES)} for r in range(2+Rnd.randrange(3))]
+        Body=f"select {', '.join(['p0 as r'+str(r) for r in range(len(Returns))])} from {SchemaName}.tab_0"
+      else:
+        Returns=Rnd.choice(FUNCTION_TYPES)
+        Body=f"concat(cast(p0 as string), '_{f}')"
+      Schema["functions"][f"func_{f}"]={"parameters":Parms,"returns":Returns,"body":Body}
+
+    Catalog[SchemaName]=Schema
+  return Catalog
+
+#----------------------------------------------------------------------------------------------------------------------
+# Mutate catalog (changes column types, view lines and removes objects)
+#----------------------------------------------------------------------------------------------------------------------
+def MutateCatalog(Catalog,Rate,Seed):
+  Rnd=random.Random(Seed+1)
+  for SchemaName in Catalog:
+    Schema=Catalog[SchemaName]
+    for i,TableName in enumerate(Rnd.sample(list(Schema["tables"]),round(Rate*len(Schema["tables"])))):
+      Columns=Schema["tables"][TableName]["columns"]
+      if i%3==0:
+        Columns[Rnd.randrange(len(Columns))]["type"]="STRING"
+      elif i%3==1 and len(Columns)>1:
+        del Columns[Rnd.randrange(len(Columns))]
+      else:
+        del Schema["tables"][TableName]
+    for ViewName in Rnd.sample(list(Schema["views"]),round(Rate*len(Schema["views"]))):
+      Lines=Schema["views"][ViewName]["lines"]
+      Lines[1+Rnd.randrange(len(Lines)-2)]+=" + 1"
+      Lines.insert(1,"  current_date() as changed_col,")
+    for FunctionName in Rnd.sample(list(Schema["functions"]),round(Rate*len(Schema["functions"]))):
+      Schema["functions"][FunctionName]["body"]+=" || '_changed'"
+  return Catalog
+
+#----------------------------------------------------------------------------------------------------------------------
+# Table DDL as found in project repository
+#----------------------------------------------------------------------------------------------------------------------
+def ProjectTableDdl(SchemaName,TableName,Table):
+  Columns=[]
+  for Col in Table["columns"]:
+    Columns.append(f"  {Col['name']} {Col['type'].lower()}"+(" not null" if Col["nullable"] else "")+(f" comment {Col['comment']}" if Col["comment"]!=dbsc.NULL_COMMENT else ""))
+  return f"create or replace table {SchemaName}.{TableName} (\n"+",\n".join(Columns)+f"\n) using delta comment {Table['comment']}"
+
+#----------------------------------------------------------------------------------------------------------------------
+# View DDL as found in project repository
+#----------------------------------------------------------------------------------------------------------------------
+def ProjectViewDdl(SchemaName,ViewName,View):
+  return f"create or replace view {SchemaName}.{ViewName} as\n"+"\n".join(View["lines"])
+
+#----------------------------------------------------------------------------------------------------------------------
+# Function DDL as found in project repository
+#----------------------------------------------------------------------------------------------------------------------
+def ProjectFunctionDdl(SchemaName,FunctionName,Function):
+  Parms=", ".join([Parm["name"]+" "+Parm["type"].lower() for Parm in Function["parameters"]])
+  if isinstance(Function["returns"],list):
+    Returns="table ("+", ".join([Col["name"]+" "+Col["type"].lower() for Col in Function["returns"]])+")"
+  else:
+    Returns=Function["returns"].lower()
+  return f"create or replace function {SchemaName}.{FunctionName} ({Parms})\nreturns {Returns}\nreturn {Function['body']}"
+
+#----------------------------------------------------------------------------------------------------------------------
+# Get all DDL statements of catalog
+#----------------------------------------------------------------------------------------------------------------------
+def CatalogStatements(Catalog):
+  Statements=[]
+  for SchemaName in Catalog:
+    Schema=Catalog[SchemaName]
+    Statements.extend([ProjectTableDdl(SchemaName,Name,Schema["tables"][Name]) for Name in Schema["tables"]])
+    Statements.extend([ProjectViewDdl(SchemaName,Name,Schema["views"][Name]) for Name in Schema["views"]])
+    Statements.extend([ProjectFunctionDdl(SchemaName,Name,Schema["functions"][Name]) for Name in Schema["functions"]])
+  return Statements
+
+#----------------------------------------------------------------------------------------------------------------------
+# Write catalog as project folder with databricks notebooks (one notebook per schema and object kind)
+#----------------------------------------------------------------------------------------------------------------------
+def WriteProjectFolder(Catalog,Folder):
+  for SchemaName in Catalog:
+    Schema=Catalog[SchemaName]
+    Notebooks={
+      "tables":[ProjectTableDdl(SchemaName,Name,Schema["tables"][Name]) for Name in Schema["tables"]],
+      "views":[ProjectViewDdl(SchemaName,Name,Schema["views"][Name]) for Name in Schema["views"]],
+      "functions":[ProjectFunctionDdl(SchemaName,Name,Schema["functions"][Name]) for Name in Schema["functions"]]
+    }
+    os.makedirs(os.path.join(Folder,SchemaName),exist_ok=True)
+    for Kind in Notebooks:
+      Cells=[]
+      for Ddl in Notebooks[Kind]:
+        Cells.append("# MAGIC %sql\n"+"\n".join(["# MAGIC "+Line for Line in (Ddl+";").split("\n")])+"\n")
+      with open(os.path.join(Folder,SchemaName,Kind+".py"),"w") as File:
+        File.write("# Databricks notebook source\n"+"\n# COMMAND ----------\n\n".join(Cells))
+
+#----------------------------------------------------------------------------------------------------------------------
+# Fake cursor that answers metastore queries from synthetic catalog with injected latency
+#----------------------------------------------------------------------------------------------------------------------
+class FakeCursor:
+
+  #Constructor
+  def __init__(self,Catalog,Latency=0.0,Jitter=0.0,Seed=1):
+    self.Catalog=Catalog
+    self.Latency=Latency
+    self.Jitter=Jitter
+    self.Rnd=random.Random(Seed)
+    self.Rows=[]
+    self.Queries=0
+
+  #Execute query
+  def execute(self,Query):
+    self.Queries+=1
+    if self.Latency!=0 or self.Jitter!=0:
+      time.sleep(self.Latency+self.Jitter*self.Rnd.random())
+    Words=Query.strip().split(" ")
+    Lower=Query.lower()
+    if Lower.startswith("show tables in "):
+      self.Rows=self.ShowTables(Words[3])
+    elif Lower.startswith("show user functions in "):
+      self.Rows=self.ShowFunctions(Words[4])
+    elif Lower.startswith("show create table "):
+      self.Rows=self.ShowCreateTable(Words[3])
+    elif Lower.startswith("show schemas"):
+      self.Rows=[dbsc.CassetteRow({"databaseName":Name}) for Name in sorted(self.Catalog)]
+    elif Lower.startswith("show views in "):
+      self.Rows=self.ShowViews(Words[3])
+    elif Lower.startswith("describe function extended "):
+      self.Rows=self.DescribeFunction(Words[3])
+    elif Lower.startswith("describe function "):
+      self.Rows=self.DescribeFunction(Words[2],Extended=False)
+    elif Lower.startswith("select routine_name,data_type from "):
+      self.Rows=self.FunctionTypes(Lower.split("routine_schema='")[1].split("'")[0])
+    elif Lower.find("information_schema")!=-1:
+      self.Rows=self.Fingerprints(Lower.split("table_schema='")[1].split("'")[0])
+    else:
+      raise Exception(f"[PARSE_SYNTAX_ERROR] Query not supported by fake cursor: {Query}")
+
+  #Fetch all rows
+  def fetchall(self):
+    Rows=self.Rows
+    self.Rows=[]
+    return Rows
+
+  #Get schema from catalog
+  def GetSchema(self,SchemaName):
+    if SchemaName not in self.Catalog:
+      raise Exception(f"[SCHEMA_NOT_FOUND] The schema `{SchemaName}` cannot be found")
+    return self.Catalog[SchemaName]
+
+  #Show tables
+  def ShowTables(self,SchemaName):
+    Schema=self.GetSchema(SchemaName)
+    return [dbsc.CassetteRow({"database":SchemaName,"tableName":Name,"isTemporary":False}) for Name in list(Schema["tables"])+list(Schema["views"])]
+
+  #Show views
+  def ShowViews(self,SchemaName):
+    Schema=self.GetSchema(SchemaName)
+    return [dbsc.CassetteRow({"namespace":SchemaName,"viewName":Name,"isTemporary":False}) for Name in Schema["views"]]
+
+  #Show user functions
+  def ShowFunctions(self,SchemaName):
+    Schema=self.GetSchema(SchemaName)
+    return [dbsc.CassetteRow({"function":"spark_catalog."+SchemaName+"."+Name}) for Name in Schema["functions"]]
+
+  #Show create table
+  def ShowCreateTable(self,FullName):
+    Catalog,SchemaName,ObjectName=dbsc.SplitObjectName(FullName)
+    Schema=self.GetSchema(SchemaName)
+    if ObjectName in Schema["tables"]:
+      Table=Schema["tables"][ObjectName]
+      Columns=[]
+      for Col in Table["columns"]:
+        Columns.append(f"  {Col['name']} {Col['type']}"+(" NOT NULL" if Col["nullable"] else "")+(f" COMMENT {Col['comment']}" if Col["comment"]!=dbsc.NULL_COMMENT else ""))
+      Statement=f"CREATE TABLE spark_catalog.{SchemaName}.{ObjectName} (\n"+",\n".join(Columns)+f")\nUSING delta\nCOMMENT {Table['comment']}\nTBLPROPERTIES (\n  'delta.minReaderVersion' = '1',\n  'delta.minWriterVersion' = '2')\n"
+    elif ObjectName in Schema["views"]:
+      View=Schema["views"][ObjectName]
+      Statement=f"CREATE VIEW spark_catalog.{SchemaName}.{ObjectName} (\n  view_col)\nTBLPROPERTIES (\n  'transient_lastDdlTime' = '1700000000')\nAS "+"\n".join(View["lines"])+"\n"
+    else:
+      raise Exception(f"[TABLE_OR_VIEW_NOT_FOUND] The table or view `{SchemaName}`.`{ObjectName}` cannot be found")
+    return [dbsc.CassetteRow({"createtab_stmt":Statement})]
+
+  #Object fingerprints as computed by information schema query (columns sorted by name)
+  def Fingerprints(self,SchemaName):
+    Schema=self.GetSchema(SchemaName)
+    Hash=lambda Value:hashlib.sha256(json.dumps(Value,sort_keys=True).encode("utf-8")).hexdigest()
+    Rows=[]
+    for Name,Table in Schema["tables"].items():
+      Rows.append(dbsc.CassetteRow({"kind":"TBVW","object":Name,"hash":Hash(["TABLE",Table["comment"],sorted([[Col["name"],Col["type"],Col["nullable"],Col["comment"]] for Col in Table["columns"]])])}))
+    for Name,View in Schema["views"].items():
+      Rows.append(dbsc.CassetteRow({"kind":"TBVW","object":Name,"hash":Hash(["VIEW",View["lines"]])}))
+    for Name,Function in Schema["functions"].items():
+      Rows.append(dbsc.CassetteRow({"kind":"FUNC","object":Name,"hash":Hash([Function["parameters"],Function["returns"],Function["body"]])}))
+    return Rows
+
+  #Function types as returned by information schema routines (table functions have table data type)
+  def FunctionTypes(self,SchemaName):
+    Schema=self.GetSchema(SchemaName)
+    return [dbsc.CassetteRow({"routine_name":Name,"data_type":("TABLE" if isinstance(Function["returns"],list) else Function["returns"])}) for Name,Function in Schema["functions"].items()]
+
+  #Describe function (extended output adds body and other attributes)
+  def DescribeFunction(self,FullName,Extended=True):
+    Catalog,SchemaName,ObjectName=dbsc.SplitObjectName(FullName)
+    Schema=self.GetSchema(SchemaName)
+    if ObjectName not in Schema["functions"]:
+      raise Exception(f"[ROUTINE_NOT_FOUND] The function `{SchemaName}`.`{ObjectName}` cannot be found")
+    Function=Schema["functions"][ObjectName]
+    Lines=[f"Function:      spark_catalog.{SchemaName}.{ObjectName}"]
+    Lines.append("Type:          "+("TABLE" if isinstance(Function["returns"],list) else "SCALAR"))
+    for i,Parm in enumerate(Function["parameters"]):
+      Lines.append(("Input:         " if i==0 else "               ")+Parm["name"]+" "+Parm["type"])
+    if isinstance(Function["returns"],list):
+      for i,Col in enumerate(Function["returns"]):
+        Lines.append(("Returns:       " if i==0 else "               ")+Col["name"]+" "+Col["type"])
+    else:
+      Lines.append("Returns:       "+Function["returns"])
+    if Extended==False:
+      return [dbsc.CassetteRow({"function_desc":Line}) for Line in Lines]
+    Lines.append("Deterministic: true")
+    Lines.append("Data Access:   CONTAINS SQL")
+    Lines.append("Owner:         bench@example.com")
+    Lines.append("Body:          "+Function["body"])
+    return [dbsc.CassetteRow({"function_desc":Line}) for Line in Lines]
+
+#----------------------------------------------------------------------------------------------------------------------
+# Measure best time of several runs (every run calls function until it lasts minimum sample time and takes the mean, so
+# fast benchmarks are not measured from a single call)
+# (Prepare is called before every call outside of timing and its result is passed to function)
+#----------------------------------------------------------------------------------------------------------------------
+def BestTime(Function,Repeat,Prepare=None):
+  Best=None
+  for i in range(Repeat):
+    Elapsed=0.0
+    Calls=0
+    while Calls==0 or Elapsed<MIN_SAMPLE_TIME:
+      Argument=(Prepare() if Prepare!=None else None)
+      Start=timer()
+      Function(Argument)
+      Elapsed+=timer()-Start
+      Calls+=1
+    Best=(Elapsed/Calls if Best==None or Elapsed/Calls<Best else Best)
+  return Best
+
+#----------------------------------------------------------------------------------------------------------------------
+# Measure peak memory of external comparison (number of schemas grows with scale and both sides are equal, so that
+# neither the largest schema nor the comparison result grow, spill runs are small to merge several of them)
+#----------------------------------------------------------------------------------------------------------------------
+def ExternalPeakMemory(Config,Scale,WorkFolder):
+  MemConfig=dict(Config)
+  MemConfig["schemas"]=Config["schemas"]*Scale
+  SrcCatalog=GenerateCatalog(MemConfig,1,SRC_PREFIX)
+  TgtCatalog=GenerateCatalog(MemConfig,1,TGT_PREFIX)
+  Catalog=dict(SrcCatalog)
+  Catalog.update(TgtCatalog)
+  Ctx=dbsc.NewContext(DBSC_CONFIG,{"progress":False,"external":True,"externalfolder":WorkFolder})
+  RunObjects=dbsc.EXTERNAL_RUN_OBJECTS
+  dbsc.EXTERNAL_RUN_OBJECTS=MEMORY_RUN_OBJECTS
+  tracemalloc.start()
+  try:
+    Status,Message,Result=dbsc.Compare(Ctx,dbsc.SCHEMA_ARG_SEPARATOR.join(SrcCatalog),dbsc.SCHEMA_ARG_SEPARATOR.join(TgtCatalog),Cursor=FakeCursor(Catalog))
+    Peak=tracemalloc.get_traced_memory()[1]
+  finally:
+    tracemalloc.stop()
+    dbsc.EXTERNAL_RUN_OBJECTS=RunObjects
+  return {"objects":(Result["compared"] if Status==True else 0),"peak":Peak}
+
+#----------------------------------------------------------------------------------------------------------------------
+# Check archive index gives the same objects as a full archive read (archive with mixed case schema and object names
+# read twice, first run builds the index in a cache folder inside work folder and second run skips members with it)
+#----------------------------------------------------------------------------------------------------------------------
+def ArchiveIndexCheck(WorkFolder):
+  ArchiveFile=os.path.join(WorkFolder,"archive.zip")
+  Cells={
+    "Dev_Bronze/Tables.py":["create table Dev_Bronze.MyTab (Id int, Name string)","create table Dev_Bronze.my_other (id int)"],
+    "Dev_Silver/Views.py":["create view Dev_Silver.MyView as select Id from Dev_Bronze.MyTab"]
+  }
+  with zipfile.ZipFile(ArchiveFile,"w") as Archive:
+    for Member in Cells:
+      Archive.writestr(Member,"# Databricks notebook source\n"+"\n# COMMAND ----------\n\n".join(["# MAGIC %sql\n# MAGIC "+Ddl+";\n" for Ddl in Cells[Member]]))
+  Environment={Name:os.environ.get(Name) for Name in ["XDG_CACHE_HOME","LOCALAPPDATA"]}
+  for Name in Environment:
+    os.environ[Name]=os.path.join(WorkFolder,"cache")
+  try:
+    Runs=[]
+    for Run in range(2):
+      Ctx=dbsc.NewContext(DBSC_CONFIG,{"progress":False})
+      Status,Message,SchemaDef=dbsc.GetSchemaFromProject(Ctx,"SRC",ArchiveFile,"Dev_Bronze","My*")
+      Runs.append(sorted(SchemaDef) if Status==True else None)
+  finally:
+    for Name,Value in Environment.items():
+      if Value==None:
+        os.environ.pop(Name,None)
+      else:
+        os.environ[Name]=Value
+  return Runs[0]!=None and len(Runs[0])!=0 and Runs[0]==Runs[1],Runs
+
+#----------------------------------------------------------------------------------------------------------------------
+# Run all benchmarks at a scale (peak memory of external comparison is only measured when requested)
+#----------------------------------------------------------------------------------------------------------------------
+def RunScale(Ctx,Config,Scale,Repeat,WorkFolder,MeasureMemory=True):
+
+  #Generate source and target catalogs
+  SrcCatalog=GenerateCatalog(Config,Scale,SRC_PREFIX)
+  TgtCatalog=MutateCatalog(GenerateCatalog(Config,Scale,TGT_PREFIX),Config["mutation"],Config["seed"])
+  SrcSchemas=dbsc.SCHEMA_ARG_SEPARATOR.join(SrcCatalog)
+  TgtSchemas=dbsc.SCHEMA_ARG_SEPARATOR.join(TgtCatalog)
+  Statements=CatalogStatements(SrcCatalog)
+  Folder=os.path.join(WorkFolder,f"scale{Scale}")
+  WriteProjectFolder(SrcCatalog,Folder)
+  Objects=len(Statements)
+  Results={}
+
+  #Sql parser and object definition parser
+  Results["SqlParse"]=BestTime(lambda x:[dbsc.SqlParse(Stn) for Stn in Statements],Repeat)
+  Results["GetObjectDefinition"]=BestTime(lambda x:[dbsc.GetObjectDefinition(Ctx,"SRC",Stn,list(TgtCatalog),"*") for Stn in Statements],Repeat)
+
+  #Schema from project folder and from metastore (fake cursor)
+  Results["GetSchemaFromProject"]=BestTime(lambda x:dbsc.GetSchemaFromProject(Ctx,"SRC",Folder,TgtSchemas,"*"),Repeat)
+  Results["GetSchemaFromMetastore"]=BestTime(lambda x:dbsc.GetSchemaFromMetastore(Ctx,"TGT",FakeCursor(TgtCatalog,Config["latency"],Config["jitter"],Config["seed"]),TgtSchemas,"*"),Repeat)
+
+  #Comparison (schema definitions are modified by comparison, so a fresh copy is used on every run, and so is a fresh
+  #context, otherwise bodies replaced by previous runs are taken from the context cache while catalog fits in it)
+  Status,Message,SrcSchemaDef=dbsc.GetSchemaFromMetastore(Ctx,"SRC",FakeCursor(SrcCatalog),SrcSchemas,"*")
+  Status,Message,TgtSchemaDef=dbsc.GetSchemaFromMetastore(Ctx,"TGT",FakeCursor(TgtCatalog),TgtSchemas,"*")
+  Results["CompareSchemas"]=BestTime(lambda x:dbsc.CompareSchemas(x[2],x[0],x[1],False,False,False,False),Repeat,lambda:(copy.deepcopy(SrcSchemaDef),copy.deepcopy(TgtSchemaDef),dbsc.NewContext(DBSC_CONFIG)))
+  ComparedObjects,Differences,DiffObjects,Comparison=dbsc.CompareSchemas(Ctx,copy.deepcopy(SrcSchemaDef),copy.deepcopy(TgtSchemaDef),False,False,False,False)
+
+  #Table printing
+  def PrintComparison(Argument):
+    with contextlib.redirect_stdout(io.StringIO()):
+      if len(Comparison)!=0:
+        dbsc.PrintTable(["Object","Item",SrcSchemas,TgtSchemas],["L","L","LW","LW"],Comparison,200)
+  Results["PrintTable"]=BestTime(PrintComparison,Repeat)
+
+  #Peak memory of external comparison
+  Memory=(ExternalPeakMemory(Config,Scale,WorkFolder) if MeasureMemory==True else None)
+
+  #Return results
+  return Objects,Differences,Results,Memory
+
+#----------------------------------------------------------------------------------------------------------------------
+# Calculate scaling exponent between two measures (1=linear, 2=quadratic)
+#----------------------------------------------------------------------------------------------------------------------
+def ScalingSlope(Size1,Time1,Size2,Time2):
+  if Size1==Size2 or Time1<=0 or Time2<=0:
+    return 0.0
+  return math.log(Time2/Time1)/math.log(Size2/Size1)
+
+#----------------------------------------------------------------------------------------------------------------------
+# Calculate scaling exponent fitted across all measures (least squares slope of log time on log size, so a noisy
+# measure at one scale weighs less than in the slope between two scales)
+#----------------------------------------------------------------------------------------------------------------------
+def FittedSlope(Sizes,Times):
+  Points=[(math.log(Size),math.log(Time)) for Size,Time in zip(Sizes,Times) if Size>0 and Time>0]
+  if len(Points)<2:
+    return 0.0
+  MeanX=sum([X for X,Y in Points])/len(Points)
+  MeanY=sum([Y for X,Y in Points])/len(Points)
+  Variance=sum([(X-MeanX)**2 for X,Y in Points])
+  if Variance==0:
+    return 0.0
+  return sum([(X-MeanX)*(Y-MeanY) for X,Y in Points])/Variance
+
+#----------------------------------------------------------------------------------------------------------------------
+# Main
+#----------------------------------------------------------------------------------------------------------------------
+def Main():
+
+  #Get command line arguments
+  Options=[]
+  if GetCommandLineOptions(Options)==False:
+    return 1
+  Config=Options[0]
+  Scales=Options[1]
+  Repeat=Options[2]
+  SaveFile=Options[3]
+  BaselineFile=Options[4]
+  Tolerance=Options[5]
+  GenerateFolder=Options[6]
+
+  #Create dbsc run context
+  Ctx=dbsc.NewContext(DBSC_CONFIG)
+
+  #Generate mode
+  if len(GenerateFolder)!=0:
+    Catalog=GenerateCatalog(Config,1,SRC_PREFIX)
+    WriteProjectFolder(Catalog,GenerateFolder)
+    print(f"Generated {len(CatalogStatements(Catalog))} object definition(s) in {GenerateFolder}")
+    return 0
+
+  #Run benchmarks on all scales (repetitions go round all scales and best time of every scale is kept, so changes of
+  #machine speed during the run affect all scales alike instead of the scale that was running)
+  WorkFolder=tempfile.mkdtemp(prefix="dbsc_bench_")
+  Measures={}
+  try:
+    ArchiveIndexOk,ArchiveRuns=ArchiveIndexCheck(WorkFolder)
+    for Round in range(Repeat):
+      for Scale in Scales:
+        print(f"Running benchmarks at scale {Scale} (round {Round+1} of {Repeat}) ...",end="\r")
+        Objects,Differences,Results,Memory=RunScale(Ctx,Config,Scale,1,WorkFolder,Round==0)
+        if Round==0:
+          Measures[Scale]={"objects":Objects,"differences":Differences,"results":Results,"memory":Memory}
+        else:
+          Measures[Scale]["results"]={Name:min(Time,Results[Name]) for Name,Time in Measures[Scale]["results"].items()}
+  finally:
+    shutil.rmtree(WorkFolder,ignore_errors=True)
+  print(" "*60,end="\r")
+
+  #Results table and scaling check
+  Benchmarks=list(Measures[Scales[0]]["results"])
+  Rows=[]
+  SuperLinear=[]
+  for Name in Benchmarks:
+    Row=[Name]+[f"{Measures[Scale]['results'][Name]*1000:.2f}" for Scale in Scales]
+    if len(Scales)>=2:
+      Last=Measures[Scales[-1]]
+      Slope=FittedSlope([Measures[Scale]["objects"] for Scale in Scales],[Measures[Scale]["results"][Name] for Scale in Scales])
+      Row.append(f"{Slope:.2f}")
+      if Last["results"][Name]<MIN_MEASURABLE_TIME:
+        Row.append("too fast")
+      elif Slope>SUPERLINEAR_SLOPE:
+        SuperLinear.append(Name)
+        Row.append("super-linear")
+      else:
+        Row.append("ok")
+    Rows.append(Row)
+  Heading=["Benchmark"]+[f"x{Scale} ({Measures[Scale]['objects']} obj) ms" for Scale in Scales]+(["Slope","Scaling"] if len(Scales)>=2 else [])
+  dbsc.PrintTable(Heading,["L"]+["R"]*(len(Heading)-1),Rows,9999)
+
+  #Peak memory of external comparison must not grow with catalog size
+  Rows=[["x"+str(Scale),Measures[Scale]["memory"]["objects"],f"{Measures[Scale]['memory']['peak']/1024:.0f}"] for Scale in Scales]
+  dbsc.PrintTable(["External comparison","Objects","Peak KB"],["L","R","R"],Rows,9999)
+  #(peak is not monotonic, so the largest slope between consecutive scales is checked instead of first and last scale)
+  MemoryGrowth=False
+  if len(Scales)>=2:
+    Memory=[Measures[Scale]["memory"] for Scale in Scales]
+    Slope=max([ScalingSlope(Prev["objects"],Prev["peak"],Next["objects"],Next["peak"]) for Prev,Next in zip(Memory,Memory[1:])])
+    MemoryGrowth=(len([Item for Item in Memory if Item["objects"]==0])!=0 or Slope>MEMORY_FLAT_SLOPE)
+    print(f"External comparison peak memory slope {Slope:.2f} (largest between consecutive scales, maximum {MEMORY_FLAT_SLOPE:.2f})")
+
+  #Archive index must not change the objects read from an archive
+  print(f"Archive index runs {ArchiveRuns[0]} and {ArchiveRuns[1]}"+(" (different)" if ArchiveIndexOk==False else ""))
+
+  #Compare against baseline
+  Regressions=[]
+  if len(BaselineFile)!=0:
+    try:
+      with open(BaselineFile,"r") as File:
+        Baseline=json.load(File)
+    except Exception as Ex:
+      print(f"Exception reading baseline file ({BaselineFile}): {str(Ex)}")
+      return 1
+    Rows=[]
+    for Name in Benchmarks:
+      for Scale in Scales:
+        if Name in Baseline["results"] and str(Scale) in Baseline["results"][Name]:
+          Before=Baseline["results"][Name][str(Scale)]
+          Now=Measures[Scale]["results"][Name]
+          Ratio=(Now/Before if Before>0 else 0)
+          Status=("regression" if Ratio>1+Tolerance else "ok")
+          if Status=="regression":
+            Regressions.append(f"{Name} x{Scale}")
+          Rows.append([Name,"x"+str(Scale),f"{Before*1000:.2f}",f"{Now*1000:.2f}",f"{Ratio:.2f}",Status])
+    if len(Rows)!=0:
+      dbsc.PrintTable(["Benchmark","Scale","Baseline ms","Current ms","Ratio","Status"],["L","R","R","R","R","L"],Rows,9999)
+
+  #Save baseline
+  if len(SaveFile)!=0:
+    Baseline={
+      "config":Config,
+      "scales":Scales,
+      "objects":{str(Scale):Measures[Scale]["objects"] for Scale in Scales},
+      "results":{Name:{str(Scale):Measures[Scale]["results"][Name] for Scale in Scales} for Name in Benchmarks},
+      "memory":{str(Scale):Measures[Scale]["memory"]["peak"] for Scale in Scales}
+    }
+    try:
+      with open(SaveFile,"w") as File:
+        json.dump(Baseline,File,indent=2)
+    except Exception as Ex:
+      print(f"Exception writing baseline file ({SaveFile}): {str(Ex)}")
+      return 1
+
+  #Summary
+  if len(SuperLinear)!=0:
+    print("Super-linear scaling detected: "+", ".join(SuperLinear))
+  if len(Regressions)!=0:
+    print("Regressions against baseline: "+", ".join(Regressions))
+  if MemoryGrowth==True:
+    print("Peak memory of external comparison grows with catalog size")
+  if ArchiveIndexOk==False:
+    print("Archive index leaves out objects read without it")
+  Failed=(len(SuperLinear)!=0 or len(Regressions)!=0 or MemoryGrowth==True or ArchiveIndexOk==False)
+  print(("[Ok]" if Failed==False else "[Fail]")+f" Ran {len(Benchmarks)} benchmark(s) at {len(Scales)} scale(s)")
+  return (0 if Failed==False else 1)
+
+#Run main
+if __name__=="__main__":
+  sys.exit(Main())